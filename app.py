@@ -4,14 +4,21 @@
 #   1) pip install -r requirements.txt
 #   2) streamlit run app.py
 # O banco de dados (SQLite) é criado automaticamente como 'lexfinance.db'.
+# Para usar outro caminho (ex.: SSD local), defina LEXFINANCE_DB; o perfil de
+# ajuste do SQLite ('local' ou 'network') pode ser forçado com LEXFINANCE_DB_PROFILE.
+# LEXFINANCE_PROFILE=1 liga o profiler SQL desde o início (ver Backup & Utilitários).
+# LEXFINANCE_POOL_SIZE e LEXFINANCE_POOL_OVERFLOW ajustam o pool de conexões (usuários simultâneos).
 
 import pandas as pd
 import streamlit as st
-from sqlmodel import Session
 from datetime import date
 
-from database import create_db_and_tables, engine
-from services import client_service, process_service, finance_service, expense_service, report_service
+from database import create_db_and_tables, read_session, write_session, snapshot_dir
+from write_queue import write, write_queue_stats
+import database
+from ui.utils import download_zip, paginate, rerun_fragment
+from services.money import format_brl, format_brl_series, parse_cents, to_reais
+from services import client_service, process_service, finance_service, expense_service, report_service, import_service, export_service, snapshot_service, rollup_service, search_service, receivables_service, forecast_service, cache
 
 ########################
 # CONFIG & INIT        #
@@ -36,20 +43,405 @@ with st.sidebar:
         "Backup & Utilitários",
     ])
 
-# Helper for formatting currency
-def money(val: float) -> str:
-    if val is None:
-        val = 0
-    return f"R$ {val/100:,.2f}".replace(",", "X").replace(".", ",").replace("X", ".")
+    stats = cache.cache_stats()
+    st.caption(f"Cache: {stats['hits']} acertos / {stats['misses']} consultas ({stats['hit_rate']:.0%}), {stats['entries']}/{stats['maxsize']} entradas")
+    queue_stats = write_queue_stats()
+    if queue_stats["batches"]:
+        st.caption(f"Escritas: {queue_stats['writes']} em {queue_stats['batches']} commits, "
+                   f"fila {queue_stats['depth']}, commit p95 {queue_stats['commit_p95_ms']:.1f} ms")
 
-# Helper for cents conversion
-def cents(val: float) -> int:
-    if val is None:
-        return 0
-    return int(round(float(val) * 100))
+# Tags this run's SQL statements for the profiler (no-op cost when it is off)
+database.profile_page(page)
 
-# Open Session for the whole run
-with Session(engine) as session:
+########################
+# SEÇÕES (FRAGMENTOS)  #
+########################
+# Parts of a page with their own widgets run as st.fragment: a widget inside one
+# reruns only that section and its queries, not the whole page. Each opens its own
+# read_session(), since on a section rerun the page's session is already closed.
+# Writes that other sections read call st.rerun() (whole page); the rest
+# rerun_fragment().
+
+@st.fragment
+def secao_fluxo_caixa():
+    # Read from the monthly_ledger rollup: one row per month, whatever the history size
+    granularidades = {"Mensal": "month", "Trimestral": "quarter", "Anual": "year"}
+    c1, c2, c3 = st.columns(3)
+    gran_label = c1.selectbox("Agrupar por", list(granularidades.keys()))
+    dt_ini = c2.date_input("De", value=None)
+    dt_fim = c3.date_input("Até", value=None)
+
+    with read_session() as session:
+        # Revenue, expenses and balance per period in one query (whole months)
+        df_cash = finance_service.get_cash_flow(
+            session,
+            start=dt_ini.isoformat() if dt_ini else None,
+            end=dt_fim.isoformat() if dt_fim else None,
+            granularity=granularidades[gran_label]
+        )
+
+    if df_cash.empty:
+        st.info("Sem movimentações financeiras ainda.")
+    else:
+        st.dataframe(df_cash, use_container_width=True)
+
+        # Chart
+        st.bar_chart(df_cash.set_index(df_cash.columns[0])[["Recebido", "Despesas", "Saldo"]])
+
+@st.fragment
+def secao_previsao():
+    # Open balances rolled forward through each condition's payment history, plus recurring and scheduled expenses
+    horizonte = st.selectbox("Horizonte", [6, 12, 24], index=1, format_func=lambda m: f"{m} meses", key="previsao_meses")
+    with read_session() as session:
+        df_prev = forecast_service.get_cash_flow_forecast(session, months=horizonte)
+    p1, p2, p3 = st.columns(3)
+    p1.metric("Receita prevista", format_brl(df_prev["inflow"].sum()))
+    p2.metric("Despesas previstas", format_brl((df_prev["recurring"] + df_prev["scheduled"]).sum()))
+    p3.metric("Saldo previsto", format_brl(df_prev["cumulative"].iloc[-1]))
+    tab_prev = forecast_service.forecast_table(df_prev).set_index("Mês")
+    st.line_chart(tab_prev[["Receita prevista", "Saldo acumulado"]])
+    st.dataframe(tab_prev, use_container_width=True)
+    st.caption("Processos sem nenhum recebimento não entram na previsão (não há data de início).")
+
+@st.fragment
+def secao_relatorios_clientes(client_map_rep: dict):
+    # client_map_rep: label -> id of the clients on the current page of the listing
+    sel_cli_rep = st.selectbox("Selecione o cliente para gerar relatório", list(client_map_rep.keys()))
+
+    if st.button("Gerar Relatório PDF"):
+        cid = client_map_rep[sel_cli_rep]
+
+        # Rendered in memory; unchanged clients come straight from the cache
+        with read_session() as session:
+            pdf_file, pdf_data = report_service.get_client_report(session, cid)
+
+        st.download_button(
+            label="Baixar PDF",
+            data=pdf_data,
+            file_name=pdf_file,
+            mime="application/pdf"
+        )
+        st.success(f"Relatório gerado: {pdf_file}")
+
+    if st.button("Gerar extratos de todos os clientes (ZIP)"):
+        # Data read in a few queries, PDFs rendered in parallel
+        with st.spinner("Gerando extratos..."), read_session() as session:
+            docs = download_zip(
+                "Baixar extratos (ZIP)",
+                lambda target: report_service.generate_statements_zip(session, target),
+                file_name=f"extratos_{date.today().isoformat()}.zip"
+            )
+        st.dataframe(pd.DataFrame([{
+            "Cliente": d["client"],
+            "Arquivo": d["file"],
+            "Tamanho (KB)": round(d["bytes"] / 1024, 1),
+            "Tempo (ms)": round(d["seconds"] * 1000, 1)
+        } for d in docs]), use_container_width=True)
+
+@st.fragment
+def secao_fases(sel_proc_id: int):
+    # Everything below the process selector reads the phases, so phase writes rerun the page
+    with read_session() as session:
+        st.markdown("### Adicionar Fase")
+        with st.form("add_fase"):
+            description = st.text_input("Descrição da fase *", placeholder="Ex.: Inquérito Policial")
+            condition = st.text_input("Condição (opcional)", placeholder="Ex.: Assinatura do contrato")
+            value = st.number_input("Valor da fase (R$) *", min_value=0.0, step=100.0)
+            ok = st.form_submit_button("Salvar fase")
+            
+            if ok and description.strip() and value > 0:
+                write(
+                    process_service.create_phase,
+                    process_id=sel_proc_id, 
+                    description=description.strip(), 
+                    value_centavos=parse_cents(value), 
+                    condition=condition.strip()
+                )
+                st.success("Fase adicionada.")
+                st.rerun()
+
+        st.markdown("### Editar / Excluir Fase")
+        phases = process_service.get_phases_by_process(session, sel_proc_id)
+        
+        if not phases:
+            st.info("Nenhuma fase cadastrada para este processo.")
+            return
+
+        fase_opts = [f"#{p.id} — {p.description} (previsto {format_brl(p.value_centavos)})" for p in phases]
+        fase_map = {label: p.id for label, p in zip(fase_opts, phases)}
+        
+        sel_fase_label = st.selectbox("Escolha a fase para gerenciar", fase_opts)
+        sel_fase_id = fase_map[sel_fase_label]
+        
+        # Find the selected phase object
+        fase_row = next(p for p in phases if p.id == sel_fase_id)
+
+        with st.form("edit_fase"):
+            new_desc = st.text_input("Descrição", value=fase_row.description)
+            new_cond = st.text_input("Condição", value=fase_row.condition or "")
+            new_val = st.number_input("Valor previsto (R$)", min_value=0.0, value=float(to_reais(fase_row.value_centavos)), step=100.0)
+            c1, c2 = st.columns(2)
+            save_fase = c1.form_submit_button("Salvar alterações")
+            del_fase = c2.form_submit_button("Excluir fase")
+        
+        if save_fase:
+            write(
+                process_service.update_phase,
+                sel_fase_id, 
+                description=new_desc.strip(), 
+                condition=new_cond.strip(), 
+                value_centavos=parse_cents(new_val)
+            )
+            st.success("Fase atualizada.")
+            st.rerun()
+            
+        if del_fase:
+            write(process_service.delete_phase, sel_fase_id)
+            st.success("Fase excluída.")
+            st.rerun()
+
+@st.fragment
+def secao_recebimentos(sel_proc_id: int):
+    # Payments only change what this section shows, so their writes rerun just it
+    with read_session() as session:
+        st.markdown("### Registrar Recebimento")
+        phases = process_service.get_phases_by_process(session, sel_proc_id)
+        
+        if not phases:
+            st.info("Adicione ao menos uma fase para registrar recebimento.")
+        else:
+            fase_labels = [f"#{p.id} — {p.description} (previsto {format_brl(p.value_centavos)})" for p in phases]
+            fase_id_map = {label: p.id for label, p in zip(fase_labels, phases)}
+            
+            with st.form("add_pay"):
+                fase_label = st.selectbox("Fase *", list(fase_id_map.keys()))
+                amount = st.number_input("Valor recebido (R$) *", min_value=0.0, step=100.0)
+                rdate = st.date_input("Data do recebimento *", value=date.today())
+                okp = st.form_submit_button("Registrar")
+                
+                if okp and amount > 0:
+                    write(
+                        finance_service.create_payment,
+                        phase_id=fase_id_map[fase_label], 
+                        amount_centavos=parse_cents(amount), 
+                        received_date=rdate.isoformat()
+                    )
+                    st.success("Recebimento registrado.")
+
+        st.markdown("### Editar / Excluir Recebimento")
+        payments_data = finance_service.get_payments_by_process(session, sel_proc_id)
+        
+        if not payments_data:
+            st.info("Nenhum recebimento registrado para este processo.")
+        else:
+            # payments_data is list of (Payment, Phase)
+            pay_opts = []
+            pay_map = {}
+            
+            for pay, ph in payments_data:
+                label = f"#{pay.id} — {ph.description} — {format_brl(pay.amount_centavos)} em {pay.received_date}"
+                pay_opts.append(label)
+                pay_map[label] = pay
+            
+            sel_pay_label = st.selectbox("Escolha o recebimento para gerenciar", pay_opts)
+            prow = pay_map[sel_pay_label]
+
+            with st.form("edit_pay"):
+                new_amount = st.number_input("Valor recebido (R$)", min_value=0.0, value=float(to_reais(prow.amount_centavos)), step=100.0)
+                new_date = st.date_input("Data do recebimento", value=pd.to_datetime(prow.received_date).date())
+                c1, c2 = st.columns(2)
+                save_pay = c1.form_submit_button("Salvar alterações")
+                del_pay = c2.form_submit_button("Excluir recebimento")
+            
+            if save_pay:
+                write(
+                    finance_service.update_payment,
+                    prow.id, 
+                    amount_centavos=parse_cents(new_amount), 
+                    received_date=new_date.isoformat()
+                )
+                st.success("Recebimento atualizado.")
+                rerun_fragment()
+                
+            if del_pay:
+                write(finance_service.delete_payment, prow.id)
+                st.success("Recebimento excluído.")
+                rerun_fragment()
+
+        st.markdown("---")
+        st.markdown("### Fases do processo selecionado")
+        
+        # Received per phase comes from the phase_totals rollup (one query)
+        dfp = finance_service.get_phase_financials(session, sel_proc_id)
+        dff = pd.DataFrame({
+            "FaseID": dfp["phase_id"],
+            "Fase": dfp["description"],
+            "Condicao": dfp["condition"],
+            "ValorPrevisto": to_reais(dfp["value_centavos"]),
+            "Recebido": to_reais(dfp["received_centavos"]),
+            "SaldoFase": to_reais(dfp["balance_centavos"]),
+        })
+        st.dataframe(dff, use_container_width=True)
+
+        st.markdown("### Situação do processo")
+        tot, rec, sal, pct = finance_service.get_process_financials(session, sel_proc_id)
+        c1, c2, c3, c4 = st.columns(4)
+        c1.metric("Total Contrato (soma fases)", format_brl(tot))
+        c2.metric("Recebido", format_brl(rec))
+        c3.metric("Saldo", format_brl(sal))
+        c4.metric("% Recebido", f"{pct*100:.1f}%")
+
+@st.fragment
+def secao_historico_despesas():
+    # New expenses are added above with a full rerun; edits here only change this listing
+    categorias = ["Geral", "Pessoal", "Infraestrutura", "Marketing", "Tributos"]
+    f1, f2, f3 = st.columns(3)
+    busca_exp = f1.text_input("Buscar descrição", key="busca_despesas")
+    filtro_cat = f2.selectbox("Categoria", ["Todas"] + categorias, key="filtro_cat_despesas")
+    filtro_pago = f3.selectbox("Situação", ["Todas", "Pagas", "Pendentes"], key="filtro_pago_despesas")
+    f4, f5 = st.columns(2)
+    exp_ini = f4.date_input("De", value=None, key="despesas_de")
+    exp_fim = f5.date_input("Até", value=None, key="despesas_ate")
+    
+    filtros_exp = (
+        busca_exp,
+        None if filtro_cat == "Todas" else filtro_cat,
+        {"Todas": None, "Pagas": True, "Pendentes": False}[filtro_pago],
+        exp_ini.isoformat() if exp_ini else None,
+        exp_fim.isoformat() if exp_fim else None,
+    )
+    with read_session() as session:
+        pag_exp = paginate("pag_despesas", lambda cursor, size: expense_service.list_expenses(session, *filtros_exp, cursor=cursor, page_size=size), filters=filtros_exp)
+        expenses = pag_exp.items
+        if expenses:
+            raw = pd.DataFrame(
+                [(e.id, e.date, e.description, e.category, e.amount_centavos, e.paid) for e in expenses],
+                columns=["id", "date", "description", "category", "amount_centavos", "paid"],
+            )
+            df_exp = pd.DataFrame({
+                "ID": raw["id"],
+                "Data": raw["date"],
+                "Descrição": raw["description"],
+                "Categoria": raw["category"],
+                "Valor": to_reais(raw["amount_centavos"]),
+                "Pago": raw["paid"].map({True: "Sim", False: "Não"}),
+            })
+            st.dataframe(df_exp, use_container_width=True)
+            
+            # Edit/Delete
+            st.markdown("### Editar / Excluir")
+            exp_opts = ("#" + raw["id"].astype(str) + " — " + raw["description"] + " (" + format_brl_series(raw["amount_centavos"]) + ")").tolist()
+            exp_map = dict(zip(exp_opts, raw["id"].tolist()))
+            
+            sel_exp_label = st.selectbox("Selecione a despesa", exp_opts)
+            sel_exp_id = exp_map[sel_exp_label]
+            
+            # Get object
+            exp_obj = next(e for e in expenses if e.id == sel_exp_id)
+            
+            with st.form("edit_exp"):
+                n_desc = st.text_input("Descrição", value=exp_obj.description)
+                n_val = st.number_input("Valor (R$)", min_value=0.0, value=float(to_reais(exp_obj.amount_centavos)), step=10.0)
+                n_date = st.date_input("Data", value=pd.to_datetime(exp_obj.date).date())
+                n_cat = st.selectbox("Categoria", ["Geral", "Pessoal", "Infraestrutura", "Marketing", "Tributos"], index=["Geral", "Pessoal", "Infraestrutura", "Marketing", "Tributos"].index(exp_obj.category) if exp_obj.category in ["Geral", "Pessoal", "Infraestrutura", "Marketing", "Tributos"] else 0)
+                n_paid = st.checkbox("Pago?", value=exp_obj.paid)
+                
+                c1, c2 = st.columns(2)
+                save_e = c1.form_submit_button("Salvar Alterações")
+                del_e = c2.form_submit_button("Excluir Despesa")
+                
+            if save_e:
+                write(
+                    expense_service.update_expense,
+                    sel_exp_id,
+                    description=n_desc.strip(),
+                    amount_centavos=parse_cents(n_val),
+                    date=n_date.isoformat(),
+                    category=n_cat,
+                    paid=n_paid
+                )
+                st.success("Despesa atualizada.")
+                rerun_fragment()
+                
+            if del_e:
+                write(expense_service.delete_expense, sel_exp_id)
+                st.success("Despesa excluída.")
+                rerun_fragment()
+                
+        else:
+            st.info("Nenhuma despesa encontrada.")
+
+@st.fragment
+def secao_carteira():
+    c1, c2 = st.columns([2, 1])
+    busca_rel = c1.text_input("Buscar (cliente, CPF/CNPJ, processo, CNJ ou observações)", key="busca_relatorios")
+    resp = c2.text_input("Filtrar por responsável (opcional)")
+
+    # Filter and aggregate in SQL (sorted by Client then Process, or by relevance when searching)
+    with read_session() as session:
+        df_fin = finance_service.get_portfolio_financials(session, responsible=resp.strip() or None, search=busca_rel)
+    
+    if not df_fin.empty:
+        dfr = pd.DataFrame({
+            "ProcessoID": df_fin["process_id"],
+            "Cliente": df_fin["client_name"],
+            "Processo": df_fin["title"],
+            "Responsavel": df_fin["responsible"],
+            "TotalContrato": to_reais(df_fin["total_contracted"]),
+            "Recebido": to_reais(df_fin["total_received"]),
+            "Saldo": to_reais(df_fin["balance"]),
+            "% Recebido": (df_fin["pct"] * 100).round(2)
+        })
+        st.dataframe(dfr, use_container_width=True)
+    else:
+        st.info("Nenhum processo encontrado.")
+
+@st.fragment
+def secao_aging():
+    # Open phase balances by time outstanding, aggregated in SQL (see receivables_service)
+    a1, a2 = st.columns([1, 2])
+    aging_ref = a1.date_input("Posição em", value=date.today(), key="aging_data")
+    aging_por = a2.radio("Agrupar por", ["Cliente", "Responsável"], horizontal=True, key="aging_agrupar")
+    aging_group = "client" if aging_por == "Cliente" else "responsible"
+    with read_session() as session:
+        df_aging = receivables_service.get_receivables_aging(session, aging_group, aging_ref.isoformat())
+    st.caption("Idade contada desde o último recebimento da fase; fases sem recebimento contam desde o primeiro recebimento do processo.")
+
+    if not df_aging.empty:
+        totals = df_aging[list(receivables_service.AGING_LABELS)].sum()
+        cols = st.columns(len(totals))
+        for col, (key, value) in zip(cols, totals.items()):
+            col.metric(receivables_service.AGING_LABELS[key], format_brl(value))
+        st.dataframe(receivables_service.aging_table(df_aging), use_container_width=True, hide_index=True)
+        st.download_button(
+            label="Exportar CSV",
+            data=receivables_service.aging_csv(df_aging),
+            file_name=f"aging_{aging_group}_{aging_ref.isoformat()}.csv",
+            mime="text/csv"
+        )
+    else:
+        st.info("Nenhum saldo em aberto.")
+
+@st.fragment(run_every=1.0)
+def secao_snapshot_em_andamento():
+    # Polls the snapshot running in the background (snapshot_service.start_snapshot) once a second
+    job = st.session_state["snapshot_job"]
+    if not job.done():
+        feitas, total = job.progress
+        st.progress(feitas / total if total else 0.0, text=f"Copiando páginas... {feitas}/{total}")
+        return
+    del st.session_state["snapshot_job"]
+    try:
+        info = job.result()
+    except Exception as exc:  # noqa: BLE001 (shown to the user)
+        st.session_state["snapshot_msg"] = ("error", f"Falha ao criar o snapshot: {exc}")
+    else:
+        st.session_state["snapshot_msg"] = ("success", f"Snapshot criado em {info['seconds']:.1f}s ({info['bytes'] / 1024 / 1024:.1f} MB, integridade OK). {len(info['pruned'])} snapshot(s) antigo(s) removido(s).")
+    # The whole page, so the list of snapshots shows the new one
+    st.rerun()
+
+# Read-only session for the page; writes go through the write queue (sections above open their own)
+with read_session() as session:
 
     ########################
     # PÁGINA: PAINEL        #
@@ -65,69 +457,41 @@ with Session(engine) as session:
         saldo_real = total_recebido - total_despesas
         
         col1, col2, col3, col4 = st.columns(4)
-        col1.metric("Total Contratado", money(total_contratado))
-        col2.metric("Receita Realizada", money(total_recebido))
-        col3.metric("Despesas Pagas", money(total_despesas))
-        col4.metric("Lucro/Prejuízo (Caixa)", money(saldo_real), delta_color="normal")
+        col1.metric("Total Contratado", format_brl(total_contratado))
+        col2.metric("Receita Realizada", format_brl(total_recebido))
+        col3.metric("Despesas Pagas", format_brl(total_despesas))
+        col4.metric("Lucro/Prejuízo (Caixa)", format_brl(saldo_real), delta_color="normal")
 
         st.markdown("---")
 
-        st.subheader("Fluxo de Caixa (Mensal)")
-        
-        # Get dataframes
-        df_rec = finance_service.get_firm_revenue_by_month(session)
-        df_exp = expense_service.get_expenses_by_month(session)
-        
-        if df_rec.empty and df_exp.empty:
-            st.info("Sem movimentações financeiras ainda.")
-        else:
-            # Merge dataframes on 'mes'
-            if df_rec.empty:
-                df_rec = pd.DataFrame(columns=["mes", "Recebido"])
-            if df_exp.empty:
-                df_exp = pd.DataFrame(columns=["mes", "Despesas"])
-                
-            df_merged = pd.merge(df_rec, df_exp, on="mes", how="outer").fillna(0)
-            df_merged = df_merged.sort_values("mes")
-            df_merged["Saldo"] = df_merged["Recebido"] - df_merged["Despesas"]
-            
-            st.dataframe(df_merged, use_container_width=True)
-            
-            # Chart
-            st.bar_chart(df_merged.set_index("mes")[["Recebido", "Despesas", "Saldo"]])
+        st.subheader("Fluxo de Caixa")
+        secao_fluxo_caixa()
+
+        st.markdown("---")
+        st.subheader("Previsão de caixa")
+        secao_previsao()
 
         st.markdown("---")
         st.subheader("Processos com saldo a receber")
         
-        # Get all processes and calculate financials
-        processes = process_service.get_all_processes(session)
+        # One grouped query for every process (already sorted by Client then Process)
+        df_fin = finance_service.get_portfolio_financials(session)
         
-        if not processes:
+        if df_fin.empty:
             st.warning("Cadastre clientes e processos para começar.")
         else:
-            data = []
-            for p in processes:
-                tot, rec, sal, pct = finance_service.get_process_financials(session, p.id)
-                # Access client name safely
-                client_name = p.client.name if p.client else "N/A"
-                
-                data.append({
-                    "ProcessoID": p.id,
-                    "Cliente": client_name,
-                    "Processo": p.title,
-                    "Responsavel": p.responsible,
-                    "Status": p.status,
-                    "TotalContrato": tot/100,
-                    "Recebido": rec/100,
-                    "Saldo": sal/100,
-                    "% Recebido": round(pct*100, 2)
-                })
-            
-            df_proc = pd.DataFrame(data)
-            # Sort by Client then Process
-            if not df_proc.empty:
-                df_proc = df_proc.sort_values(by=["Cliente", "Processo"])
-                st.dataframe(df_proc, use_container_width=True)
+            df_proc = pd.DataFrame({
+                "ProcessoID": df_fin["process_id"],
+                "Cliente": df_fin["client_name"],
+                "Processo": df_fin["title"],
+                "Responsavel": df_fin["responsible"],
+                "Status": df_fin["status"],
+                "TotalContrato": to_reais(df_fin["total_contracted"]),
+                "Recebido": to_reais(df_fin["total_received"]),
+                "Saldo": to_reais(df_fin["balance"]),
+                "% Recebido": (df_fin["pct"] * 100).round(2)
+            })
+            st.dataframe(df_proc, use_container_width=True)
 
     ########################
     # PÁGINA: CLIENTES      #
@@ -143,11 +507,14 @@ with Session(engine) as session:
             submitted = st.form_submit_button("Salvar")
             
             if submitted and name.strip():
-                client_service.create_client(session, name.strip(), cpf.strip(), email.strip(), phone.strip())
+                write(client_service.create_client, name.strip(), cpf.strip(), email.strip(), phone.strip())
                 st.success("Cliente salvo.")
 
         st.markdown("---")
-        clients = client_service.get_all_clients(session)
+        # One page at a time; the selectboxes below list the clients of this page
+        busca_cli = st.text_input("Buscar cliente (nome ou CPF/CNPJ)", key="busca_clientes")
+        pag_cli = paginate("pag_clientes", lambda cursor, size: client_service.list_clients(session, busca_cli, cursor, size), filters=(busca_cli,))
+        clients = pag_cli.items
         if clients:
             # Convert to DataFrame for display
             df = pd.DataFrame([c.model_dump() for c in clients])
@@ -157,45 +524,8 @@ with Session(engine) as session:
             st.markdown("### Relatórios")
             client_opts = [f"{c.name} (ID: {c.id})" for c in clients]
             client_map_rep = {f"{c.name} (ID: {c.id})": c.id for c in clients}
-            
-            sel_cli_rep = st.selectbox("Selecione o cliente para gerar relatório", client_opts)
-            
-            if st.button("Gerar Relatório PDF"):
-                cid = client_map_rep[sel_cli_rep]
-                client_obj = session.get(client_service.Client, cid)
-                
-                # Gather data
-                procs = process_service.get_processes_by_client(session, cid)
-                
-                # Calculate financials for this client
-                # We can reuse get_process_financials for each process and sum up
-                tot_c, tot_r, bal_c = 0, 0, 0
-                for p in procs:
-                    t, r, b, _ = finance_service.get_process_financials(session, p.id)
-                    tot_c += t
-                    tot_r += r
-                    bal_c += b
-                
-                fins = {
-                    'total_contracted': tot_c,
-                    'total_received': tot_r,
-                    'balance': bal_c
-                }
-                
-                # Generate PDF
-                pdf_file = report_service.generate_client_report(client_obj, procs, fins)
-                
-                with open(pdf_file, "rb") as f:
-                    pdf_data = f.read()
-                
-                st.download_button(
-                    label="Baixar PDF",
-                    data=pdf_data,
-                    file_name=pdf_file,
-                    mime="application/pdf"
-                )
-                st.success(f"Relatório gerado: {pdf_file}")
-            
+            secao_relatorios_clientes(client_map_rep)
+
             st.markdown("---")
             st.markdown("### Editar / Excluir Cliente")
             
@@ -218,8 +548,8 @@ with Session(engine) as session:
                 
             if save_c:
                 if n_name.strip():
-                    client_service.update_client(
-                        session, 
+                    write(
+                        client_service.update_client,
                         cid_edit, 
                         name=n_name.strip(), 
                         cpf_cnpj=n_cpf.strip(), 
@@ -237,10 +567,12 @@ with Session(engine) as session:
                 # We should warn the user.
                 st.warning("Atenção: Excluir um cliente apagará TODOS os seus processos, fases e pagamentos.")
                 if st.button("Confirmar Exclusão do Cliente"):
-                    client_service.delete_client(session, cid_edit)
+                    write(client_service.delete_client, cid_edit)
                     st.success("Cliente excluído.")
                     st.rerun()
                 
+        elif busca_cli:
+            st.info("Nenhum cliente encontrado.")
         else:
             st.info("Nenhum cliente cadastrado.")
 
@@ -250,8 +582,7 @@ with Session(engine) as session:
     elif page == "Processos":
         st.subheader("Processos")
         
-        clients = client_service.get_all_clients(session)
-        client_map = {c.name: c.id for c in clients}
+        client_map = {name: cid for cid, name in client_service.get_client_options(session)}
         
         if not client_map:
             st.info("Cadastre um cliente primeiro.")
@@ -267,8 +598,8 @@ with Session(engine) as session:
                 ok = st.form_submit_button("Salvar")
                 
                 if ok and title.strip():
-                    process_service.create_process(
-                        session, 
+                    write(
+                        process_service.create_process,
                         client_id=client_map[cliente_nome], 
                         title=title.strip(), 
                         cnj=cnj.strip(), 
@@ -280,7 +611,18 @@ with Session(engine) as session:
 
         st.markdown("---")
         
-        processes = process_service.get_all_processes(session)
+        f1, f2, f3 = st.columns(3)
+        busca_proc = f1.text_input("Buscar (título ou CNJ)", key="busca_processos")
+        filtro_resp = f2.text_input("Responsável", key="filtro_resp_processos")
+        filtro_status = f3.selectbox("Status", ["Todos", "Ativo", "Encerrado", "Suspenso"], key="filtro_status_processos")
+        filtro_status = None if filtro_status == "Todos" else filtro_status
+        
+        pag_proc = paginate(
+            "pag_processos",
+            lambda cursor, size: process_service.list_processes(session, busca_proc, responsible=filtro_resp, status=filtro_status, cursor=cursor, page_size=size),
+            filters=(busca_proc, filtro_resp, filtro_status)
+        )
+        processes = pag_proc.items
         if processes:
             # Flatten data for display
             data = []
@@ -310,7 +652,7 @@ with Session(engine) as session:
             with st.expander("Mover processo para outro cliente"):
                 novo_cliente = st.selectbox("Novo cliente", list(client_map.keys()), key="move_proc")
                 if st.button("Mover processo"):
-                    process_service.update_process(session, sel_proc_id, client_id=client_map[novo_cliente])
+                    write(process_service.update_process, sel_proc_id, client_id=client_map[novo_cliente])
                     st.success("Processo movido para o cliente selecionado.")
                     st.rerun()
 
@@ -319,13 +661,13 @@ with Session(engine) as session:
                 confirm = st.checkbox("Confirmo que desejo excluir este processo.")
                 if st.button("Excluir processo"):
                     if confirm:
-                        process_service.delete_process(session, sel_proc_id)
+                        write(process_service.delete_process, sel_proc_id)
                         st.success("Processo excluído com sucesso.")
                         st.rerun()
                     else:
                         st.info("Marque a caixa de confirmação para excluir.")
         else:
-            st.info("Nenhum processo cadastrado.")
+            st.info("Nenhum processo encontrado.")
 
     ###############################
     # PÁGINA: FASES & RECEBIMENTOS #
@@ -333,17 +675,12 @@ with Session(engine) as session:
     elif page == "Fases & Recebimentos":
         st.subheader("Fases de Pagamento & Recebimentos")
         
-        clients = client_service.get_all_clients(session)
-        client_map = {c.name: c.id for c in clients}
+        client_map = {name: cid for cid, name in client_service.get_client_options(session)}
         
         sel_client = st.selectbox("Filtrar por cliente (opcional)", ["(Todos)"] + list(client_map.keys()))
         
-        if sel_client != "(Todos)":
-            processes = process_service.get_processes_by_client(session, client_map[sel_client])
-        else:
-            processes = process_service.get_all_processes(session)
-            
-        pid_map = {p.title: p.id for p in processes}
+        sel_client_id = client_map[sel_client] if sel_client != "(Todos)" else None
+        pid_map = {title: pid for pid, title in process_service.get_process_options(session, sel_client_id)}
         
         if not pid_map:
             st.info("Cadastre um processo primeiro.")
@@ -354,167 +691,14 @@ with Session(engine) as session:
             # =========================
             # CRUD de FASES
             # =========================
-            st.markdown("### Adicionar Fase")
-            with st.form("add_fase"):
-                description = st.text_input("Descrição da fase *", placeholder="Ex.: Inquérito Policial")
-                condition = st.text_input("Condição (opcional)", placeholder="Ex.: Assinatura do contrato")
-                value = st.number_input("Valor da fase (R$) *", min_value=0.0, step=100.0)
-                ok = st.form_submit_button("Salvar fase")
-                
-                if ok and description.strip() and value > 0:
-                    process_service.create_phase(
-                        session, 
-                        process_id=sel_proc_id, 
-                        description=description.strip(), 
-                        value_centavos=cents(value), 
-                        condition=condition.strip()
-                    )
-                    st.success("Fase adicionada.")
-
-            st.markdown("### Editar / Excluir Fase")
-            phases = process_service.get_phases_by_process(session, sel_proc_id)
-            
-            if not phases:
-                st.info("Nenhuma fase cadastrada para este processo.")
-            else:
-                fase_opts = [f"#{p.id} — {p.description} (previsto {money(p.value_centavos)})" for p in phases]
-                fase_map = {label: p.id for label, p in zip(fase_opts, phases)}
-                
-                sel_fase_label = st.selectbox("Escolha a fase para gerenciar", fase_opts)
-                sel_fase_id = fase_map[sel_fase_label]
-                
-                # Find the selected phase object
-                fase_row = next(p for p in phases if p.id == sel_fase_id)
-
-                with st.form("edit_fase"):
-                    new_desc = st.text_input("Descrição", value=fase_row.description)
-                    new_cond = st.text_input("Condição", value=fase_row.condition or "")
-                    new_val = st.number_input("Valor previsto (R$)", min_value=0.0, value=float(fase_row.value_centavos/100), step=100.0)
-                    c1, c2 = st.columns(2)
-                    save_fase = c1.form_submit_button("Salvar alterações")
-                    del_fase = c2.form_submit_button("Excluir fase")
-                
-                if save_fase:
-                    process_service.update_phase(
-                        session, 
-                        sel_fase_id, 
-                        description=new_desc.strip(), 
-                        condition=new_cond.strip(), 
-                        value_centavos=cents(new_val)
-                    )
-                    st.success("Fase atualizada.")
-                    st.rerun()
-                    
-                if del_fase:
-                    process_service.delete_phase(session, sel_fase_id)
-                    st.success("Fase excluída.")
-                    st.rerun()
+            secao_fases(sel_proc_id)
 
             st.markdown("---")
 
             # =========================
             # CRUD de RECEBIMENTOS
             # =========================
-            st.markdown("### Registrar Recebimento")
-            # Refresh phases in case of updates
-            phases = process_service.get_phases_by_process(session, sel_proc_id)
-            
-            if not phases:
-                st.info("Adicione ao menos uma fase para registrar recebimento.")
-            else:
-                fase_labels = [f"#{p.id} — {p.description} (previsto {money(p.value_centavos)})" for p in phases]
-                fase_id_map = {label: p.id for label, p in zip(fase_labels, phases)}
-                
-                with st.form("add_pay"):
-                    fase_label = st.selectbox("Fase *", list(fase_id_map.keys()))
-                    amount = st.number_input("Valor recebido (R$) *", min_value=0.0, step=100.0)
-                    rdate = st.date_input("Data do recebimento *", value=date.today())
-                    okp = st.form_submit_button("Registrar")
-                    
-                    if okp and amount > 0:
-                        finance_service.create_payment(
-                            session, 
-                            phase_id=fase_id_map[fase_label], 
-                            amount_centavos=cents(amount), 
-                            received_date=rdate.isoformat()
-                        )
-                        st.success("Recebimento registrado.")
-
-            st.markdown("### Editar / Excluir Recebimento")
-            payments_data = finance_service.get_payments_by_process(session, sel_proc_id)
-            
-            if not payments_data:
-                st.info("Nenhum recebimento registrado para este processo.")
-            else:
-                # payments_data is list of (Payment, Phase)
-                pay_opts = []
-                pay_map = {}
-                
-                for pay, ph in payments_data:
-                    label = f"#{pay.id} — {ph.description} — {money(pay.amount_centavos)} em {pay.received_date}"
-                    pay_opts.append(label)
-                    pay_map[label] = pay
-                
-                sel_pay_label = st.selectbox("Escolha o recebimento para gerenciar", pay_opts)
-                prow = pay_map[sel_pay_label]
-
-                with st.form("edit_pay"):
-                    new_amount = st.number_input("Valor recebido (R$)", min_value=0.0, value=float(prow.amount_centavos/100), step=100.0)
-                    new_date = st.date_input("Data do recebimento", value=pd.to_datetime(prow.received_date).date())
-                    c1, c2 = st.columns(2)
-                    save_pay = c1.form_submit_button("Salvar alterações")
-                    del_pay = c2.form_submit_button("Excluir recebimento")
-                
-                if save_pay:
-                    finance_service.update_payment(
-                        session, 
-                        prow.id, 
-                        amount_centavos=cents(new_amount), 
-                        received_date=new_date.isoformat()
-                    )
-                    st.success("Recebimento atualizado.")
-                    st.rerun()
-                    
-                if del_pay:
-                    finance_service.delete_payment(session, prow.id)
-                    st.success("Recebimento excluído.")
-                    st.rerun()
-
-            st.markdown("---")
-            st.markdown("### Fases do processo selecionado")
-            
-            # Build dataframe for phases with received amounts
-            # We need to query payments for each phase or do a smart join. 
-            # For MVP, simple iteration is fine or we can add a service method.
-            # Let's do iteration here for simplicity as we already have phases.
-            
-            phase_data = []
-            for ph in phases:
-                # Calculate received for this phase
-                # This is a bit inefficient (N+1), but OK for MVP scale. 
-                # Better would be a service method `get_phases_with_totals`.
-                # Let's use what we have.
-                pay_sum = sum(p.amount_centavos for p in ph.payments) # Relationship access
-                
-                phase_data.append({
-                    "FaseID": ph.id,
-                    "Fase": ph.description,
-                    "Condicao": ph.condition,
-                    "ValorPrevisto": ph.value_centavos / 100,
-                    "Recebido": pay_sum / 100,
-                    "SaldoFase": (ph.value_centavos - pay_sum) / 100
-                })
-            
-            dff = pd.DataFrame(phase_data)
-            st.dataframe(dff, use_container_width=True)
-
-            st.markdown("### Situação do processo")
-            tot, rec, sal, pct = finance_service.get_process_financials(session, sel_proc_id)
-            c1, c2, c3, c4 = st.columns(4)
-            c1.metric("Total Contrato (soma fases)", money(tot))
-            c2.metric("Recebido", money(rec))
-            c3.metric("Saldo", money(sal))
-            c4.metric("% Recebido", f"{pct*100:.1f}%")
+            secao_recebimentos(sel_proc_id)
 
     ########################
     # PÁGINA: DESPESAS      #
@@ -533,10 +717,10 @@ with Session(engine) as session:
             sub = st.form_submit_button("Salvar Despesa")
             
             if sub and desc.strip() and amount > 0:
-                expense_service.create_expense(
-                    session,
+                write(
+                    expense_service.create_expense,
                     description=desc.strip(),
-                    amount_centavos=cents(amount),
+                    amount_centavos=parse_cents(amount),
                     date=dt_exp.isoformat(),
                     category=cat,
                     paid=paid
@@ -545,99 +729,20 @@ with Session(engine) as session:
         
         st.markdown("---")
         st.markdown("### Histórico de Despesas")
-        
-        expenses = expense_service.get_all_expenses(session)
-        if expenses:
-            data = []
-            for e in expenses:
-                data.append({
-                    "ID": e.id,
-                    "Data": e.date,
-                    "Descrição": e.description,
-                    "Categoria": e.category,
-                    "Valor": e.amount_centavos / 100,
-                    "Pago": "Sim" if e.paid else "Não"
-                })
-            df_exp = pd.DataFrame(data)
-            st.dataframe(df_exp, use_container_width=True)
-            
-            # Edit/Delete
-            st.markdown("### Editar / Excluir")
-            exp_opts = [f"#{row['ID']} — {row['Descrição']} ({money(row['Valor']*100)})" for row in data]
-            exp_map = {label: row['ID'] for label, row in zip(exp_opts, data)}
-            
-            sel_exp_label = st.selectbox("Selecione a despesa", exp_opts)
-            sel_exp_id = exp_map[sel_exp_label]
-            
-            # Get object
-            exp_obj = next(e for e in expenses if e.id == sel_exp_id)
-            
-            with st.form("edit_exp"):
-                n_desc = st.text_input("Descrição", value=exp_obj.description)
-                n_val = st.number_input("Valor (R$)", min_value=0.0, value=float(exp_obj.amount_centavos/100), step=10.0)
-                n_date = st.date_input("Data", value=pd.to_datetime(exp_obj.date).date())
-                n_cat = st.selectbox("Categoria", ["Geral", "Pessoal", "Infraestrutura", "Marketing", "Tributos"], index=["Geral", "Pessoal", "Infraestrutura", "Marketing", "Tributos"].index(exp_obj.category) if exp_obj.category in ["Geral", "Pessoal", "Infraestrutura", "Marketing", "Tributos"] else 0)
-                n_paid = st.checkbox("Pago?", value=exp_obj.paid)
-                
-                c1, c2 = st.columns(2)
-                save_e = c1.form_submit_button("Salvar Alterações")
-                del_e = c2.form_submit_button("Excluir Despesa")
-                
-            if save_e:
-                expense_service.update_expense(
-                    session,
-                    sel_exp_id,
-                    description=n_desc.strip(),
-                    amount_centavos=cents(n_val),
-                    date=n_date.isoformat(),
-                    category=n_cat,
-                    paid=n_paid
-                )
-                st.success("Despesa atualizada.")
-                st.rerun()
-                
-            if del_e:
-                expense_service.delete_expense(session, sel_exp_id)
-                st.success("Despesa excluída.")
-                st.rerun()
-                
-        else:
-            st.info("Nenhuma despesa registrada.")
+        secao_historico_despesas()
 
     ########################
     # PÁGINA: RELATÓRIOS    #
     ########################
     elif page == "Relatórios":
         st.subheader("Relatórios")
-        resp = st.text_input("Filtrar por responsável (opcional)")
-        
-        # Get all processes
-        processes = process_service.get_all_processes(session)
-        
-        # Filter in Python (easier than dynamic SQL construction for MVP)
-        if resp.strip():
-            processes = [p for p in processes if p.responsible and resp.strip().lower() in p.responsible.lower()]
-            
-        data = []
-        for p in processes:
-            tot, rec, sal, pct = finance_service.get_process_financials(session, p.id)
-            data.append({
-                "ProcessoID": p.id,
-                "Cliente": p.client.name if p.client else "N/A",
-                "Processo": p.title,
-                "Responsavel": p.responsible,
-                "TotalContrato": tot/100,
-                "Recebido": rec/100,
-                "Saldo": sal/100,
-                "% Recebido": round(pct*100, 2)
-            })
-            
-        dfr = pd.DataFrame(data)
-        if not dfr.empty:
-            dfr = dfr.sort_values(by=["Cliente", "Processo"])
-            st.dataframe(dfr, use_container_width=True)
-        else:
-            st.info("Nenhum processo encontrado.")
+        tab_carteira, tab_aging = st.tabs(["Carteira", "Aging de recebíveis"])
+
+        with tab_carteira:
+            secao_carteira()
+
+        with tab_aging:
+            secao_aging()
 
     ###############################
     # PÁGINA: BACKUP & UTILITÁRIOS #
@@ -646,19 +751,139 @@ with Session(engine) as session:
         st.subheader("Backup & Utilitários")
         st.markdown("Faça backup dos dados localmente (CSV) para evitar perda.")
 
-        if st.button("Exportar CSVs"):
-            # Use pandas read_sql with the engine
-            df_clients = pd.read_sql("SELECT * FROM clients", engine)
-            df_processes = pd.read_sql("SELECT * FROM processes", engine)
-            df_phases = pd.read_sql("SELECT * FROM phases", engine)
-            df_payments = pd.read_sql("SELECT * FROM payments", engine)
+        formatos = {"CSV": "csv", "CSV compactado (.csv.gz)": "csv.gz", "Parquet": "parquet"}
+        fmt_label = st.selectbox("Formato", list(formatos.keys()))
+        pasta_exp = st.text_input("Pasta de destino", value=".", key="pasta_exp")
+
+        c1, c2 = st.columns(2)
+        if c1.button("Exportar arquivos"):
+            # All tables (including expenses) from one read snapshot, streamed in chunks
+            manifest = export_service.export_backup(session, pasta_exp, formatos[fmt_label])
+            st.dataframe(pd.DataFrame.from_dict(manifest["tables"], orient="index"), use_container_width=True)
+            st.success(f"Arquivos e manifest.json gerados em '{pasta_exp}'.")
+
+        if c2.button("Gerar ZIP"):
+            # Streamed to a temporary file: a large base never sits whole in memory while it is built
+            manifest = download_zip(
+                "Baixar ZIP",
+                lambda target: export_service.export_backup_zip(session, target, formatos[fmt_label]),
+                file_name=f"lexfinance_backup_{date.today().isoformat()}.zip"
+            )
+            st.dataframe(pd.DataFrame.from_dict(manifest["tables"], orient="index"), use_container_width=True)
 
-            df_clients.to_csv("clients.csv", index=False)
-            df_processes.to_csv("processes.csv", index=False)
-            df_phases.to_csv("phases.csv", index=False)
-            df_payments.to_csv("payments.csv", index=False)
-            st.success("Arquivos CSV gerados na pasta atual do app.")
+        st.markdown("---")
+        st.markdown("**Snapshots do banco (backup online)**")
+        st.caption(f"Cópias consistentes de 'lexfinance.db' feitas com o app em uso, salvas em '{snapshot_dir}'.")
+        
+        # The copy runs in a background thread; the page stays usable and polls its progress
+        if st.button("Criar snapshot agora", disabled="snapshot_job" in st.session_state):
+            st.session_state["snapshot_job"] = snapshot_service.start_snapshot(database.engine, snapshot_dir)
+        if "snapshot_job" in st.session_state:
+            secao_snapshot_em_andamento()
+        if "snapshot_msg" in st.session_state:
+            tipo, msg = st.session_state.pop("snapshot_msg")
+            getattr(st, tipo)(msg)
+        
+        snapshots = snapshot_service.list_snapshots(snapshot_dir)
+        if snapshots:
+            st.dataframe(pd.DataFrame([{
+                "Snapshot": s["name"],
+                "Criado em": s["created"],
+                "Tamanho (MB)": round(s["bytes"] / 1024 / 1024, 2)
+            } for s in snapshots]), use_container_width=True)
+            
+            with st.expander("Restaurar snapshot (substitui TODOS os dados atuais)"):
+                snap_map = {s["name"]: s["path"] for s in snapshots}
+                sel_snap = st.selectbox("Snapshot", list(snap_map.keys()))
+                confirm_restore = st.checkbox("Confirmo que desejo substituir os dados atuais por este snapshot.")
+                if st.button("Restaurar"):
+                    if confirm_restore:
+                        # Safety copy of the current state before overwriting it
+                        with write_session() as ws:
+                            snapshot_service.create_snapshot(ws, snapshot_dir, label="pre-restore")
+                            info = snapshot_service.restore_snapshot(ws, snap_map[sel_snap])
+                        st.success(f"Snapshot restaurado em {info['seconds']:.1f}s.")
+                        st.rerun()
+                    else:
+                        st.info("Marque a caixa de confirmação para restaurar.")
+        else:
+            st.info("Nenhum snapshot criado ainda.")
+
+        st.markdown("---")
+        st.markdown("**Conferir saldos consolidados**")
+        st.caption("Recalcula contratado e recebido por fase, processo e cliente a partir dos lançamentos e corrige divergências.")
+        if st.button("Conferir e corrigir saldos"):
+            with write_session() as ws:
+                drift = rollup_service.reconcile_rollups(ws)
+            if drift.empty:
+                st.success("Saldos consolidados conferem com os lançamentos.")
+            else:
+                st.dataframe(drift, use_container_width=True)
+                st.warning(f"{len(drift)} divergência(s) encontrada(s) e corrigida(s).")
+
+        st.caption("Reconstrói o índice de busca de clientes e processos (use se a busca deixar de encontrar registros).")
+        if st.button("Reindexar busca"):
+            with write_session() as ws:
+                search_service.rebuild_search_index(ws)
+            st.success("Índice de busca reconstruído.")
+
+        st.markdown("---")
+        st.markdown("**Importar backup**")
+        st.caption("Lê clients, processes, phases, payments e expenses (.csv, .csv.gz ou .parquet) da pasta informada e atualiza o banco.")
+        pasta_imp = st.text_input("Pasta dos arquivos", value=".")
+        
+        if st.button("Importar arquivos"):
+            with st.spinner("Importando..."):
+                with write_session() as ws:
+                    reports = import_service.import_backup(ws, pasta_imp)
+            
+            if not reports:
+                st.warning("Nenhum arquivo de backup encontrado na pasta.")
+            else:
+                st.dataframe(import_service.import_summary(reports), use_container_width=True)
+                for r in reports:
+                    if r["errors"]:
+                        with st.expander(f"Linhas rejeitadas em {r['file']} ({r['rejected']})"):
+                            st.dataframe(pd.DataFrame(r["errors"], columns=["Linha", "Motivo"]), use_container_width=True)
+                st.success("Importação concluída.")
 
-        st.info("Para backup do banco inteiro, copie o arquivo 'lexfinance.db'.")
+        st.markdown("---")
+        st.markdown("**Diagnóstico SQL**")
+        st.caption(f"Registra cada consulta (tempo, função de origem, página). Consultas acima de {database.slow_query_ms:.0f} ms vão para o log de lentas.")
+        perfil_on = st.checkbox("Ativar profiler SQL", value=database.profiler_enabled())
+        if perfil_on != database.profiler_enabled():
+            if perfil_on:
+                database.enable_profiler()
+            else:
+                database.disable_profiler()
+
+        if st.button("Limpar medições"):
+            database.reset_profiler()
+
+        por_pagina = database.profile_by_page()
+        if por_pagina:
+            st.markdown("Por página")
+            st.dataframe(pd.DataFrame(por_pagina).rename(columns={
+                "page": "Página", "renders": "Execuções", "queries": "Consultas",
+                "queries_per_render": "Consultas/execução", "p50_ms": "p50 (ms)", "p95_ms": "p95 (ms)", "total_ms": "Total (ms)"
+            }).round(2), use_container_width=True)
+            st.markdown("Por função")
+            st.dataframe(pd.DataFrame(database.profile_by_caller()).rename(columns={
+                "caller": "Função", "queries": "Consultas", "p50_ms": "p50 (ms)", "p95_ms": "p95 (ms)", "total_ms": "Total (ms)"
+            }).round(2), use_container_width=True)
+        elif database.profiler_enabled():
+            st.info("Navegue pelas páginas para coletar medições.")
+
+        lentas = database.slow_queries()
+        if lentas:
+            with st.expander(f"Consultas lentas ({len(lentas)})"):
+                st.dataframe(pd.DataFrame([{
+                    "Página": q["page"],
+                    "Função": q["caller"],
+                    "Tempo (ms)": round(q["ms"], 1),
+                    "Linhas": q["rows"],
+                    "Parâmetros": q["params"],
+                    "SQL": q["statement"]
+                } for q in lentas]), use_container_width=True)
 
     st.caption("© 2025 — LexFinance MVP. Banco: SQLite (via SQLModel).")
\ No newline at end of file
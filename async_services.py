@@ -0,0 +1,123 @@
+"""
+Async service layer, for frontends other than Streamlit (e.g. an HTTP API).
+
+The same functions as services/, without the session argument, as coroutines:
+
+    from async_services import client_service, finance_service
+
+    page = await client_service.list_clients(search="silva")
+    payment = await finance_service.create_payment(phase_id, 50_000, "2025-03-10")
+
+There is no async SQLite driver here, so the calls still run the sync services:
+
+- Reads run in a thread pool the size of the connection pool, each in its own
+  database.read_session(). Any number of requests can wait on them, but only as
+  many threads as there are connections do the work.
+- Writes go to the write queue (write_queue.submit). The coroutine awaits the
+  queue's future, so a request waiting on a write holds no thread at all.
+
+Semantics are those of the sync functions: same results, caching and
+invalidation, and the same exceptions. ORM objects come back detached, with what
+the service loaded.
+"""
+import asyncio
+import functools
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+from typing import Callable, Optional
+
+import database
+from database import read_session
+from services import client_service as _client_service
+from services import expense_service as _expense_service
+from services import finance_service as _finance_service
+from services import forecast_service as _forecast_service
+from services import process_service as _process_service
+from services import receivables_service as _receivables_service
+from services import report_service as _report_service
+from services import search_service as _search_service
+from write_queue import submit
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+def _get_executor() -> ThreadPoolExecutor:
+    # One thread per pooled connection: more would only wait for a free one
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=database.POOL_SIZE + database.POOL_OVERFLOW,
+                                           thread_name_prefix="lexfinance-read")
+        return _executor
+
+def _read(fn: Callable, args: tuple, kwargs: dict):
+    with read_session() as session:
+        return fn(session, *args, **kwargs)
+
+async def run_read(fn: Callable, *args, **kwargs):
+    """Runs the read service `fn(session, *args, **kwargs)` in the read pool."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_get_executor(), _read, fn, args, kwargs)
+
+async def run_write(fn: Callable, *args, **kwargs):
+    """Queues the write service `fn(session, *args, **kwargs)` and awaits its commit."""
+    return await asyncio.wrap_future(submit(fn, *args, **kwargs))
+
+def shutdown():
+    """Stops the read pool after the running reads (for the API server's shutdown hook)."""
+    global _executor
+    with _executor_lock:
+        executor, _executor = _executor, None
+    if executor is not None:
+        executor.shutdown(wait=True)
+
+def _async(fn: Callable, runner: Callable):
+    @functools.wraps(fn)
+    async def wrapper(*args, **kwargs):
+        return await runner(fn, *args, **kwargs)
+    return wrapper
+
+def _service(module, reads=(), writes=()) -> SimpleNamespace:
+    functions = {name: _async(getattr(module, name), run_read) for name in reads}
+    functions.update({name: _async(getattr(module, name), run_write) for name in writes})
+    return SimpleNamespace(**functions)
+
+# Whole-database operations (import, export, snapshots, rollup and index rebuilds)
+# stay sync: they manage their own connections and are not request-sized.
+
+client_service = _service(
+    _client_service,
+    reads=["get_all_clients", "list_clients", "get_client_report_graph", "get_client_options"],
+    writes=["create_client", "create_clients_bulk", "update_client", "delete_client"],
+)
+
+process_service = _service(
+    _process_service,
+    reads=["get_processes_by_client", "get_all_processes", "get_processes_with_client", "list_processes",
+           "get_process_options", "get_phases_by_process"],
+    writes=["create_process", "create_processes_bulk", "update_process", "delete_process",
+            "create_phase", "create_phases_bulk", "update_phase", "delete_phase"],
+)
+
+finance_service = _service(
+    _finance_service,
+    reads=["get_payments_by_process", "get_process_financials", "get_client_financials", "get_phase_financials",
+           "get_portfolio_financials", "get_firm_revenue_by_month", "get_cash_flow", "get_global_financials"],
+    writes=["create_payment", "create_payments_bulk", "update_payment", "delete_payment"],
+)
+
+expense_service = _service(
+    _expense_service,
+    reads=["get_all_expenses", "list_expenses", "get_total_expenses", "get_expenses_by_month",
+           "get_recurring_expenses", "get_scheduled_expenses"],
+    writes=["create_expense", "create_expenses_bulk", "update_expense", "delete_expense"],
+)
+
+forecast_service = _service(_forecast_service, reads=["get_cash_flow_forecast"])
+
+receivables_service = _service(_receivables_service, reads=["get_receivables_aging"])
+
+report_service = _service(_report_service, reads=["get_client_report"])
+
+search_service = _service(_search_service, reads=["search"])
@@ -0,0 +1,125 @@
+"""
+Benchmark for the indexes declared in models.py.
+
+Builds a throwaway SQLite database with synthetic data (synthetic_data.py, 1M payments by default),
+runs the service-layer queries without indexes, applies migrate_indexes and runs
+them again, printing timings and the SQLite query plan of every statement.
+
+Usage:
+    python bench_indexes.py [n_payments]
+"""
+import os
+import sys
+import tempfile
+import time
+
+from sqlalchemy import event
+from sqlmodel import Session, create_engine
+
+from database import migrate_indexes
+from synthetic_data import generate
+from services import client_service, process_service, finance_service, expense_service
+from services.cache import set_cache_enabled
+
+def populate(engine, n_payments: int, seed: int = 42):
+    # Same proportions as before: 200 payments per client, 50 per process, 10 per phase
+    n_clients = max(1, n_payments // 200)
+    n_processes = max(1, n_payments // 50)
+    generate(engine, clients=n_clients, processes=n_processes, phases=max(1, n_payments // 10),
+             payments=n_payments, expenses=max(1, n_payments // 20), seed=seed, with_indexes=False)
+    return n_clients, n_processes
+
+def workloads(client_id: int, process_id: int):
+    return {
+        "portfolio_financials": lambda s: finance_service.get_portfolio_financials(s),
+        "portfolio_by_client": lambda s: finance_service.get_portfolio_financials(s, client_id=client_id),
+        "process_financials": lambda s: finance_service.get_process_financials(s, process_id),
+        "payments_by_process": lambda s: finance_service.get_payments_by_process(s, process_id),
+        "revenue_by_month": lambda s: finance_service.get_firm_revenue_by_month(s),
+        "cash_flow_2024": lambda s: finance_service.get_cash_flow(s, start="2024-01-01", end="2024-12-31"),
+        "expenses_by_month": lambda s: expense_service.get_expenses_by_month(s),
+        "all_expenses": lambda s: expense_service.get_all_expenses(s),
+        "all_clients": lambda s: client_service.get_all_clients(s),
+        "processes_by_client": lambda s: process_service.get_processes_by_client(s, client_id),
+        "phases_by_process": lambda s: process_service.get_phases_by_process(s, process_id),
+    }
+
+def run(engine, jobs: dict, repeat: int = 3):
+    """Returns {name: (best_seconds, [(sql, plan_lines), ...])}."""
+    captured = []
+
+    def capture(conn, cursor, statement, parameters, context, executemany):
+        captured.append((statement, parameters))
+
+    results = {}
+    for name, job in jobs.items():
+        timings = []
+        for _ in range(repeat):
+            with Session(engine) as session:
+                t0 = time.perf_counter()
+                job(session)
+                timings.append(time.perf_counter() - t0)
+
+        captured.clear()
+        event.listen(engine, "before_cursor_execute", capture)
+        try:
+            with Session(engine) as session:
+                job(session)
+        finally:
+            event.remove(engine, "before_cursor_execute", capture)
+
+        plans = []
+        raw = engine.raw_connection()
+        try:
+            for statement, parameters in captured:
+                rows = raw.cursor().execute(f"EXPLAIN QUERY PLAN {statement}", parameters).fetchall()
+                plans.append((statement, [row[-1] for row in rows]))
+        finally:
+            raw.close()
+        results[name] = (min(timings), plans)
+    return results
+
+def main(n_payments: int = 1_000_000):
+    # Measure the queries themselves, not the read cache
+    set_cache_enabled(False)
+    tmpdir = tempfile.mkdtemp(prefix="lexfinance_bench_")
+    path = os.path.join(tmpdir, "bench.db")
+    engine = create_engine(f"sqlite:///{path}")
+
+    print(f"Populating {path} with {n_payments:,} payments...")
+    t0 = time.perf_counter()
+    n_clients, n_processes = populate(engine, n_payments)
+    print(f"  done in {time.perf_counter() - t0:.1f}s")
+
+    jobs = workloads(client_id=n_clients // 2, process_id=n_processes // 2)
+
+    print("Running without indexes...")
+    before = run(engine, jobs)
+
+    t0 = time.perf_counter()
+    created = migrate_indexes(engine)
+    print(f"migrate_indexes created {len(created)} indexes in {time.perf_counter() - t0:.1f}s: {', '.join(created)}")
+    assert migrate_indexes(engine) == [], "migration must be idempotent"
+
+    print("Running with indexes...")
+    after = run(engine, jobs)
+
+    print()
+    print(f"{'workload':<24}{'before (ms)':>14}{'after (ms)':>14}{'speedup':>10}")
+    for name in jobs:
+        b, a = before[name][0], after[name][0]
+        print(f"{name:<24}{b * 1000:>14.1f}{a * 1000:>14.1f}{b / a if a else float('inf'):>9.1f}x")
+
+    print()
+    for name in jobs:
+        print(f"== {name}")
+        for label, (_, plans) in (("before", before[name]), ("after", after[name])):
+            for _, plan in plans:
+                print(f"  [{label}] " + " | ".join(plan))
+
+    engine.dispose()
+    os.remove(path)
+    os.rmdir(tmpdir)
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000)
@@ -0,0 +1,91 @@
+"""
+Micro-benchmark for services/money.py.
+
+Compares, on N centavo values (1M by default), the per-value helpers the pages used
+before (float formatting with a triple .replace() chain, rows built in a Python loop)
+with the scalar and vectorized functions of services.money, and checks that every
+variant produces the same output.
+
+Usage:
+    python bench_money.py [n_values]
+"""
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from services.money import format_brl, format_brl_series, parse_cents, to_reais
+
+def legacy_money(val) -> str:
+    # Former app.py / ui/utils.py money()
+    if val is None:
+        val = 0
+    return f"R$ {val/100:,.2f}".replace(",", "X").replace(".", ",").replace("X", ".")
+
+def legacy_cents(val) -> int:
+    # Former app.py / ui/utils.py cents()
+    if val is None:
+        return 0
+    return int(round(float(val) * 100))
+
+def best(job, repeat: int = 3):
+    timings = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        result = job()
+        timings.append(time.perf_counter() - t0)
+    return min(timings), result
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 1_000_000
+    rng = np.random.default_rng(42)
+    # Mostly everyday amounts, some large contracts and a few refunds
+    cents = np.concatenate([
+        rng.integers(0, 1_000_000, n - n // 10 - n // 100),
+        rng.integers(1_000_000, 10**11, n // 10),
+        -rng.integers(1, 1_000_000, n // 100),
+    ])
+    rng.shuffle(cents)
+    column = pd.Series(cents)
+    values = cents.tolist()
+    print(f"{n:,} valores\n")
+
+    rows = []
+    def record(group: str, name: str, seconds: float):
+        rows.append((group, name, seconds))
+        print(f"  {group:<10}{name:<42}{seconds * 1000:>10.1f} ms")
+
+    print("Formatação BRL")
+    t, legacy = best(lambda: [legacy_money(v) for v in values])
+    record("format", "legado: money() por valor", t)
+    t, scalar = best(lambda: [format_brl(v) for v in values])
+    record("format", "format_brl por valor", t)
+    t, vector = best(lambda: format_brl_series(column))
+    record("format", "format_brl_series (coluna)", t)
+    assert scalar == legacy and vector.tolist() == legacy
+
+    print("Centavos -> reais (tabela)")
+    t, legacy = best(lambda: pd.DataFrame([{"Valor": v / 100} for v in values]))
+    record("reais", "legado: dict por linha", t)
+    t, vector = best(lambda: pd.DataFrame({"Valor": to_reais(column)}))
+    record("reais", "to_reais (coluna)", t)
+    assert legacy["Valor"].equals(vector["Valor"])
+
+    print("Reais digitados -> centavos")
+    typed = (cents[: min(n, 200_000)] / 100).tolist()
+    t, legacy = best(lambda: [legacy_cents(v) for v in typed])
+    record("parse", f"legado: cents() ({len(typed):,} valores)", t)
+    t, exact = best(lambda: [parse_cents(v) for v in typed])
+    record("parse", f"parse_cents ({len(typed):,} valores)", t)
+    assert exact == legacy
+    # Where float rounding loses a half centavo, parse_cents keeps it
+    print(f"  1.005 -> legado {legacy_cents(1.005)}, parse_cents {parse_cents(1.005)}")
+
+    print()
+    for group, baseline in (("format", rows[0][2]), ("reais", rows[3][2])):
+        fastest = min(seconds for g, _, seconds in rows if g == group)
+        print(f"{group}: {baseline / fastest:.1f}x mais rápido que o legado")
+
+if __name__ == "__main__":
+    main()
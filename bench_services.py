@@ -0,0 +1,340 @@
+"""
+Benchmark for the whole service layer on a synthetic dataset.
+
+Generates a throwaway database (synthetic_data.py), then times every public
+service function that takes a session, plus page-equivalent workloads (the
+service calls each page of app.py makes) and the smaller workloads a widget
+change reruns inside one page section, and writes the results as JSON so
+runs can be compared between commits.
+
+Usage:
+    python bench_services.py [--scale small|medium|large] [--clients N ...]
+                             [--db arquivo.db] [--output resultados.json]
+                             [--compare anterior.json] [--threshold 1.25]
+
+--db keeps (and reuses) the generated database, so several commits can be measured
+on the same data; the dataset is deterministic for a given scale and --seed.
+With --compare, exits with status 1 when a result got slower than the threshold.
+"""
+import argparse
+import importlib
+import inspect
+import io
+import json
+import os
+import pkgutil
+import platform
+import shutil
+import sqlite3
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+SCALES = {
+    "small": {"clients": 200, "processes": 2_000, "phases": 6_000, "payments": 50_000, "expenses": 2_000},
+    "medium": {"clients": 2_000, "processes": 20_000, "phases": 60_000, "payments": 1_000_000, "expenses": 20_000},
+    "large": {"clients": 10_000, "processes": 100_000, "phases": 300_000, "payments": 5_000_000, "expenses": 100_000},
+}
+
+# Differences below this are noise, whatever the ratio
+NOISE_FLOOR_MS = 1.0
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Mede todas as funções de services/ em uma base sintética.")
+    parser.add_argument("--scale", choices=list(SCALES), default="small")
+    for table in SCALES["small"]:
+        parser.add_argument(f"--{table}", type=int, help=f"quantidade de {table} (sobrepõe --scale)")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--repeat", type=int, default=5, help="execuções por função de leitura")
+    parser.add_argument("--db", help="arquivo da base sintética (mantido e reutilizado)")
+    parser.add_argument("--cache", action="store_true", help="mede com o cache de leitura ligado")
+    parser.add_argument("--output", default="bench_results.json")
+    parser.add_argument("--compare", help="JSON de uma execução anterior")
+    parser.add_argument("--threshold", type=float, default=1.25, help="razão a partir da qual conta como regressão")
+    return parser.parse_args()
+
+def git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def service_functions():
+    """{'module.function': function} for every public services.* function whose first parameter is `session`."""
+    import services
+    found = {}
+    for info in pkgutil.iter_modules(services.__path__):
+        module = importlib.import_module(f"services.{info.name}")
+        for name, func in inspect.getmembers(module, inspect.isfunction):
+            if name.startswith("_") or func.__module__ != module.__name__:
+                continue
+            params = list(inspect.signature(func).parameters)
+            if params and params[0] == "session":
+                found[f"{info.name}.{name}"] = func
+    return found
+
+def summarize(timings):
+    ms = [t * 1000 for t in timings]
+    return {"runs": len(ms), "min_ms": min(ms), "median_ms": statistics.median(ms), "max_ms": max(ms)}
+
+def main():
+    args = parse_args()
+    sizes = {table: getattr(args, table) or count for table, count in SCALES[args.scale].items()}
+
+    tmpdir = tempfile.mkdtemp(prefix="lexfinance_bench_")
+    path = args.db or os.path.join(tmpdir, "bench.db")
+    # The app's own engine and PRAGMA profile, pointed at the throwaway file
+    os.environ["LEXFINANCE_DB"] = os.path.abspath(path)
+
+    from sqlmodel import Session, select, func
+    import database
+    from models import Client, Process, Phase, Payment
+    from services import (bulk, cache, client_service, process_service, finance_service, expense_service,
+                          import_service, export_service, snapshot_service, report_service, rollup_service,
+                          search_service, receivables_service, forecast_service)
+    from synthetic_data import generate
+
+    engine = database.engine
+    cache.set_cache_enabled(args.cache)
+
+    generated_seconds = None
+    if not os.path.exists(path):
+        print(f"Gerando {path}: " + ", ".join(f"{n:,} {t}" for t, n in sizes.items()))
+        t0 = time.perf_counter()
+        sizes = generate(engine, seed=args.seed, progress=lambda m: print(f"  {m}"), **sizes)
+        generated_seconds = time.perf_counter() - t0
+        print(f"  pronto em {generated_seconds:.1f}s")
+    database.create_db_and_tables()
+
+    with Session(engine) as session:
+        # Worst cases: the client with most processes and the process with most payments
+        client_id = session.exec(select(Process.client_id).group_by(Process.client_id).order_by(func.count().desc()).limit(1)).one()
+        process_id = session.exec(
+            select(Phase.process_id).join(Payment, Payment.phase_id == Phase.id)
+            .group_by(Phase.process_id).order_by(func.count().desc()).limit(1)
+        ).one()
+        sample_clients = list(session.exec(select(Client.id).order_by(Client.id).limit(100)))
+        actual = {model.__tablename__: session.exec(select(func.count()).select_from(model)).one()
+                  for model in (Client, Process, Phase, Payment)}
+
+    def run(call, repeat):
+        timings = []
+        for _ in range(repeat):
+            with Session(engine) as session:
+                t0 = time.perf_counter()
+                call(session)
+                timings.append(time.perf_counter() - t0)
+        return timings
+
+    results = {}
+
+    def record(name, kind, timings):
+        results[name] = {"kind": kind, **summarize(timings)}
+        print(f"  {name:<52}{results[name]['median_ms']:>12.2f} ms")
+
+    # --- Reads ---
+    reads = {
+        "client_service.get_all_clients": lambda s: client_service.get_all_clients(s),
+        "client_service.get_client_options": lambda s: client_service.get_client_options(s),
+        "client_service.get_client_report_graph": lambda s: client_service.get_client_report_graph(s, client_id),
+        "client_service.list_clients": lambda s: client_service.list_clients(s, "silva"),
+        "process_service.get_all_processes": lambda s: process_service.get_all_processes(s),
+        "process_service.list_processes": lambda s: process_service.list_processes(s, responsible="ana", status="Ativo"),
+        "process_service.get_processes_with_client": lambda s: process_service.get_processes_with_client(s),
+        "process_service.get_processes_by_client": lambda s: process_service.get_processes_by_client(s, client_id),
+        "process_service.get_process_options": lambda s: process_service.get_process_options(s),
+        "process_service.get_phases_by_process": lambda s: process_service.get_phases_by_process(s, process_id),
+        "finance_service.get_payments_by_process": lambda s: finance_service.get_payments_by_process(s, process_id),
+        "finance_service.get_process_financials": lambda s: finance_service.get_process_financials(s, process_id),
+        "finance_service.get_client_financials": lambda s: finance_service.get_client_financials(s, client_id),
+        "finance_service.get_phase_financials": lambda s: finance_service.get_phase_financials(s, process_id),
+        "finance_service.get_portfolio_financials": lambda s: finance_service.get_portfolio_financials(s),
+        "finance_service.get_firm_revenue_by_month": lambda s: finance_service.get_firm_revenue_by_month(s),
+        "finance_service.get_cash_flow": lambda s: finance_service.get_cash_flow(s),
+        "finance_service.get_global_financials": lambda s: finance_service.get_global_financials(s),
+        "expense_service.get_all_expenses": lambda s: expense_service.get_all_expenses(s),
+        "expense_service.get_total_expenses": lambda s: expense_service.get_total_expenses(s),
+        "expense_service.list_expenses": lambda s: expense_service.list_expenses(s, paid=False, start="2024-01-01"),
+        "expense_service.get_expenses_by_month": lambda s: expense_service.get_expenses_by_month(s),
+        "expense_service.get_recurring_expenses": lambda s: expense_service.get_recurring_expenses(s),
+        "expense_service.get_scheduled_expenses": lambda s: expense_service.get_scheduled_expenses(s, "2024-01-01", "2024-12-31"),
+        "report_service.load_statements": lambda s: report_service.load_statements(s),
+        "report_service.get_client_report": lambda s: report_service.get_client_report(s, client_id),
+        "report_service.write_client_report": lambda s: report_service.write_client_report(s, client_id, io.BytesIO()),
+        "rollup_service.reconcile_rollups": lambda s: rollup_service.reconcile_rollups(s, repair=False),
+        "search_service.search": lambda s: search_service.search(s, "silva 12"),
+        "receivables_service.get_receivables_aging": lambda s: receivables_service.get_receivables_aging(s, "client"),
+        "forecast_service.get_cash_flow_forecast": lambda s: forecast_service.get_cash_flow_forecast(s),
+        "bulk.missing_ids": lambda s: bulk.missing_ids(s, Client, range(1, actual["clients"] + 1000)),
+    }
+    print("Leituras...")
+    for name, call in reads.items():
+        record(name, "read", run(call, args.repeat))
+
+    # --- Pages: the service calls each app.py page makes on a plain render ---
+    pages = {
+        "Painel": lambda s: (finance_service.get_global_financials(s), expense_service.get_total_expenses(s),
+                             finance_service.get_cash_flow(s), forecast_service.get_cash_flow_forecast(s),
+                             finance_service.get_portfolio_financials(s)),
+        "Clientes": lambda s: [c.model_dump() for c in client_service.list_clients(s).items],
+        "Processos": lambda s: (client_service.get_client_options(s),
+                                [p.client.name for p in process_service.list_processes(s).items]),
+        "Fases & Recebimentos": lambda s: (process_service.get_process_options(s), process_service.get_phases_by_process(s, process_id),
+                                           finance_service.get_payments_by_process(s, process_id),
+                                           finance_service.get_phase_financials(s, process_id),
+                                           finance_service.get_process_financials(s, process_id)),
+        "Despesas": lambda s: [e.model_dump() for e in expense_service.list_expenses(s).items],
+        "Relatórios": lambda s: (finance_service.get_portfolio_financials(s, responsible="Ana", search="trabalhista"),
+                                 receivables_service.get_receivables_aging(s, "client")),
+    }
+    print("Páginas...")
+    for name, call in pages.items():
+        record(f"page:{name}", "page", run(call, args.repeat))
+
+    # --- Reruns: what a widget change re-queries now that page sections are st.fragment
+    # units (compare with the page:* entry, which is what every interaction used to cost) ---
+    reruns = {
+        "Painel/Horizonte": lambda s: forecast_service.get_cash_flow_forecast(s, months=6),
+        "Painel/Fluxo de Caixa": lambda s: finance_service.get_cash_flow(s, granularity="quarter"),
+        "Fases & Recebimentos/Escolher fase": lambda s: process_service.get_phases_by_process(s, process_id),
+        "Fases & Recebimentos/Editar recebimento": lambda s: (process_service.get_phases_by_process(s, process_id),
+                                                               finance_service.get_payments_by_process(s, process_id),
+                                                               finance_service.get_phase_financials(s, process_id),
+                                                               finance_service.get_process_financials(s, process_id)),
+        "Despesas/Editar despesa": lambda s: [e.model_dump() for e in expense_service.list_expenses(s).items],
+        "Relatórios/Aging": lambda s: receivables_service.get_receivables_aging(s, "responsible"),
+    }
+    print("Reexecuções parciais...")
+    for name, call in reruns.items():
+        record(f"rerun:{name}", "rerun", run(call, args.repeat))
+
+    # --- Writes: create/update/delete cycles that leave the data as they found it ---
+    writes = {}
+
+    def timed(name, call):
+        with Session(engine) as session:
+            t0 = time.perf_counter()
+            value = call(session)
+            writes.setdefault(name, []).append(time.perf_counter() - t0)
+        return value
+
+    rows = 1000
+    print("Escritas...")
+    for i in range(args.repeat):
+        cid = timed("client_service.create_client", lambda s: client_service.create_client(s, f"Bench {i}", None, None, None).id)
+        pid = timed("process_service.create_process", lambda s: process_service.create_process(s, cid, f"Bench {i}").id)
+        fid = timed("process_service.create_phase", lambda s: process_service.create_phase(s, pid, "Bench", 100_000).id)
+        pay = timed("finance_service.create_payment", lambda s: finance_service.create_payment(s, fid, 1_000, "2025-06-01").id)
+        eid = timed("expense_service.create_expense", lambda s: expense_service.create_expense(s, "Bench", 1_000, "2025-06-01").id)
+        timed("client_service.update_client", lambda s: client_service.update_client(s, cid, email="bench@exemplo.com"))
+        timed("process_service.update_process", lambda s: process_service.update_process(s, pid, status="Suspenso"))
+        timed("process_service.update_phase", lambda s: process_service.update_phase(s, fid, value_centavos=200_000))
+        timed("finance_service.update_payment", lambda s: finance_service.update_payment(s, pay, amount_centavos=2_000))
+        timed("expense_service.update_expense", lambda s: expense_service.update_expense(s, eid, paid=False))
+
+        timed("client_service.create_clients_bulk", lambda s: client_service.create_clients_bulk(
+            s, [{"name": f"Bench bulk {n}"} for n in range(rows)]))
+        timed("process_service.create_processes_bulk", lambda s: process_service.create_processes_bulk(
+            s, [{"client_id": cid, "title": f"Bench bulk {n}"} for n in range(rows)]))
+        timed("process_service.create_phases_bulk", lambda s: process_service.create_phases_bulk(
+            s, [{"process_id": pid, "description": f"Bench bulk {n}", "value_centavos": 1_000} for n in range(rows)]))
+        timed("finance_service.create_payments_bulk", lambda s: finance_service.create_payments_bulk(
+            s, [{"phase_id": fid, "amount_centavos": 100, "received_date": "2025-06-02"} for n in range(rows)]))
+        expense_ids = timed("expense_service.create_expenses_bulk", lambda s: expense_service.create_expenses_bulk(
+            s, [{"description": f"Bench bulk {n}", "amount_centavos": 100, "date": "2025-06-02"} for n in range(rows)], return_ids=True))
+
+        timed("finance_service.delete_payment", lambda s: finance_service.delete_payment(s, pay))
+        timed("process_service.delete_phase", lambda s: process_service.delete_phase(s, fid))
+        timed("process_service.delete_process", lambda s: process_service.delete_process(s, pid))
+        timed("client_service.delete_client", lambda s: client_service.delete_client(s, cid))
+        timed("expense_service.delete_expense", lambda s: expense_service.delete_expense(s, eid))
+        with engine.begin() as conn:
+            conn.exec_driver_sql("DELETE FROM clients WHERE name LIKE 'Bench bulk %'")
+            conn.exec_driver_sql(f"DELETE FROM expenses WHERE id IN ({','.join(map(str, expense_ids))})")
+    for name, timings in writes.items():
+        record(name, "write", timings)
+
+    # --- Whole-database operations, once each ---
+    print("Operações sobre a base inteira...")
+    work = os.path.join(tmpdir, "work")
+    heavy = {
+        "export_service.export_backup": lambda s: export_service.export_backup(s, os.path.join(work, "export"), "csv.gz"),
+        "export_service.export_backup_zip": lambda s: export_service.export_backup_zip(s, io.BytesIO(), "csv.gz"),
+        "import_service.import_file": lambda s: import_service.import_file(
+            s, "clients", import_service.find_backup_file(os.path.join(work, "export"), "clients")),
+        "import_service.import_backup": lambda s: import_service.import_backup(s, os.path.join(work, "export")),
+        "report_service.generate_statements": lambda s: report_service.generate_statements(s, os.path.join(work, "pdf"), sample_clients),
+        "report_service.generate_statements_zip": lambda s: report_service.generate_statements_zip(s, io.BytesIO(), sample_clients),
+        "rollup_service.rebuild_rollups": lambda s: rollup_service.rebuild_rollups(s),
+        "search_service.rebuild_search_index": lambda s: search_service.rebuild_search_index(s),
+        "snapshot_service.create_snapshot": lambda s: snapshot_service.create_snapshot(s, os.path.join(work, "snapshots"), label="bench"),
+        "snapshot_service.restore_snapshot": lambda s: snapshot_service.restore_snapshot(
+            s, snapshot_service.list_snapshots(os.path.join(work, "snapshots"))[0]["path"]),
+    }
+    for name, call in heavy.items():
+        record(name, "heavy", run(call, 1))
+
+    # Helpers exercised through the functions above
+    covered_elsewhere = {"bulk.bulk_insert": "create_*_bulk", "bulk.upsert_rows": "import_service.import_file"}
+    skipped = sorted(set(service_functions()) - set(results) - set(covered_elsewhere))
+    if skipped:
+        print("Sem medição (adicione em bench_services.py): " + ", ".join(skipped))
+
+    report = {
+        "meta": {
+            "commit": git_commit(),
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "sqlite": sqlite3.sqlite_version,
+            "profile": database.sqlite_profile,
+            "cache": args.cache,
+            "repeat": args.repeat,
+            "seed": args.seed,
+            "scale": args.scale,
+            "rows": actual,
+            "generate_seconds": generated_seconds,
+            "skipped": skipped,
+        },
+        "results": results,
+    }
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2, ensure_ascii=False)
+    print(f"Resultados em {args.output}")
+
+    engine.dispose()
+    shutil.rmtree(tmpdir, ignore_errors=True)
+
+    if args.compare:
+        return compare(args.compare, report, args.threshold)
+    return 0
+
+def compare(baseline_path: str, report: dict, threshold: float) -> int:
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = json.load(f)
+    print()
+    print(f"Comparação com {baseline_path} (commit {baseline['meta'].get('commit')}, {baseline['meta'].get('rows')})")
+    print(f"{'medição':<54}{'antes (ms)':>12}{'agora (ms)':>12}{'razão':>8}")
+    regressions = []
+    for name, now in report["results"].items():
+        before = baseline["results"].get(name)
+        if not before:
+            print(f"{name:<54}{'-':>12}{now['median_ms']:>12.2f}{'novo':>8}")
+            continue
+        b, a = before["median_ms"], now["median_ms"]
+        ratio = a / b if b else float("inf")
+        flag = ""
+        if ratio > threshold and a - b > NOISE_FLOOR_MS:
+            regressions.append(name)
+            flag = "  <-- regressão"
+        print(f"{name:<54}{b:>12.2f}{a:>12.2f}{ratio:>7.2f}x{flag}")
+    if regressions:
+        print(f"{len(regressions)} regressão(ões) acima de {threshold:.2f}x.")
+        return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,173 @@
+"""
+Write throughput with concurrent writers, through the write queue and directly.
+
+Every writer is a thread that keeps saving payments (add one, remove it, so the
+data end as they started) for --seconds. With the queue (write_queue.WriteQueue)
+the writes wait for the single writer thread, which commits what piled up in one
+transaction; directly, each thread runs its own database.unit_of_work() and the
+threads take turns on SQLite's write lock.
+
+For each mode and number of writers it reports writes per second, write latency,
+"database is locked" errors and, for the queue, the mean batch (writes per
+commit) and commit latency. The difference grows with the cost of a commit, so
+run it on the profile in use (LEXFINANCE_DB_PROFILE=network for a synced drive).
+
+Usage:
+    python bench_writes.py [--writers 1,10,50] [--seconds 5] [--mode both|queue|direct]
+                           [--scale small|medium|large] [--db arquivo.db]
+                           [--linger 0] [--output resultados.json]
+"""
+import argparse
+import json
+import os
+import random
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+
+from bench_services import SCALES, git_commit
+from load_test import _percentile
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Vazão de escritas concorrentes, pela fila de escrita e direto.")
+    parser.add_argument("--writers", default="1,10,50", help="escritores simultâneos, separados por vírgula")
+    parser.add_argument("--seconds", type=float, default=5.0, help="duração de cada medição")
+    parser.add_argument("--mode", choices=["both", "queue", "direct"], default="both")
+    parser.add_argument("--scale", choices=list(SCALES), default="small")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--db", help="arquivo da base sintética (mantido e reutilizado)")
+    parser.add_argument("--linger", type=float, default=0.0, help="espera (s) por mais escritas antes de cada commit da fila")
+    parser.add_argument("--output", help="grava os resultados em JSON")
+    args = parser.parse_args()
+    args.writers = [int(n) for n in args.writers.split(",")]
+    return args
+
+def main():
+    args = parse_args()
+    tmpdir = tempfile.mkdtemp(prefix="lexfinance_writes_")
+    path = args.db or os.path.join(tmpdir, "writes.db")
+    os.environ["LEXFINANCE_DB"] = os.path.abspath(path)
+
+    from sqlalchemy.exc import OperationalError
+    from sqlmodel import select
+    import database
+    from database import read_session, unit_of_work
+    from models import Phase
+    from services import finance_service
+    from synthetic_data import generate
+    from write_queue import WriteQueue
+
+    if not os.path.exists(path):
+        sizes = SCALES[args.scale]
+        print(f"Gerando {path}: " + ", ".join(f"{n:,} {t}" for t, n in sizes.items()))
+        generate(database.engine, seed=args.seed, progress=lambda m: print(f"  {m}"), **sizes)
+    database.create_db_and_tables()
+
+    with read_session() as session:
+        phase_ids = list(session.exec(select(Phase.id).limit(1000)))
+
+    def save_payment(session, rng):
+        payment = finance_service.create_payment(session, rng.choice(phase_ids), 1_000, "2025-06-01")
+        finance_service.delete_payment(session, payment.id)
+
+    def run(mode: str, writers: int) -> dict:
+        stop = threading.Event()
+        lock = threading.Lock()
+        latencies = []
+        failures = Counter()
+        first_errors = {}
+        write_queue = WriteQueue(linger=args.linger) if mode == "queue" else None
+
+        def writer(number: int):
+            rng = random.Random(args.seed * 1000 + number)
+            while not stop.is_set():
+                t0 = time.perf_counter()
+                try:
+                    if write_queue is not None:
+                        write_queue.submit(save_payment, rng).result()
+                    else:
+                        with unit_of_work() as session:
+                            save_payment(session, rng)
+                except Exception as exc:  # noqa: BLE001 (counted and reported below)
+                    locked = isinstance(exc, OperationalError) and ("locked" in str(exc.orig) or "busy" in str(exc.orig))
+                    with lock:
+                        failure = "lock_errors" if locked else "errors"
+                        failures[failure] += 1
+                        first_errors.setdefault(failure, f"{type(exc).__name__}: {exc}"[:300])
+                else:
+                    with lock:
+                        latencies.append((time.perf_counter() - t0) * 1000)
+
+        threads = [threading.Thread(target=writer, args=(n,), daemon=True) for n in range(writers)]
+        t0 = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        time.sleep(args.seconds)
+        stop.set()
+        for thread in threads:
+            thread.join()
+        seconds = time.perf_counter() - t0
+
+        result = {
+            "mode": mode,
+            "writers": writers,
+            "seconds": seconds,
+            "writes": len(latencies),
+            "writes_per_s": len(latencies) / seconds,
+            "p50_ms": _percentile(latencies, 0.50),
+            "p95_ms": _percentile(latencies, 0.95),
+            "lock_errors": failures["lock_errors"],
+            "errors": failures["errors"],
+            "first_errors": first_errors,
+            "mean_batch": None,
+            "commit_p95_ms": None,
+        }
+        if write_queue is not None:
+            write_queue.close()
+            stats = write_queue.stats()
+            result.update(mean_batch=stats["mean_batch"], commit_p95_ms=stats["commit_p95_ms"])
+        return result
+
+    def num(value, spec=".1f"):
+        return format(value, spec) if value is not None else "-"
+
+    modes = ["queue", "direct"] if args.mode == "both" else [args.mode]
+    print(f"Perfil {database.sqlite_profile}, pool {database.POOL_SIZE} + {database.POOL_OVERFLOW} conexões")
+    print(f"{'modo':>8}{'escritores':>12}{'escr./s':>10}{'p50/p95 (ms)':>18}{'lote médio':>12}"
+          f"{'commit p95':>12}{'locks':>7}{'outros':>8}")
+    results = []
+    for writers in args.writers:
+        for mode in modes:
+            r = run(mode, writers)
+            results.append(r)
+            print(f"{mode:>8}{writers:>12}{r['writes_per_s']:>10.1f}{num(r['p50_ms']) + ' / ' + num(r['p95_ms']):>18}"
+                  f"{num(r['mean_batch']):>12}{num(r['commit_p95_ms']):>12}{r['lock_errors']:>7}{r['errors']:>8}")
+            for failure, message in r["first_errors"].items():
+                print(f"           {failure}: {message}")
+
+    if args.output:
+        report = {
+            "meta": {
+                "commit": git_commit(),
+                "timestamp": datetime.now().isoformat(timespec="seconds"),
+                "scale": args.scale,
+                "seconds": args.seconds,
+                "linger": args.linger,
+                "profile": database.sqlite_profile,
+            },
+            "results": results,
+        }
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        print(f"Resultados em {args.output}")
+
+    database.engine.dispose()
+    shutil.rmtree(tmpdir, ignore_errors=True)
+    return 1 if any(r["lock_errors"] for r in results if r["mode"] == "queue") else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
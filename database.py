@@ -1,23 +1,321 @@
+import math
+import os
+import sys
+import threading
+import time
+from collections import Counter, deque
+from contextlib import contextmanager
+from typing import Iterator, List, Optional
 from sqlmodel import SQLModel, create_engine, Session
 
 from sqlalchemy import event
 from sqlalchemy.engine import Engine
+from sqlalchemy.pool import QueuePool
 
-sqlite_file_name = r"H:\Meu Drive\LexDados\lexfinance.db"
+from services import cache
+from services.index_service import migrate_indexes
+from services.rollup_service import install_rollups
+from services.search_service import install_search_index
+
+# Default location is the synced Drive folder; LEXFINANCE_DB points elsewhere (e.g. a local SSD)
+DEFAULT_DB_PATH = r"H:\Meu Drive\LexDados\lexfinance.db"
+sqlite_file_name = os.environ.get("LEXFINANCE_DB") or DEFAULT_DB_PATH
 sqlite_url = f"sqlite:///{sqlite_file_name}"
 
+# Online snapshots (services/snapshot_service.py) go next to the database unless LEXFINANCE_SNAPSHOT_DIR is set
+snapshot_dir = os.environ.get("LEXFINANCE_SNAPSHOT_DIR") or os.path.join(os.path.dirname(sqlite_file_name) or ".", "snapshots")
+
+# PRAGMA tuning profiles applied on every new connection (LEXFINANCE_DB_PROFILE picks one)
+SQLITE_PROFILES = {
+    # Read-heavy defaults for a local disk: WAL lets readers run alongside the writer
+    "local": {
+        "journal_mode": "WAL",
+        "synchronous": "NORMAL",
+        "cache_size": -65536,       # KiB when negative (64 MB)
+        "mmap_size": 268435456,     # 256 MB
+        "temp_store": "MEMORY",
+        "busy_timeout": 5000,       # ms
+    },
+    # Synced/network drives: WAL needs shared memory on the same host, so keep the
+    # rollback journal, full fsync and no mmap; wait longer for locks held by the sync client
+    "network": {
+        "journal_mode": "DELETE",
+        "synchronous": "FULL",
+        "cache_size": -65536,
+        "mmap_size": 0,
+        "temp_store": "MEMORY",
+        "busy_timeout": 15000,
+    },
+}
+
+# Without an explicit choice, the Drive default gets the safe profile and any other path the fast one
+sqlite_profile = os.environ.get("LEXFINANCE_DB_PROFILE") or ("network" if sqlite_file_name == DEFAULT_DB_PATH else "local")
+if sqlite_profile not in SQLITE_PROFILES:
+    raise ValueError(f"LEXFINANCE_DB_PROFILE inválido: {sqlite_profile!r} (use {', '.join(SQLITE_PROFILES)})")
+
+# Connection pool. Streamlit runs each browser tab's script in its own thread, so
+# pooled connections move between threads (check_same_thread=False) and every
+# concurrent rerun holds one while it queries. SQLite admits one writer at a time
+# whatever the pool size; the pool only bounds open connections, and each keeps its
+# own page cache (cache_size above), so it stays small. A checkout waits up to
+# POOL_TIMEOUT seconds for a free connection before failing.
+POOL_SIZE = int(os.environ.get("LEXFINANCE_POOL_SIZE", "8"))
+POOL_OVERFLOW = int(os.environ.get("LEXFINANCE_POOL_OVERFLOW", "8"))
+POOL_TIMEOUT = float(os.environ.get("LEXFINANCE_POOL_TIMEOUT", "30"))
+
 connect_args = {"check_same_thread": False}
-engine = create_engine(sqlite_url, connect_args=connect_args)
+engine = create_engine(
+    sqlite_url,
+    connect_args=connect_args,
+    poolclass=QueuePool,
+    pool_size=POOL_SIZE,
+    max_overflow=POOL_OVERFLOW,
+    pool_timeout=POOL_TIMEOUT,
+)
 
 @event.listens_for(Engine, "connect")
 def set_sqlite_pragma(dbapi_connection, connection_record):
     cursor = dbapi_connection.cursor()
     cursor.execute("PRAGMA foreign_keys=ON")
+    for pragma, value in SQLITE_PROFILES[sqlite_profile].items():
+        cursor.execute(f"PRAGMA {pragma}={value}")
     cursor.close()
 
+_schema_ready = False
+
 def create_db_and_tables():
+    # Streamlit calls this on every rerun; the schema checks only need to run once per process
+    global _schema_ready
+    if _schema_ready:
+        return
     SQLModel.metadata.create_all(engine)
+    migrate_indexes(engine)
+    install_rollups(engine)
+    install_search_index(engine)
+    _schema_ready = True
+
+@contextmanager
+def count_statements(bind=engine) -> Iterator[List[str]]:
+    """
+    Test utility: collects the SQL statements executed on `bind` inside the block.
+
+        with count_statements() as statements:
+            render_page()
+        assert len(statements) <= 5
+    """
+    statements = []
+
+    def record(conn, cursor, statement, parameters, context, executemany):
+        statements.append(statement)
+
+    event.listen(bind, "before_cursor_execute", record)
+    try:
+        yield statements
+    finally:
+        event.remove(bind, "before_cursor_execute", record)
+
+# --- SQL profiler ---
+# Opt-in (LEXFINANCE_PROFILE=1 or enable_profiler()). The engine listeners are only
+# attached while it is on, so a disabled profiler costs nothing per statement.
+PROFILE_MAX_RECORDS = 10000
+SLOW_LOG_SIZE = 200
+slow_query_ms = float(os.environ.get("LEXFINANCE_SLOW_MS", "100"))
+
+_PROJECT_DIR = os.path.dirname(os.path.abspath(__file__))
+# Service-layer plumbing skipped when looking for the calling service function
+_PROFILE_SKIP_MODULES = ("services.cache", "services.bulk")
+
+_profile_records = deque(maxlen=PROFILE_MAX_RECORDS)
+_slow_queries = deque(maxlen=SLOW_LOG_SIZE)
+_page_renders = Counter()
+_page_renders_lock = threading.Lock()  # Streamlit runs each session's script in its own thread
+_profile_local = threading.local()
+_profiler_enabled = False
+
+def _params_shape(parameters, executemany: bool) -> str:
+    if executemany:
+        return f"{len(parameters)}x{len(parameters[0]) if parameters else 0}"
+    return str(len(parameters)) if parameters else "0"
+
+def _calling_function() -> Optional[str]:
+    """First services.* function up the stack, else the first project frame (e.g. a page script)."""
+    fallback = None
+    frame = sys._getframe(2)
+    while frame is not None:
+        code = frame.f_code
+        if code.co_filename.startswith(_PROJECT_DIR) and "site-packages" not in code.co_filename and code.co_filename != __file__:
+            module = frame.f_globals.get("__name__", "?")
+            if module.startswith("services.") and module not in _PROFILE_SKIP_MODULES:
+                return f"{module}.{code.co_name}"
+            if fallback is None and not module.startswith("services."):
+                fallback = f"{module}.{code.co_name}"
+        frame = frame.f_back
+    return fallback
+
+def _profile_before(conn, cursor, statement, parameters, context, executemany):
+    # On the execution context, which is dropped with the statement even when it fails
+    # (after_cursor_execute then never runs); internal statements without one are not timed
+    if context is not None:
+        context.profile_t0 = time.perf_counter()
+
+def _profile_after(conn, cursor, statement, parameters, context, executemany):
+    t0 = getattr(context, "profile_t0", None)
+    if t0 is None:
+        return
+    ms = (time.perf_counter() - t0) * 1000
+    record = {
+        "page": getattr(_profile_local, "page", None),
+        "caller": _calling_function(),
+        "statement": statement,
+        "params": _params_shape(parameters, executemany),
+        "ms": ms,
+        # sqlite3 only reports rows for writes; SELECT row counts are unknown before fetching
+        "rows": cursor.rowcount if cursor.rowcount >= 0 else None,
+        "at": time.time(),
+    }
+    _profile_records.append(record)
+    if ms >= slow_query_ms:
+        _slow_queries.append(record)
+
+def enable_profiler(bind=Engine):
+    # Default: every engine, including the write queue's own (write_queue.py)
+    global _profiler_enabled
+    if not _profiler_enabled:
+        event.listen(bind, "before_cursor_execute", _profile_before)
+        event.listen(bind, "after_cursor_execute", _profile_after)
+        _profiler_enabled = True
 
-def get_session():
-    with Session(engine) as session:
+def disable_profiler(bind=Engine):
+    global _profiler_enabled
+    if _profiler_enabled:
+        event.remove(bind, "before_cursor_execute", _profile_before)
+        event.remove(bind, "after_cursor_execute", _profile_after)
+        _profiler_enabled = False
+
+def profiler_enabled() -> bool:
+    return _profiler_enabled
+
+def reset_profiler():
+    _profile_records.clear()
+    _slow_queries.clear()
+    with _page_renders_lock:
+        _page_renders.clear()
+
+def profile_page(page: str):
+    """Tags the statements of the current script run (this thread) with `page`."""
+    _profile_local.page = page
+    if _profiler_enabled:
+        with _page_renders_lock:
+            _page_renders[page] += 1
+
+def _percentile(values: List[float], q: float) -> float:
+    # Nearest-rank percentile
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(q * len(ordered)) - 1)]
+
+def _summarize(key: str) -> List[dict]:
+    # Pages whose renders were fully served by the read cache show up with 0 queries
+    with _page_renders_lock:
+        renders = dict(_page_renders)
+    groups = {page: [] for page in renders} if key == "page" else {}
+    for record in list(_profile_records):
+        groups.setdefault(record[key], []).append(record["ms"])
+    rows = []
+    for name, timings in groups.items():
+        row = {key: name, "queries": len(timings)}
+        if key == "page":
+            row["renders"] = renders.get(name, 0)
+            row["queries_per_render"] = len(timings) / row["renders"] if row["renders"] else None
+        row.update({
+            "p50_ms": _percentile(timings, 0.50) if timings else None,
+            "p95_ms": _percentile(timings, 0.95) if timings else None,
+            "total_ms": sum(timings),
+        })
+        rows.append(row)
+    return sorted(rows, key=lambda r: r["total_ms"], reverse=True)
+
+def profile_by_page() -> List[dict]:
+    """Per page: queries, renders, queries_per_render, p50_ms, p95_ms, total_ms."""
+    return _summarize("page")
+
+def profile_by_caller() -> List[dict]:
+    """Per calling service function: queries, p50_ms, p95_ms, total_ms."""
+    return _summarize("caller")
+
+def slow_queries() -> List[dict]:
+    """The last SLOW_LOG_SIZE statements slower than slow_query_ms, newest first."""
+    return list(reversed(_slow_queries))
+
+if os.environ.get("LEXFINANCE_PROFILE") == "1":
+    enable_profiler()
+
+# --- Sessions ---
+# Context managers, closed when the block ends. Reads go through read_session(),
+# which holds a pooled connection but no lock, so a page run may keep one open.
+# The app's writes go through write_queue, whose single writer thread applies
+# them in unit_of_work()-style transactions; scripts and tests may use a short
+# unit_of_work() around the service calls directly. Whole-database
+# writes (snapshot restore, import, rollup repair) manage their own connections
+# and transactions, and take write_session().
+
+@event.listens_for(engine, "checkin")
+def _reset_query_only(dbapi_connection, connection_record):
+    # A connection lent to a read_session() goes back to the pool writable
+    if dbapi_connection is not None and connection_record.info.pop("query_only", False):
+        dbapi_connection.execute("PRAGMA query_only = OFF")
+
+def _make_read_only(session, transaction, connection):
+    # Straight on the driver connection, like the reset: a connection flag, not a query
+    connection.connection.driver_connection.execute("PRAGMA query_only = ON")
+    connection.info["query_only"] = True  # the pool record's info, seen by _reset_query_only
+
+@contextmanager
+def read_session(bind=engine) -> Iterator[Session]:
+    """
+    Session for reads. Its connection is set to PRAGMA query_only, so an accidental
+    write fails ("attempt to write a readonly database") instead of committing.
+    pysqlite runs plain SELECTs outside a transaction, so no read lock or WAL
+    snapshot is held between queries.
+    """
+    with Session(bind) as session:
+        event.listen(session, "after_begin", _make_read_only)
         yield session
+
+@contextmanager
+def write_session(bind=engine) -> Iterator[Session]:
+    """Read-write session for services that commit on their own; closed (and rolled back if pending) at the end."""
+    with Session(bind) as session:
+        yield session
+
+@contextmanager
+def unit_of_work(bind=engine) -> Iterator[Session]:
+    """
+    Read-write session whose writes commit together when the block ends, or not at
+    all if it raises. The transaction starts with BEGIN IMMEDIATE, taking the write
+    lock up front (waiting up to busy_timeout for other writers) rather than failing
+    with "database is locked" when a read transaction later tries to write. The
+    commits the services make inside become savepoints of that transaction.
+
+        with unit_of_work() as session:
+            phase = process_service.create_phase(session, process_id, "Entrada", 100_000)
+            finance_service.create_payment(session, phase.id, 50_000, "2025-03-10")
+
+    Keep the block short: it blocks every other writer while open. Services that
+    open their own connections (snapshot_service, export_service) need
+    write_session() instead.
+    """
+    with bind.connect() as conn, cache.record_bumps() as written:
+        conn.exec_driver_sql("BEGIN IMMEDIATE")
+        try:
+            with Session(bind=conn, join_transaction_mode="create_savepoint") as session:
+                yield session
+                session.commit()
+            conn.commit()
+        except BaseException:
+            conn.rollback()
+            raise
+        finally:
+            # @invalidates bumps versions when each service returns, before this
+            # commit: reads cached in between (here or by other threads) hold rows
+            # that were not final yet
+            cache.bump(*written)
@@ -0,0 +1,41 @@
+"""
+Generates the PDF statement of every client (or of the given ids) in one run.
+
+Usage:
+    python generate_statements.py [pasta | arquivo.zip] [--client ID ...] [--workers N]
+
+Data is read in a few queries and the PDFs are rendered in parallel, one process
+per CPU core by default. Prints the render time of every document.
+"""
+import argparse
+import time
+
+from sqlmodel import Session
+
+import models  # noqa: F401 (registers the tables before create_db_and_tables)
+from database import create_db_and_tables, engine
+from services.report_service import generate_statements, generate_statements_zip
+
+def main():
+    parser = argparse.ArgumentParser(description="Gera os extratos em PDF dos clientes do LexFinance.")
+    parser.add_argument("target", nargs="?", default="extratos", help="pasta de destino ou arquivo .zip (padrão: extratos)")
+    parser.add_argument("--client", type=int, action="append", dest="client_ids", help="id do cliente (repetível; padrão: todos)")
+    parser.add_argument("--workers", type=int, default=None, help="processos de renderização (padrão: núcleos da CPU)")
+    args = parser.parse_args()
+
+    create_db_and_tables()
+
+    t0 = time.perf_counter()
+    with Session(engine) as session:
+        if args.target.endswith(".zip"):
+            documents = generate_statements_zip(session, args.target, args.client_ids, args.workers)
+        else:
+            documents = generate_statements(session, args.target, args.client_ids, args.workers)
+    elapsed = time.perf_counter() - t0
+
+    for doc in documents:
+        print(f"{doc['client_id']:>8} {doc['file']:<60} {doc['bytes'] / 1024:>8.1f} KB {doc['seconds'] * 1000:>8.1f} ms")
+    print(f"{len(documents)} extrato(s) gerado(s) em {elapsed:.2f}s -> {args.target}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,39 @@
+"""
+Restores CSV/Parquet backup files into the database.
+
+Usage:
+    python import_backup.py [pasta] [--chunk-size N]
+
+Looks for clients, processes, phases, payments and expenses files
+(.csv, .csv.gz or .parquet) in the folder and upserts them in that order.
+"""
+import argparse
+
+from sqlmodel import Session
+
+import models  # noqa: F401 (registers the tables before create_db_and_tables)
+from database import create_db_and_tables, engine
+from services.import_service import DEFAULT_IMPORT_CHUNK_SIZE, import_backup
+
+def main():
+    parser = argparse.ArgumentParser(description="Importa os arquivos de backup para o banco do LexFinance.")
+    parser.add_argument("directory", nargs="?", default=".", help="pasta com os arquivos (padrão: pasta atual)")
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_IMPORT_CHUNK_SIZE, help="linhas por transação")
+    args = parser.parse_args()
+
+    create_db_and_tables()
+
+    def show(report: dict):
+        print(f"{report['table']:<10} {report['read']:>10} lidas {report['imported']:>10} importadas "
+              f"{report['rejected']:>8} rejeitadas {report['seconds']:>8.2f}s {report['rows_per_sec']:>10.0f} linhas/s")
+        for row_number, reason in report["errors"][:10]:
+            print(f"    linha {row_number}: {reason}")
+
+    with Session(engine) as session:
+        reports = import_backup(session, args.directory, args.chunk_size, progress=show)
+
+    if not reports:
+        print(f"Nenhum arquivo de backup encontrado em {args.directory!r}.")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,223 @@
+"""
+Concurrent load test for the service layer on a synthetic dataset.
+
+Simulates Streamlit serving several users at once: every user is a thread (as
+each browser tab's script run is) that keeps rendering page workloads through
+database.read_session() and, now and then, saves a payment through the write
+queue (write_queue.write), all sharing the app's engine and connection pool.
+
+For each number of users it reports throughput, read and write latency, and the
+failures concurrency causes: "database is locked" errors (a writer waited longer
+than busy_timeout) and pool timeouts (no free connection within POOL_TIMEOUT).
+
+Usage:
+    python load_test.py [--users 1,10,50] [--seconds 10] [--write-ratio 0.1]
+                        [--scale small|medium|large] [--db arquivo.db]
+                        [--cache] [--output resultados.json]
+
+--db keeps (and reuses) the generated database, like bench_services.py. Writes
+add a payment and remove it in the same queued write, so the data end as they
+started. --direct writes through database.unit_of_work() in each user's thread
+instead, as before the queue. Exits with status 1 when any lock error or pool timeout happened.
+"""
+import argparse
+import json
+import math
+import os
+import random
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+
+from bench_services import SCALES, git_commit
+
+def parse_args():
+    parser = argparse.ArgumentParser(description="Teste de carga concorrente sobre as funções de services/.")
+    parser.add_argument("--users", default="1,10,50", help="usuários simultâneos, separados por vírgula")
+    parser.add_argument("--seconds", type=float, default=10.0, help="duração de cada nível de carga")
+    parser.add_argument("--write-ratio", type=float, default=0.1, help="fração das operações que são escritas")
+    parser.add_argument("--scale", choices=list(SCALES), default="small")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--db", help="arquivo da base sintética (mantido e reutilizado)")
+    parser.add_argument("--cache", action="store_true", help="com o cache de leitura ligado")
+    parser.add_argument("--direct", action="store_true", help="escritas direto em unit_of_work(), sem a fila")
+    parser.add_argument("--output", help="grava os resultados em JSON")
+    args = parser.parse_args()
+    args.users = [int(n) for n in args.users.split(",")]
+    return args
+
+def _percentile(values, q):
+    # Nearest-rank percentile, as in the profiler
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(q * len(ordered)) - 1)]
+
+def main():
+    args = parse_args()
+    tmpdir = tempfile.mkdtemp(prefix="lexfinance_load_")
+    path = args.db or os.path.join(tmpdir, "load.db")
+    # The app's own engine, pool and PRAGMA profile, pointed at the throwaway file
+    os.environ["LEXFINANCE_DB"] = os.path.abspath(path)
+
+    from sqlalchemy.exc import OperationalError, TimeoutError as PoolTimeout
+    from sqlmodel import select
+    import database
+    from database import read_session, unit_of_work
+    from write_queue import get_write_queue, write
+    from models import Client, Process, Phase
+    from services import cache, client_service, expense_service, finance_service, process_service, receivables_service
+    from synthetic_data import generate
+
+    cache.set_cache_enabled(args.cache)
+    if not os.path.exists(path):
+        sizes = SCALES[args.scale]
+        print(f"Gerando {path}: " + ", ".join(f"{n:,} {t}" for t, n in sizes.items()))
+        generate(database.engine, seed=args.seed, progress=lambda m: print(f"  {m}"), **sizes)
+    database.create_db_and_tables()
+
+    with read_session() as session:
+        client_ids = list(session.exec(select(Client.id).limit(1000)))
+        process_ids = list(session.exec(select(Process.id).limit(1000)))
+        phase_ids = list(session.exec(select(Phase.id).limit(1000)))
+
+    # The service calls of the pages users spend most time on (see bench_services.py)
+    def page_finance(session, rng):
+        process_id = rng.choice(process_ids)
+        process_service.get_phases_by_process(session, process_id)
+        finance_service.get_payments_by_process(session, process_id)
+        finance_service.get_phase_financials(session, process_id)
+        finance_service.get_process_financials(session, process_id)
+
+    def page_dashboard(session, rng):
+        finance_service.get_global_financials(session)
+        expense_service.get_total_expenses(session)
+        finance_service.get_cash_flow(session)
+
+    def page_clients(session, rng):
+        client_service.list_clients(session)
+        finance_service.get_client_financials(session, rng.choice(client_ids))
+
+    def page_reports(session, rng):
+        receivables_service.get_receivables_aging(session, "client")
+
+    pages = [page_finance, page_finance, page_dashboard, page_clients, page_reports]
+
+    def save_payment(session, rng):
+        payment = finance_service.create_payment(session, rng.choice(phase_ids), 1_000, "2025-06-01")
+        finance_service.delete_payment(session, payment.id)
+
+    def run_level(users: int) -> dict:
+        stop = threading.Event()
+        lock = threading.Lock()
+        timings = {"read": [], "write": []}
+        failures = Counter()
+        first_errors = {}
+
+        def fail(failure: str, exc: Exception):
+            with lock:
+                failures[failure] += 1
+                first_errors.setdefault(failure, f"{type(exc).__name__}: {exc}"[:300])
+
+        def user(number: int):
+            rng = random.Random(args.seed * 1000 + number)
+            while not stop.is_set():
+                kind = "write" if rng.random() < args.write_ratio else "read"
+                t0 = time.perf_counter()
+                try:
+                    if kind == "write" and args.direct:
+                        with unit_of_work() as session:
+                            save_payment(session, rng)
+                    elif kind == "write":
+                        write(save_payment, rng)
+                    else:
+                        with read_session() as session:
+                            rng.choice(pages)(session, rng)
+                except PoolTimeout as exc:
+                    fail("pool_timeouts", exc)
+                except OperationalError as exc:
+                    fail("lock_errors" if "locked" in str(exc.orig) or "busy" in str(exc.orig) else "errors", exc)
+                except Exception as exc:  # noqa: BLE001 (counted and reported below)
+                    fail("errors", exc)
+                else:
+                    elapsed = time.perf_counter() - t0
+                    with lock:
+                        timings[kind].append(elapsed * 1000)
+
+        threads = [threading.Thread(target=user, args=(n,), daemon=True) for n in range(users)]
+        t0 = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        time.sleep(args.seconds)
+        stop.set()
+        for thread in threads:
+            thread.join()
+        seconds = time.perf_counter() - t0
+
+        reads, writes = len(timings["read"]), len(timings["write"])
+        return {
+            "users": users,
+            "seconds": seconds,
+            "ops_per_s": (reads + writes) / seconds,
+            "reads": reads,
+            "writes": writes,
+            "read_p50_ms": _percentile(timings["read"], 0.50),
+            "read_p95_ms": _percentile(timings["read"], 0.95),
+            "write_p50_ms": _percentile(timings["write"], 0.50),
+            "write_p95_ms": _percentile(timings["write"], 0.95),
+            "lock_errors": failures["lock_errors"],
+            "pool_timeouts": failures["pool_timeouts"],
+            "errors": failures["errors"],
+            "first_errors": first_errors,
+        }
+
+    def ms(value):
+        return f"{value:.1f}" if value is not None else "-"
+
+    print(f"Pool: {database.POOL_SIZE} + {database.POOL_OVERFLOW} conexões, perfil {database.sqlite_profile}, "
+          f"cache {'ligado' if args.cache else 'desligado'}, {args.write_ratio:.0%} escritas "
+          f"{'diretas' if args.direct else 'pela fila'}")
+    print(f"{'usuários':>9}{'ops/s':>10}{'leituras':>10}{'escritas':>10}{'leit. p50/p95 (ms)':>22}"
+          f"{'escr. p50/p95 (ms)':>22}{'locks':>7}{'pool':>6}{'outros':>8}")
+    levels = []
+    for users in args.users:
+        level = run_level(users)
+        levels.append(level)
+        print(f"{users:>9}{level['ops_per_s']:>10.1f}{level['reads']:>10}{level['writes']:>10}"
+              f"{ms(level['read_p50_ms']) + ' / ' + ms(level['read_p95_ms']):>22}"
+              f"{ms(level['write_p50_ms']) + ' / ' + ms(level['write_p95_ms']):>22}"
+              f"{level['lock_errors']:>7}{level['pool_timeouts']:>6}{level['errors']:>8}")
+        for failure, message in level["first_errors"].items():
+            print(f"           {failure}: {message}")
+
+    if args.output:
+        report = {
+            "meta": {
+                "commit": git_commit(),
+                "timestamp": datetime.now().isoformat(timespec="seconds"),
+                "scale": args.scale,
+                "seconds": args.seconds,
+                "write_ratio": args.write_ratio,
+                "cache": args.cache,
+                "direct": args.direct,
+                "pool_size": database.POOL_SIZE,
+                "pool_overflow": database.POOL_OVERFLOW,
+                "profile": database.sqlite_profile,
+            },
+            "levels": levels,
+        }
+        with open(args.output, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        print(f"Resultados em {args.output}")
+
+    get_write_queue().close()
+    database.engine.dispose()
+    shutil.rmtree(tmpdir, ignore_errors=True)
+    return 1 if any(level["lock_errors"] or level["pool_timeouts"] for level in levels) else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
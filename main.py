@@ -1,11 +1,12 @@
 import streamlit as st
-from database import create_db_and_tables
+from database import create_db_and_tables, profile_page
 from ui.dashboard import show_dashboard
 from ui.clients import show_clients
 from ui.processes import show_processes
 from ui.finance import show_finance
 from ui.reports import show_reports
 from ui.backup import show_backup
+from services.cache import cache_stats
 
 # Initialize DB
 create_db_and_tables()
@@ -24,6 +25,12 @@ with st.sidebar:
         "Relatórios",
         "Backup"
     ])
+    
+    stats = cache_stats()
+    st.caption(f"Cache: {stats['hits']} acertos / {stats['misses']} consultas ({stats['hit_rate']:.0%})")
+
+# Tags this run's SQL statements for the profiler
+profile_page(page)
 
 if page == "Painel":
     show_dashboard()
@@ -1,9 +1,13 @@
 from typing import Optional, List
+from sqlalchemy import Index
 from sqlmodel import Field, SQLModel, Relationship
 from datetime import date
 
 class Client(SQLModel, table=True):
     __tablename__ = "clients"
+    __table_args__ = (
+        Index("ix_clients_name", "name"),
+    )
     id: Optional[int] = Field(default=None, primary_key=True)
     name: str
     cpf_cnpj: Optional[str] = None
@@ -14,6 +18,10 @@ class Client(SQLModel, table=True):
 
 class Process(SQLModel, table=True):
     __tablename__ = "processes"
+    __table_args__ = (
+        Index("ix_processes_client_title", "client_id", "title"), # get_processes_by_client ORDER BY title
+        Index("ix_processes_title", "title"),
+    )
     id: Optional[int] = Field(default=None, primary_key=True)
     client_id: int = Field(foreign_key="clients.id") # Client deletion logic handled by Client.processes cascade or DB cascade if configured
     cnj: Optional[str] = None
@@ -27,6 +35,9 @@ class Process(SQLModel, table=True):
 
 class Phase(SQLModel, table=True):
     __tablename__ = "phases"
+    __table_args__ = (
+        Index("ix_phases_process_id", "process_id"),
+    )
     id: Optional[int] = Field(default=None, primary_key=True)
     process_id: int = Field(foreign_key="processes.id") # We rely on Python side cascade from Process.phases for now, or existing DB schema
     description: str
@@ -38,6 +49,10 @@ class Phase(SQLModel, table=True):
 
 class Payment(SQLModel, table=True):
     __tablename__ = "payments"
+    __table_args__ = (
+        Index("ix_payments_phase_date", "phase_id", "received_date", "amount_centavos"), # payments per phase/process; covering for received totals
+        Index("ix_payments_date_amount", "received_date", "amount_centavos"), # covering index for revenue by period
+    )
     id: Optional[int] = Field(default=None, primary_key=True)
     phase_id: int = Field(foreign_key="phases.id")
     amount_centavos: int
@@ -47,9 +62,53 @@ class Payment(SQLModel, table=True):
 
 class Expense(SQLModel, table=True):
     __tablename__ = "expenses"
+    __table_args__ = (
+        Index("ix_expenses_paid_date", "paid", "date", "amount_centavos"), # covering index for paid expenses by period
+        Index("ix_expenses_date", "date"), # get_all_expenses ORDER BY date DESC
+    )
     id: Optional[int] = Field(default=None, primary_key=True)
     description: str
     amount_centavos: int
     date: str # ISO format YYYY-MM-DD
     category: Optional[str] = Field(default="Geral")
     paid: bool = Field(default=True)
+
+# --- Rollups (maintained by SQLite triggers, see services/rollup_service.py) ---
+class PhaseTotal(SQLModel, table=True):
+    __tablename__ = "phase_totals"
+    phase_id: int = Field(primary_key=True)
+    received_centavos: int = Field(default=0)
+
+class ProcessTotal(SQLModel, table=True):
+    __tablename__ = "process_totals"
+    process_id: int = Field(primary_key=True)
+    contracted_centavos: int = Field(default=0)
+    received_centavos: int = Field(default=0)
+
+class ClientTotal(SQLModel, table=True):
+    __tablename__ = "client_totals"
+    client_id: int = Field(primary_key=True)
+    contracted_centavos: int = Field(default=0)
+    received_centavos: int = Field(default=0)
+
+class ClientVersion(SQLModel, table=True):
+    # Bumped on every write to a client's statement data (cache key of its PDF report); kept after the client is deleted
+    __tablename__ = "client_versions"
+    client_id: int = Field(primary_key=True)
+    version: int = Field(default=0)
+
+class PhasePaymentDates(SQLModel, table=True):
+    # First and last payment per phase (receivables aging); only phases with payments have a row
+    __tablename__ = "phase_payment_dates"
+    phase_id: int = Field(primary_key=True)
+    first_paid_date: str
+    last_paid_date: str
+
+class MonthlyLedger(SQLModel, table=True):
+    # Cash movements per month (YYYY-MM); net = received - expenses paid
+    __tablename__ = "monthly_ledger"
+    month: str = Field(primary_key=True)
+    received_centavos: int = Field(default=0)
+    expenses_paid_centavos: int = Field(default=0)
+    expenses_pending_centavos: int = Field(default=0)
+    net_centavos: int = Field(default=0)
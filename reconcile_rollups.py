@@ -0,0 +1,51 @@
+"""
+Checks the stored rollups (phase_totals, process_totals, client_totals,
+phase_payment_dates and monthly_ledger) against values recomputed from phases,
+payments and expenses.
+
+Usage:
+    python reconcile_rollups.py [--check | --rebuild]
+
+Prints every mismatch and rebuilds the rollups when drift is found, unless
+--check is given. Exits with status 1 when drift was found. --rebuild skips the
+comparison and recomputes every rollup from scratch.
+"""
+import argparse
+import sys
+import time
+
+from sqlmodel import Session
+
+import models  # noqa: F401 (registers the tables before create_db_and_tables)
+from database import create_db_and_tables, engine
+from services.rollup_service import reconcile_rollups, rebuild_rollups
+
+def main():
+    parser = argparse.ArgumentParser(description="Confere e corrige os saldos consolidados do LexFinance.")
+    mode = parser.add_mutually_exclusive_group()
+    mode.add_argument("--check", action="store_true", help="apenas relata as divergências, sem corrigir")
+    mode.add_argument("--rebuild", action="store_true", help="recalcula todos os consolidados (inclusive o razão mensal) sem comparar")
+    args = parser.parse_args()
+
+    create_db_and_tables()
+
+    if args.rebuild:
+        t0 = time.perf_counter()
+        with Session(engine) as session:
+            rebuild_rollups(session)
+        print(f"Consolidados recalculados em {time.perf_counter() - t0:.1f}s.")
+        return 0
+
+    with Session(engine) as session:
+        drift = reconcile_rollups(session, repair=not args.check)
+
+    if drift.empty:
+        print("Saldos consolidados conferem com os lançamentos.")
+        return 0
+
+    print(drift.to_string(index=False))
+    print(f"{len(drift)} divergência(s) encontrada(s)" + ("." if args.check else " e corrigida(s)."))
+    return 1
+
+if __name__ == "__main__":
+    sys.exit(main())
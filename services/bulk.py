@@ -0,0 +1,108 @@
+import json
+from datetime import date
+from itertools import islice
+from typing import Callable, Iterable, Iterator, List, Optional, Set, Tuple, Type, Union
+
+import pandas as pd
+from sqlalchemy import insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+from sqlmodel import Session, SQLModel, select, func
+
+Rows = Union[pd.DataFrame, Iterable[dict]]
+
+DEFAULT_CHUNK_SIZE = 5000
+
+def chunked(iterable: Iterable, size: int) -> Iterator[list]:
+    it = iter(iterable)
+    while True:
+        chunk = list(islice(it, size))
+        if not chunk:
+            return
+        yield chunk
+
+def iter_rows(rows: Rows) -> Iterator[dict]:
+    """Yields plain dicts from a DataFrame (NaN -> None, numpy scalars -> Python) or an iterable of dicts."""
+    if isinstance(rows, pd.DataFrame):
+        df = rows.astype(object).where(rows.notna(), None)
+        yield from df.to_dict("records")
+    else:
+        yield from rows
+
+# --- Value coercion for row dicts coming from forms, CSVs or DataFrames ---
+def optional_str(value) -> Optional[str]:
+    return None if value is None else str(value)
+
+def as_iso_date(value) -> str:
+    # Accepts date/datetime/Timestamp or strings starting with YYYY-MM-DD
+    return date.fromisoformat(str(value)[:10]).isoformat()
+
+def as_bool(value) -> bool:
+    if isinstance(value, str):
+        return value.strip().lower() in ("1", "true", "t", "sim", "s", "yes", "y")
+    return bool(value)
+
+def missing_ids(session: Session, model: Type[SQLModel], ids: Iterable) -> Set:
+    """
+    Returns the ids that do not exist in the model's table, using a single query.
+    The ids travel as one JSON parameter (json_each), so there is no bound-variable limit.
+    """
+    wanted = set(ids)
+    if not wanted:
+        return set()
+
+    values = func.json_each(json.dumps(sorted(wanted))).table_valued("value")
+    found = session.exec(select(model.id).where(model.id.in_(select(values.c.value)))).all()
+    return wanted - set(found)
+
+def bulk_insert(session: Session, model: Type[SQLModel], rows: Rows, coerce: Callable[[dict], dict],
+                foreign_key: Optional[Tuple[str, Type[SQLModel]]] = None, chunk_size: int = DEFAULT_CHUNK_SIZE, return_ids: bool = False) -> Union[int, List[int]]:
+    """
+    Inserts many rows in one transaction, chunk_size rows per executemany.
+    `coerce` turns an input row into the column dict (raising ValueError on bad data);
+    `foreign_key` is (column_name, parent_model) and is validated up front in one query.
+    No ORM objects are built or refreshed; with return_ids the generated ids come back
+    through INSERT ... RETURNING in input order. Returns the row count otherwise.
+    """
+    records = []
+    for n, row in enumerate(iter_rows(rows)):
+        try:
+            records.append(coerce(row))
+        except (KeyError, TypeError, ValueError) as e:
+            raise ValueError(f"Linha {n}: {e!r}") from e
+
+    if foreign_key:
+        column, parent = foreign_key
+        missing = missing_ids(session, parent, (r[column] for r in records))
+        if missing:
+            sample = ", ".join(str(i) for i in sorted(missing)[:10])
+            raise ValueError(f"{column} inexistente em {parent.__tablename__}: {sample}")
+
+    table = model.__table__
+    ids = []
+    try:
+        for chunk in chunked(records, chunk_size):
+            if return_ids:
+                stmt = insert(table).returning(table.c.id, sort_by_parameter_order=True)
+                ids.extend(session.execute(stmt, chunk).scalars().all())
+            else:
+                session.execute(insert(table), chunk)
+        session.commit()
+    except Exception:
+        session.rollback()
+        raise
+    return ids if return_ids else len(records)
+
+def upsert_rows(session: Session, model: Type[SQLModel], records: List[dict]):
+    """
+    INSERT ... ON CONFLICT(id) DO UPDATE for a list of column dicts that carry their id.
+    Does not commit, so callers decide the transaction size.
+    """
+    if not records:
+        return
+    table = model.__table__
+    stmt = sqlite_insert(table)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=[table.c.id],
+        set_={c.name: stmt.excluded[c.name] for c in table.columns if c.name != "id"},
+    )
+    session.execute(stmt, records)
@@ -0,0 +1,144 @@
+import functools
+import os
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+from typing import Dict, Iterable, Iterator, Set
+
+import pandas as pd
+from sqlmodel import Session
+
+# In-process read cache for the service layer.
+#
+# Every table has a data version. Read functions decorated with @cached(tables)
+# are keyed by (function, arguments, database, versions of the tables they read);
+# write functions decorated with @invalidates(tables) bump those versions, so a
+# stale result can never be served, it just stops matching and ages out of the LRU.
+#
+# Only functions returning plain values (DataFrames, tuples, numbers, lists of
+# tuples) are cached: ORM instances are bound to the Session that loaded them.
+# Writes made outside the service layer (other processes, raw SQL) are not seen;
+# call clear_cache() after those.
+
+ALL_TABLES = ("clients", "processes", "phases", "payments", "expenses")
+
+_lock = threading.Lock()
+_versions: Dict[str, int] = {table: 0 for table in ALL_TABLES}
+_store: "OrderedDict[tuple, object]" = OrderedDict()
+_stats = {"hits": 0, "misses": 0, "evictions": 0}
+
+_enabled = os.environ.get("LEXFINANCE_CACHE", "1") != "0"
+_maxsize = int(os.environ.get("LEXFINANCE_CACHE_SIZE", "256"))
+
+def set_cache_enabled(enabled: bool):
+    global _enabled
+    _enabled = enabled
+    if not enabled:
+        clear_cache()
+
+def set_cache_size(maxsize: int):
+    global _maxsize
+    with _lock:
+        _maxsize = maxsize
+        _evict()
+
+def clear_cache():
+    with _lock:
+        _store.clear()
+
+_recording = threading.local()
+
+def bump(*tables: str):
+    with _lock:
+        for table in tables:
+            _versions[table] = _versions.get(table, 0) + 1
+    recorded = getattr(_recording, "tables", None)
+    if recorded is not None:
+        recorded.update(tables)
+
+@contextmanager
+def record_bumps() -> Iterator[Set[str]]:
+    """
+    Collects the tables bumped by this thread inside the block. For writes whose
+    commit comes after the service returns (database.unit_of_work, write_queue):
+    bumping them again once committed drops reads cached in between.
+    """
+    previous = getattr(_recording, "tables", None)
+    _recording.tables = tables = set()
+    try:
+        yield tables
+    finally:
+        _recording.tables = previous
+        if previous is not None:
+            previous.update(tables)
+
+def data_version(*tables: str) -> tuple:
+    with _lock:
+        return tuple(_versions.get(t, 0) for t in tables)
+
+def cache_stats() -> dict:
+    with _lock:
+        total = _stats["hits"] + _stats["misses"]
+        return {
+            **_stats,
+            "hit_rate": _stats["hits"] / total if total else 0.0,
+            "entries": len(_store),
+            "maxsize": _maxsize,
+            "enabled": _enabled,
+        }
+
+def _evict():
+    while len(_store) > _maxsize:
+        _store.popitem(last=False)
+        _stats["evictions"] += 1
+
+def _copy(value):
+    # DataFrames and lists are mutable; hand out copies so callers can't alter the cached one
+    if isinstance(value, (pd.DataFrame, list)):
+        return value.copy()
+    return value
+
+def cached(*tables: str):
+    """Caches a read function `f(session, *args, **kwargs)` until one of `tables` is written."""
+    def decorator(func):
+        name = f"{func.__module__}.{func.__qualname__}"
+
+        @functools.wraps(func)
+        def wrapper(session: Session, *args, **kwargs):
+            if not _enabled:
+                return func(session, *args, **kwargs)
+
+            # get_bind() is a Connection inside database.unit_of_work()
+            key = (name, str(session.get_bind().engine.url), args, tuple(sorted(kwargs.items())), data_version(*tables))
+            with _lock:
+                if key in _store:
+                    _store.move_to_end(key)
+                    _stats["hits"] += 1
+                    return _copy(_store[key])
+                _stats["misses"] += 1
+
+            result = func(session, *args, **kwargs)
+            with _lock:
+                _store[key] = _copy(result)
+                _evict()
+            return result
+
+        return wrapper
+    return decorator
+
+def invalidates(*tables: str):
+    """Bumps the version of `tables` after the decorated write function runs (even if it fails midway)."""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            try:
+                return func(*args, **kwargs)
+            finally:
+                bump(*tables)
+        return wrapper
+    return decorator
+
+def cascade(table: str) -> Iterable[str]:
+    # Tables touched when a row of `table` is deleted (ORM delete-orphan cascades in models.py)
+    order = ["clients", "processes", "phases", "payments"]
+    return tuple(order[order.index(table):]) if table in order else (table,)
@@ -1,11 +1,48 @@
-from typing import List, Optional
+from typing import List, Optional, Tuple, Union
+from sqlalchemy.orm import selectinload
 from sqlmodel import Session, select
-from models import Client
+from models import Client, Process, Phase
+from services.bulk import Rows, DEFAULT_CHUNK_SIZE, bulk_insert, optional_str
+from services.cache import cached, invalidates, cascade
+from services.pagination import Page, DEFAULT_PAGE_SIZE, keyset_page
+from services.search_service import match_query, matching_ids
 
 def get_all_clients(session: Session) -> List[Client]:
     statement = select(Client).order_by(Client.name)
     return session.exec(statement).all()
 
+def list_clients(session: Session, search: Optional[str] = None, cursor: Optional[tuple] = None,
+                 page_size: int = DEFAULT_PAGE_SIZE) -> Page:
+    """
+    One page of clients ordered by name. `search` goes through the full-text index
+    (words of the name or CPF/CNPJ, accents and punctuation ignored). Pass the
+    returned next_cursor to get the next page.
+    """
+    statement = select(Client)
+    if match_query(search):
+        statement = statement.where(Client.id.in_(matching_ids("client_search", search)))
+    return keyset_page(session, statement, (Client.name, Client.id), cursor, page_size)
+
+def get_client_report_graph(session: Session, client_id: int) -> Optional[Client]:
+    """
+    Client with its processes, their phases and the phases' payments loaded up
+    front (one SELECT per level via select-in loading), ready for
+    report_service.generate_client_report without lazy loads.
+    """
+    statement = (
+        select(Client)
+        .where(Client.id == client_id)
+        .options(selectinload(Client.processes).selectinload(Process.phases).selectinload(Phase.payments))
+    )
+    return session.exec(statement).first()
+
+@cached("clients")
+def get_client_options(session: Session) -> List[Tuple[int, str]]:
+    # (id, name) pairs for selectboxes, without loading full Client objects
+    statement = select(Client.id, Client.name).order_by(Client.name)
+    return [tuple(row) for row in session.exec(statement).all()]
+
+@invalidates("clients")
 def create_client(session: Session, name: str, cpf_cnpj: Optional[str], email: Optional[str], phone: Optional[str]) -> Client:
     client = Client(name=name, cpf_cnpj=cpf_cnpj, email=email, phone=phone)
     session.add(client)
@@ -13,6 +50,26 @@ def create_client(session: Session, name: str, cpf_cnpj: Optional[str], email: O
     session.refresh(client)
     return client
 
+def _client_record(row: dict) -> dict:
+    name = row["name"]
+    if not name or not str(name).strip():
+        raise ValueError("name vazio")
+    return {
+        "name": str(name),
+        "cpf_cnpj": optional_str(row.get("cpf_cnpj")),
+        "email": optional_str(row.get("email")),
+        "phone": optional_str(row.get("phone")),
+    }
+
+@invalidates("clients")
+def create_clients_bulk(session: Session, clients: Rows, chunk_size: int = DEFAULT_CHUNK_SIZE, return_ids: bool = False) -> Union[int, List[int]]:
+    """
+    Inserts many clients (DataFrame or iterable of dicts) in a single transaction.
+    Returns the number of rows, or the new ids when return_ids=True.
+    """
+    return bulk_insert(session, Client, clients, _client_record, None, chunk_size, return_ids)
+
+@invalidates("clients")
 def update_client(session: Session, client_id: int, **kwargs) -> Optional[Client]:
     client = session.get(Client, client_id)
     if not client:
@@ -25,6 +82,7 @@ def update_client(session: Session, client_id: int, **kwargs) -> Optional[Client
     session.refresh(client)
     return client
 
+@invalidates(*cascade("clients"))
 def delete_client(session: Session, client_id: int):
     client = session.get(Client, client_id)
     if client:
@@ -1,12 +1,37 @@
-from typing import List, Optional
+from datetime import date
+from typing import List, Optional, Union
+from sqlalchemy import union_all
 from sqlmodel import Session, select, func
-from models import Expense
+from models import Expense, MonthlyLedger
+from services.periods import period_column, period_expression, filter_date_range, filter_month_range, filter_full_months, filter_partial_months
+from services.bulk import Rows, DEFAULT_CHUNK_SIZE, bulk_insert, as_bool, as_iso_date
+from services.cache import cached, invalidates
+from services.money import to_reais
+from services.pagination import Page, DEFAULT_PAGE_SIZE, keyset_page, contains
 import pandas as pd
 
 def get_all_expenses(session: Session) -> List[Expense]:
     statement = select(Expense).order_by(Expense.date.desc())
     return session.exec(statement).all()
 
+def list_expenses(session: Session, search: Optional[str] = None, category: Optional[str] = None,
+                  paid: Optional[bool] = None, start: Optional[str] = None, end: Optional[str] = None,
+                  cursor: Optional[tuple] = None, page_size: int = DEFAULT_PAGE_SIZE) -> Page:
+    """
+    One page of expenses, newest first. `search` matches part of the description;
+    start/end are inclusive ISO dates.
+    """
+    statement = select(Expense)
+    if search and search.strip():
+        statement = statement.where(contains(Expense.description, search))
+    if category:
+        statement = statement.where(Expense.category == category)
+    if paid is not None:
+        statement = statement.where(Expense.paid == paid)
+    statement = filter_date_range(statement, Expense.date, start, end)
+    return keyset_page(session, statement, (Expense.date, Expense.id), cursor, page_size, descending=True)
+
+@invalidates("expenses")
 def create_expense(session: Session, description: str, amount_centavos: int, date: str, category: str = "Geral", paid: bool = True) -> Expense:
     expense = Expense(description=description, amount_centavos=amount_centavos, date=date, category=category, paid=paid)
     session.add(expense)
@@ -14,6 +39,30 @@ def create_expense(session: Session, description: str, amount_centavos: int, dat
     session.refresh(expense)
     return expense
 
+def _expense_record(row: dict) -> dict:
+    description = row["description"]
+    if not description:
+        raise ValueError("description vazia")
+    category = row.get("category")
+    paid = row.get("paid")
+    return {
+        "description": str(description),
+        "amount_centavos": int(row["amount_centavos"]),
+        "date": as_iso_date(row["date"]),
+        "category": "Geral" if category is None else str(category),
+        "paid": True if paid is None else as_bool(paid),
+    }
+
+@invalidates("expenses")
+def create_expenses_bulk(session: Session, expenses: Rows, chunk_size: int = DEFAULT_CHUNK_SIZE, return_ids: bool = False) -> Union[int, List[int]]:
+    """
+    Inserts many expenses (DataFrame or iterable of dicts with description,
+    amount_centavos, date and optional category/paid) in a single transaction.
+    Returns the number of rows, or the new ids when return_ids=True.
+    """
+    return bulk_insert(session, Expense, expenses, _expense_record, None, chunk_size, return_ids)
+
+@invalidates("expenses")
 def update_expense(session: Session, expense_id: int, **kwargs) -> Optional[Expense]:
     expense = session.get(Expense, expense_id)
     if not expense:
@@ -25,28 +74,106 @@ def update_expense(session: Session, expense_id: int, **kwargs) -> Optional[Expe
     session.refresh(expense)
     return expense
 
+@invalidates("expenses")
 def delete_expense(session: Session, expense_id: int):
     expense = session.get(Expense, expense_id)
     if expense:
         session.delete(expense)
         session.commit()
 
+@cached("expenses")
 def get_total_expenses(session: Session) -> int:
-    # Returns total paid expenses in centavos
-    statement = select(func.sum(Expense.amount_centavos)).where(Expense.paid == True)
+    # Returns total paid expenses in centavos (one row per month in the monthly_ledger rollup)
+    statement = select(func.sum(MonthlyLedger.expenses_paid_centavos))
     return session.exec(statement).one() or 0
 
-def get_expenses_by_month(session: Session) -> pd.DataFrame:
-    query = select(Expense.date, Expense.amount_centavos).where(Expense.paid == True)
-    data = session.exec(query).all()
-    
-    if not data:
-        return pd.DataFrame(columns=["mes", "Despesas"])
-        
-    df = pd.DataFrame(data, columns=["date", "amount_centavos"])
-    df["mes"] = df["date"].apply(lambda x: x[:7]) # YYYY-MM
-    
-    grouped = df.groupby("mes")["amount_centavos"].sum().reset_index()
-    grouped["Despesas"] = grouped["amount_centavos"] / 100.0
+@cached("expenses")
+def get_expenses_by_month(session: Session, start: Optional[str] = None, end: Optional[str] = None, granularity: str = "month") -> pd.DataFrame:
+    """
+    Paid expenses per period. Months, quarters and years are summed from the
+    monthly_ledger rollup for the months start/end cover entirely, and from expenses
+    for the days of a partly covered first or last month; days are grouped from
+    expenses. The bucket column is named after the granularity ("mes" for the
+    default month).
+    """
+    col = period_column(granularity)
+    if granularity == "day":
+        bucket = period_expression(Expense.date, granularity)
+        query = (
+            select(bucket, func.sum(Expense.amount_centavos))
+            .where(Expense.paid == True)
+            .group_by(bucket)
+            .order_by(bucket)
+        )
+        query = filter_date_range(query, Expense.date, start, end)
+    else:
+        ledger = select(MonthlyLedger.month.label("month"), MonthlyLedger.expenses_paid_centavos.label("paid"))
+        ledger = filter_full_months(ledger, MonthlyLedger.month, start, end)
+        edges = select(period_expression(Expense.date, "month"), Expense.amount_centavos).where(Expense.paid == True)
+        edges = filter_partial_months(edges, Expense.date, start, end)
+        stacked = union_all(ledger, edges).subquery()
+        bucket = period_expression(stacked.c.month, granularity)
+        total = func.sum(stacked.c.paid)
+        query = select(bucket, total).group_by(bucket).having(total != 0).order_by(bucket)
     
-    return grouped[["mes", "Despesas"]].sort_values("mes")
+    df = pd.DataFrame(session.exec(query).all(), columns=[col, "amount_centavos"])
+    df["Despesas"] = to_reais(df["amount_centavos"])
+    return df[[col, "Despesas"]]
+
+def get_recurring_expenses(session: Session, as_of: Optional[str] = None, lookback: int = 6,
+                           min_months: int = 4, tolerance: float = 0.2) -> pd.DataFrame:
+    """
+    Expenses that repeat every month (rent, software, ...), detected from history:
+    the same description (ignoring case, digits and punctuation, so "Aluguel 03/2025"
+    matches "Aluguel 04/2025") and category in at least `min_months` of the
+    `lookback` complete months before as_of (ISO date, default today), with monthly
+    totals within `tolerance` of their median. Columns: description, category,
+    amount_centavos (latest monthly total), months, last_month (latest YYYY-MM with
+    an entry, future-dated ones included).
+    """
+    return _recurring_expenses(session, (as_of or date.today().isoformat())[:7], lookback, min_months, tolerance)
+
+@cached("expenses")
+def _recurring_expenses(session: Session, current_month: str, lookback: int, min_months: int, tolerance: float) -> pd.DataFrame:
+    columns = ["description", "category", "amount_centavos", "months", "last_month"]
+    first_month = str(pd.Period(current_month, "M") - lookback)
+    month = period_expression(Expense.date, "month")
+    statement = (
+        select(Expense.description, Expense.category, month, func.sum(Expense.amount_centavos))
+        .where(Expense.date >= f"{first_month}-01")
+        .group_by(Expense.description, Expense.category, month)
+        .order_by(month)
+    )
+    df = pd.DataFrame(session.exec(statement).all(), columns=["description", "category", "month", "amount_centavos"])
+    df["key"] = df["description"].str.lower().str.replace(r"[\d\W_]+", " ", regex=True).str.strip()
+    df["category"] = df["category"].fillna("")
+    keys = ["key", "category"]
+    monthly = df.groupby(keys + ["month"], as_index=False).agg(
+        description=("description", "last"), amount_centavos=("amount_centavos", "sum"))
+    history = monthly[monthly["month"] < current_month]
+    if history.empty:
+        return pd.DataFrame(columns=columns)
+
+    stats = history.groupby(keys).agg(
+        description=("description", "last"),
+        amount_centavos=("amount_centavos", "last"),
+        months=("month", "size"),
+        low=("amount_centavos", "min"),
+        high=("amount_centavos", "max"),
+        median=("amount_centavos", "median"),
+    )
+    stats["last_month"] = monthly.groupby(keys)["month"].max()
+    steady = (stats["months"] >= min_months) & (stats["high"] - stats["low"] <= tolerance * stats["median"])
+    return stats[steady].reset_index()[columns]
+
+@cached("expenses")
+def get_scheduled_expenses(session: Session, start: str, end: str) -> pd.DataFrame:
+    """
+    Expenses already entered for a future range (pending or paid in advance), per
+    month from the monthly_ledger rollup: columns mes, amount_centavos. start/end
+    select whole months.
+    """
+    amount = MonthlyLedger.expenses_paid_centavos + MonthlyLedger.expenses_pending_centavos
+    statement = select(MonthlyLedger.month, amount).where(amount != 0).order_by(MonthlyLedger.month)
+    statement = filter_month_range(statement, MonthlyLedger.month, start, end)
+    return pd.DataFrame(session.exec(statement).all(), columns=["mes", "amount_centavos"])
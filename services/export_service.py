@@ -0,0 +1,171 @@
+import csv
+import gzip
+import hashlib
+import io
+import json
+import os
+import zipfile
+from contextlib import contextmanager
+from datetime import datetime
+from typing import BinaryIO, Callable, Union
+
+from sqlalchemy import Boolean, Integer
+from sqlmodel import Session
+
+from models import Client, Process, Phase, Payment, Expense
+
+# Same order as the import (parents first)
+EXPORT_TABLES = [Client, Process, Phase, Payment, Expense]
+
+EXPORT_FORMATS = {"csv": ".csv", "csv.gz": ".csv.gz", "parquet": ".parquet"}
+
+DEFAULT_EXPORT_CHUNK_SIZE = 10000
+MANIFEST_NAME = "manifest.json"
+
+class _HashingWriter(io.RawIOBase):
+    """Binary sink that forwards writes and keeps a running sha256 and byte count."""
+
+    def __init__(self, target: BinaryIO):
+        self.target = target
+        self.sha256 = hashlib.sha256()
+        self.bytes = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self.sha256.update(data)
+        self.bytes += len(data)
+        self.target.write(data)
+        return len(data)
+
+def _arrow_schema(table):
+    import pyarrow as pa
+    fields = []
+    for column in table.columns:
+        if isinstance(column.type, Boolean):
+            fields.append(pa.field(column.name, pa.bool_()))
+        elif isinstance(column.type, Integer):
+            fields.append(pa.field(column.name, pa.int64()))
+        else:
+            fields.append(pa.field(column.name, pa.string()))
+    return pa.schema(fields)
+
+def _write_table(cursor, table, fmt: str, sink: BinaryIO, chunk_size: int) -> int:
+    """Streams `SELECT <columns> FROM table` into sink in the given format; returns the row count."""
+    columns = [c.name for c in table.columns]
+    cursor.execute(f"SELECT {', '.join(columns)} FROM {table.name} ORDER BY id")
+    rows = 0
+
+    if fmt == "parquet":
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError as e:
+            raise RuntimeError("Exportar Parquet requer o pacote 'pyarrow'.") from e
+        schema = _arrow_schema(table)
+        bool_cols = [i for i, f in enumerate(schema) if f.type == pa.bool_()]
+        with pq.ParquetWriter(sink, schema) as writer:
+            while True:
+                chunk = cursor.fetchmany(chunk_size)
+                if not chunk:
+                    break
+                data = [list(col) for col in zip(*chunk)]
+                for i in bool_cols:
+                    data[i] = [None if v is None else bool(v) for v in data[i]]
+                writer.write_batch(pa.RecordBatch.from_arrays([pa.array(col, type=f.type) for col, f in zip(data, schema)], schema=schema))
+                rows += len(chunk)
+        return rows
+
+    raw = gzip.GzipFile(fileobj=sink, mode="wb") if fmt == "csv.gz" else sink
+    text = io.TextIOWrapper(raw, encoding="utf-8", newline="")
+    writer = csv.writer(text)
+    writer.writerow(columns)
+    while True:
+        chunk = cursor.fetchmany(chunk_size)
+        if not chunk:
+            break
+        writer.writerows(chunk)
+        rows += len(chunk)
+    text.flush()
+    text.detach()
+    if raw is not sink:
+        raw.close()
+    return rows
+
+def _export(session: Session, open_member: Callable[[str], BinaryIO], fmt: str, chunk_size: int) -> dict:
+    """
+    Writes every table through open_member(filename) from a single read transaction,
+    so all files describe the same instant even if the app writes meanwhile.
+    Returns the manifest (also written as manifest.json).
+    """
+    if fmt not in EXPORT_FORMATS:
+        raise ValueError(f"Formato inválido: {fmt!r} (use {', '.join(EXPORT_FORMATS)})")
+
+    manifest = {"created_at": datetime.now().isoformat(timespec="seconds"), "format": fmt, "tables": {}}
+
+    with session.get_bind().connect() as conn:
+        dbapi = conn.connection.driver_connection
+        cursor = dbapi.cursor()
+        # pysqlite does not open transactions for SELECTs, so start one explicitly:
+        # the first read pins the snapshot (WAL) or holds the shared lock (rollback journal)
+        cursor.execute("BEGIN")
+        try:
+            for model in EXPORT_TABLES:
+                table = model.__table__
+                filename = table.name + EXPORT_FORMATS[fmt]
+                with open_member(filename) as target:
+                    sink = _HashingWriter(target)
+                    rows = _write_table(cursor, table, fmt, sink, chunk_size)
+                manifest["tables"][table.name] = {
+                    "file": filename,
+                    "rows": rows,
+                    "bytes": sink.bytes,
+                    "sha256": sink.sha256.hexdigest(),
+                }
+        finally:
+            dbapi.rollback()
+            cursor.close()
+
+    with open_member(MANIFEST_NAME) as target:
+        target.write(json.dumps(manifest, indent=2, ensure_ascii=False).encode("utf-8"))
+    return manifest
+
+def export_backup(session: Session, directory: str = ".", fmt: str = "csv", chunk_size: int = DEFAULT_EXPORT_CHUNK_SIZE) -> dict:
+    """
+    Exports all tables to `directory` as <table>.csv / .csv.gz / .parquet plus manifest.json
+    (row counts, sizes and sha256 per file). Rows are streamed chunk_size at a time.
+    """
+    os.makedirs(directory, exist_ok=True)
+
+    def open_member(filename: str):
+        return open(os.path.join(directory, filename), "wb")
+
+    return _export(session, open_member, fmt, chunk_size)
+
+def export_backup_zip(session: Session, target: Union[str, BinaryIO], fmt: str = "csv", chunk_size: int = DEFAULT_EXPORT_CHUNK_SIZE) -> dict:
+    """
+    Same as export_backup, but writes every file (and the manifest) into a single zip,
+    given as a path or a writable binary stream.
+    """
+    with zipfile.ZipFile(target, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+
+        @contextmanager
+        def open_member(filename: str):
+            with zf.open(filename, "w", force_zip64=True) as member:
+                yield member
+
+        return _export(session, open_member, fmt, chunk_size)
+
+def verify_manifest(directory: str = ".") -> dict:
+    """Recomputes the sha256 of each file listed in manifest.json; returns {table: ok}."""
+    with open(os.path.join(directory, MANIFEST_NAME), encoding="utf-8") as f:
+        manifest = json.load(f)
+    result = {}
+    for table, entry in manifest["tables"].items():
+        digest = hashlib.sha256()
+        with open(os.path.join(directory, entry["file"]), "rb") as f:
+            for block in iter(lambda: f.read(1 << 20), b""):
+                digest.update(block)
+        result[table] = digest.hexdigest() == entry["sha256"]
+    return result
@@ -1,6 +1,13 @@
-from typing import List, Optional, Tuple
+from typing import List, Optional, Tuple, Union
+from sqlalchemy import case, literal, union_all
 from sqlmodel import Session, select, func
-from models import Payment, Phase, Process
+from models import Payment, Phase, Process, Client, Expense, PhaseTotal, ProcessTotal, ClientTotal, MonthlyLedger
+from services.periods import period_column, period_expression, filter_date_range, filter_full_months, filter_partial_months
+from services.bulk import Rows, DEFAULT_CHUNK_SIZE, bulk_insert, as_iso_date
+from services.cache import cached, invalidates
+from services.money import to_reais
+from services.pagination import contains
+from services.search_service import match_query, ranked_matches
 import pandas as pd
 
 # --- Payment Operations ---
@@ -10,6 +17,7 @@ def get_payments_by_process(session: Session, process_id: int) -> List[Tuple[Pay
     results = session.exec(statement).all()
     return results # Returns list of (Payment, Phase) tuples
 
+@invalidates("payments")
 def create_payment(session: Session, phase_id: int, amount_centavos: int, received_date: str) -> Payment:
     payment = Payment(phase_id=phase_id, amount_centavos=amount_centavos, received_date=received_date)
     session.add(payment)
@@ -17,6 +25,24 @@ def create_payment(session: Session, phase_id: int, amount_centavos: int, receiv
     session.refresh(payment)
     return payment
 
+def _payment_record(row: dict) -> dict:
+    return {
+        "phase_id": int(row["phase_id"]),
+        "amount_centavos": int(row["amount_centavos"]),
+        "received_date": as_iso_date(row["received_date"]),
+    }
+
+@invalidates("payments")
+def create_payments_bulk(session: Session, payments: Rows, chunk_size: int = DEFAULT_CHUNK_SIZE, return_ids: bool = False) -> Union[int, List[int]]:
+    """
+    Inserts many payments (DataFrame or iterable of dicts with phase_id,
+    amount_centavos, received_date) in a single transaction.
+    Raises ValueError before writing anything if a row is invalid or a phase does not exist.
+    Returns the number of rows, or the new ids when return_ids=True.
+    """
+    return bulk_insert(session, Payment, payments, _payment_record, ("phase_id", Phase), chunk_size, return_ids)
+
+@invalidates("payments")
 def update_payment(session: Session, payment_id: int, **kwargs) -> Optional[Payment]:
     payment = session.get(Payment, payment_id)
     if not payment:
@@ -28,6 +54,7 @@ def update_payment(session: Session, payment_id: int, **kwargs) -> Optional[Paym
     session.refresh(payment)
     return payment
 
+@invalidates("payments")
 def delete_payment(session: Session, payment_id: int):
     payment = session.get(Payment, payment_id)
     if payment:
@@ -35,48 +62,197 @@ def delete_payment(session: Session, payment_id: int):
         session.commit()
 
 # --- Financial Calculations ---
+def _financials(contracted: int, received: int) -> Tuple[int, int, int, float]:
+    balance = contracted - received
+    pct = (received / contracted) if contracted > 0 else 0.0
+    return contracted, received, balance, pct
+
+@cached("phases", "payments")
 def get_process_financials(session: Session, process_id: int) -> Tuple[int, int, int, float]:
     """
     Returns (total_contracted, total_received, balance, percentage_received)
-    All monetary values in centavos.
+    All monetary values in centavos. Read from the process_totals rollup.
     """
-    # Total Contracted
-    total_contracted = session.exec(
-        select(func.sum(Phase.value_centavos)).where(Phase.process_id == process_id)
-    ).one() or 0
-    
-    # Total Received
-    total_received = session.exec(
-        select(func.sum(Payment.amount_centavos))
-        .join(Phase)
+    totals = session.get(ProcessTotal, process_id)
+    if not totals:
+        return _financials(0, 0)
+    return _financials(totals.contracted_centavos, totals.received_centavos)
+
+@cached("processes", "phases", "payments")
+def get_client_financials(session: Session, client_id: int) -> Tuple[int, int, int, float]:
+    """Same as get_process_financials, summed over every process of the client (client_totals rollup)."""
+    totals = session.get(ClientTotal, client_id)
+    if not totals:
+        return _financials(0, 0)
+    return _financials(totals.contracted_centavos, totals.received_centavos)
+
+@cached("phases", "payments")
+def get_phase_financials(session: Session, process_id: int) -> pd.DataFrame:
+    """
+    One row per phase of the process, in id order, with the received total from
+    the phase_totals rollup. Columns: phase_id, description, condition,
+    value_centavos, received_centavos, balance_centavos.
+    """
+    statement = (
+        select(Phase.id, Phase.description, Phase.condition, Phase.value_centavos,
+               func.coalesce(PhaseTotal.received_centavos, 0))
+        .outerjoin(PhaseTotal, PhaseTotal.phase_id == Phase.id)
         .where(Phase.process_id == process_id)
-    ).one() or 0
-    
-    balance = total_contracted - total_received
-    pct = (total_received / total_contracted) if total_contracted > 0 else 0.0
-    
-    return total_contracted, total_received, balance, pct
+        .order_by(Phase.id)
+    )
+    columns = ["phase_id", "description", "condition", "value_centavos", "received_centavos"]
+    df = pd.DataFrame(session.exec(statement).all(), columns=columns)
+    df["balance_centavos"] = df["value_centavos"] - df["received_centavos"]
+    return df
 
-def get_firm_revenue_by_month(session: Session) -> pd.DataFrame:
-    # Using pandas for aggregation as in original app, but fetching raw data first or using SQL
-    # SQLModel doesn't support complex date functions across all DBs easily, but SQLite has substr
+@cached("clients", "processes", "phases", "payments")
+def get_portfolio_financials(session: Session, responsible: Optional[str] = None, status: Optional[str] = None, client_id: Optional[int] = None,
+                             search: Optional[str] = None) -> pd.DataFrame:
+    """
+    Same figures as get_process_financials, but for every process at once: one
+    lookup per process in the process_totals rollup, joined to the client rows.
+    Columns: process_id, client_id, client_name, title, responsible, status,
+    total_contracted, total_received, balance (centavos) and pct (0..1).
+    With `search` only processes matching it in the full-text index are kept,
+    best match first.
+    """
+    statement = (
+        select(
+            Process.id,
+            Process.client_id,
+            Client.name,
+            Process.title,
+            Process.responsible,
+            Process.status,
+            func.coalesce(ProcessTotal.contracted_centavos, 0),
+            func.coalesce(ProcessTotal.received_centavos, 0),
+        )
+        .outerjoin(Client, Client.id == Process.client_id)
+        .outerjoin(ProcessTotal, ProcessTotal.process_id == Process.id)
+        .order_by(Client.name, Process.title)
+    )
+    # Responsible keeps the case-insensitive substring match used by the Relatórios page
+    if responsible:
+        statement = statement.where(contains(Process.responsible, responsible))
+    if status:
+        statement = statement.where(Process.status == status)
+    if client_id is not None:
+        statement = statement.where(Process.client_id == client_id)
+    if match_query(search):
+        ranked = ranked_matches("process_search", search)
+        statement = statement.join(ranked, ranked.c.rowid == Process.id).order_by(None).order_by(ranked.c.rank, Client.name, Process.title)
+
+    columns = ["process_id", "client_id", "client_name", "title", "responsible", "status", "total_contracted", "total_received"]
+    df = pd.DataFrame(session.exec(statement).all(), columns=columns)
+
+    df["client_name"] = df["client_name"].fillna("N/A")
+    df["balance"] = df["total_contracted"] - df["total_received"]
+    df["pct"] = (df["total_received"] / df["total_contracted"].where(df["total_contracted"] > 0)).fillna(0.0)
+    return df
+
+@cached("payments")
+def get_firm_revenue_by_month(session: Session, start: Optional[str] = None, end: Optional[str] = None, granularity: str = "month") -> pd.DataFrame:
+    """
+    Received payments per period. Months, quarters and years are summed from the
+    monthly_ledger rollup for the months start/end cover entirely, and from payments
+    for the days of a partly covered first or last month; days are grouped from
+    payments. The bucket column is named after the granularity ("mes" for the
+    default month).
+    """
+    col = period_column(granularity)
+    if granularity == "day":
+        bucket = period_expression(Payment.received_date, granularity)
+        query = select(bucket, func.sum(Payment.amount_centavos)).group_by(bucket).order_by(bucket)
+        query = filter_date_range(query, Payment.received_date, start, end)
+    else:
+        ledger = select(MonthlyLedger.month.label("month"), MonthlyLedger.received_centavos.label("received"))
+        ledger = filter_full_months(ledger, MonthlyLedger.month, start, end)
+        edges = select(period_expression(Payment.received_date, "month"), Payment.amount_centavos)
+        edges = filter_partial_months(edges, Payment.received_date, start, end)
+        stacked = union_all(ledger, edges).subquery()
+        bucket = period_expression(stacked.c.month, granularity)
+        total = func.sum(stacked.c.received)
+        query = select(bucket, total).group_by(bucket).having(total != 0).order_by(bucket)
     
-    query = select(Payment.received_date, Payment.amount_centavos)
-    data = session.exec(query).all()
+    df = pd.DataFrame(session.exec(query).all(), columns=[col, "amount_centavos"])
+    df["Recebido"] = to_reais(df["amount_centavos"])
+    return df[[col, "Recebido"]]
+
+@cached("payments", "expenses")
+def get_cash_flow(session: Session, start: Optional[str] = None, end: Optional[str] = None, granularity: str = "month") -> pd.DataFrame:
+    """
+    Revenue (payments), paid and pending expenses per period in a single query.
+    Months, quarters and years are summed from the monthly_ledger rollup, so the cost
+    follows the number of months, not of rows; only a first or last month that
+    start/end cover in part is read from payments and expenses, for the days in
+    range. Days are grouped from payments and expenses, stacked with UNION ALL.
+    Columns: <bucket>, Recebido, Despesas, A pagar, Saldo (reais).
+    """
+    col = period_column(granularity)
     
-    if not data:
-        return pd.DataFrame(columns=["mes", "Recebido"])
-        
-    df = pd.DataFrame(data, columns=["received_date", "amount_centavos"])
-    df["mes"] = df["received_date"].apply(lambda x: x[:7]) # YYYY-MM
+    if granularity == "day":
+        query = _daily_cash_flow(start, end)
+    else:
+        query = _ledger_cash_flow(start, end, granularity)
     
-    grouped = df.groupby("mes")["amount_centavos"].sum().reset_index()
-    grouped["Recebido"] = grouped["amount_centavos"] / 100.0
+    df = pd.DataFrame(session.exec(query).all(), columns=[col, "received", "expenses", "pending"])
+    df["Recebido"] = to_reais(df["received"])
+    df["Despesas"] = to_reais(df["expenses"])
+    df["A pagar"] = to_reais(df["pending"])
+    df["Saldo"] = df["Recebido"] - df["Despesas"]
+    return df[[col, "Recebido", "Despesas", "A pagar", "Saldo"]]
+
+def _ledger_cash_flow(start: Optional[str], end: Optional[str], granularity: str):
+    ledger = select(
+        MonthlyLedger.month.label("bucket"),
+        MonthlyLedger.received_centavos.label("received"),
+        MonthlyLedger.expenses_paid_centavos.label("expenses"),
+        MonthlyLedger.expenses_pending_centavos.label("pending"),
+    )
+    ledger = filter_full_months(ledger, MonthlyLedger.month, start, end)
+    # Months start/end cover only in part: their days in range, from the rows
+    revenue, expenses = _cash_flow_rows(start, end, "month", filter_partial_months)
+    stacked = union_all(ledger, revenue, expenses).subquery()
+    bucket = period_expression(stacked.c.bucket, granularity)
+    return (
+        select(bucket, func.sum(stacked.c.received), func.sum(stacked.c.expenses), func.sum(stacked.c.pending))
+        .group_by(bucket)
+        .order_by(bucket)
+    )
+
+def _daily_cash_flow(start: Optional[str], end: Optional[str]):
+    stacked = union_all(*_cash_flow_rows(start, end, "day", filter_date_range)).subquery()
+    return (
+        select(stacked.c.bucket, func.sum(stacked.c.received), func.sum(stacked.c.expenses), func.sum(stacked.c.pending))
+        .group_by(stacked.c.bucket)
+        .order_by(stacked.c.bucket)
+    )
+
+def _cash_flow_rows(start: Optional[str], end: Optional[str], granularity: str, date_filter):
+    # (revenue, expenses) per `granularity` bucket, with the columns of the stacked cash flow
+    rec_bucket = period_expression(Payment.received_date, granularity)
+    revenue = select(
+        rec_bucket.label("bucket"),
+        func.sum(Payment.amount_centavos).label("received"),
+        literal(0).label("expenses"),
+        literal(0).label("pending"),
+    ).group_by(rec_bucket)
+    revenue = date_filter(revenue, Payment.received_date, start, end)
     
-    return grouped[["mes", "Recebido"]].sort_values("mes")
+    exp_bucket = period_expression(Expense.date, granularity)
+    expenses = select(
+        exp_bucket.label("bucket"),
+        literal(0).label("received"),
+        func.sum(case((Expense.paid == True, Expense.amount_centavos), else_=0)).label("expenses"),
+        func.sum(case((Expense.paid == True, 0), else_=Expense.amount_centavos)).label("pending"),
+    ).group_by(exp_bucket)
+    expenses = date_filter(expenses, Expense.date, start, end)
+    return revenue, expenses
 
+@cached("phases", "payments")
 def get_global_financials(session: Session) -> Tuple[int, int, int]:
-    total_contracted = session.exec(select(func.sum(Phase.value_centavos))).one() or 0
-    total_received = session.exec(select(func.sum(Payment.amount_centavos))).one() or 0
+    # Summed over the client_totals rollup (one row per client)
+    total_contracted = session.exec(select(func.sum(ClientTotal.contracted_centavos))).one() or 0
+    total_received = session.exec(select(func.sum(ClientTotal.received_centavos))).one() or 0
     balance = total_contracted - total_received
     return total_contracted, total_received, balance
@@ -0,0 +1,205 @@
+from datetime import date
+from typing import Optional, Tuple
+
+import numpy as np
+import pandas as pd
+from sqlalchemy import Integer, cast, literal, null, union_all
+from sqlmodel import Session, select, func
+
+from models import Phase, Payment, PhaseTotal, PhasePaymentDates
+from services import expense_service
+from services.receivables_service import late_payments, paid_date_as_of
+from services.cache import cached
+from services.money import to_reais
+
+# Cash-flow forecast: expected receipts from open phase balances plus recurring and
+# already scheduled expenses, month by month.
+#
+# Receipts follow the payment history of each phase condition ("Entrada", "Êxito",
+# ...). Time is counted in months since the process started (its first payment, as
+# in the aging report). For every condition and month of age the history gives a
+# collection rate: the share of the value still open at that age that was paid in
+# that month, over the phases old enough to have been observed there. An open
+# balance is then rolled forward through the rates from its current age.
+#
+# Conditions with too little history at some age use the rate of all conditions
+# together. Conditions that never get a rate of their own (fewer than MIN_PHASES
+# started phases), and any beyond the MAX_CONDITIONS largest, only count towards
+# that pooled rate, so the arrays stay small however messy the condition text is.
+#
+# Processes without any payment have no start (phases carry no dates), so their
+# balances are not projected; neither are balances more than MAX_AGE months past the
+# start. Payments after as_of are left out of balances and starts, as in the aging
+# report, so a past as_of forecasts from what was known then.
+
+MAX_AGE = 120
+MIN_PHASES = 20  # phases observed at an age before a condition gets its own rate
+MAX_CONDITIONS = 50  # conditions with rates of their own, largest first
+NO_CONDITION = "(sem condição)"
+
+def _month_number(column):
+    """SQL: months since year 0 for an ISO date column, so differences are ages in months."""
+    return cast(func.substr(column, 1, 4), Integer) * 12 + cast(func.substr(column, 6, 2), Integer) - 1
+
+def _phases_with_start(as_of: str):
+    """CTE: every phase with its condition, value, open balance and the month its process started (or NULL), at as_of."""
+    late = late_payments(as_of)
+    first_paid = paid_date_as_of(func.min, PhasePaymentDates.first_paid_date, late, as_of)
+    started = func.min(first_paid).over(partition_by=Phase.process_id)
+    received = func.coalesce(PhaseTotal.received_centavos, 0) - func.coalesce(late.c.amount, 0)
+    return (
+        select(
+            Phase.id.label("phase_id"),
+            func.coalesce(func.nullif(func.trim(Phase.condition), ""), NO_CONDITION).label("condition"),
+            Phase.value_centavos.label("value"),
+            (Phase.value_centavos - received).label("balance"),
+            _month_number(started).label("start"),
+        )
+        .outerjoin(PhaseTotal, PhaseTotal.phase_id == Phase.id)
+        .outerjoin(PhasePaymentDates, PhasePaymentDates.phase_id == Phase.id)
+        .outerjoin(late, late.c.phase_id == Phase.id)
+        .cte("phase_starts")
+    )
+
+def _history(session: Session, as_of: str) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    One round trip, two groupings over the same phase scan (stacked with UNION ALL):
+    phases per (condition, age in months) with their value and open balance, and
+    payments up to as_of per (condition, age, months after the start). Ages are
+    capped at MAX_AGE; phases of processes that have not started have age NULL.
+    """
+    phases = _phases_with_start(as_of)
+    age = func.min(_month_number(literal(as_of)) - phases.c.start, MAX_AGE)
+    lag = func.min(_month_number(Payment.received_date) - phases.c.start, MAX_AGE)
+    exposure = (
+        select(phases.c.condition, age, null(), func.count(), func.sum(phases.c.value),
+               func.sum(func.max(phases.c.balance, 0)), literal(0))
+        .group_by(phases.c.condition, age)
+    )
+    paid = (
+        select(phases.c.condition, age, lag, literal(0), literal(0), literal(0), func.sum(Payment.amount_centavos))
+        .join(Payment, Payment.phase_id == phases.c.phase_id)
+        .where(phases.c.start.is_not(None), Payment.received_date <= as_of)
+        .group_by(phases.c.condition, age, lag)
+    )
+    df = pd.DataFrame(session.exec(union_all(exposure, paid)).all(),
+                      columns=["condition", "age", "lag", "phases", "value", "balance", "amount"])
+    is_paid = df["lag"].notna()
+    return df[~is_paid].drop(columns=["lag", "amount"]), df[is_paid][["condition", "age", "lag", "amount"]]
+
+def _rated_conditions(exposure: pd.DataFrame) -> list:
+    """Conditions with at least MIN_PHASES started phases (the most, up to MAX_CONDITIONS), sorted."""
+    started = exposure[exposure["age"].notna() & (exposure["age"] >= 0)]
+    phases = started.groupby("condition")["phases"].sum()
+    phases = phases[phases >= MIN_PHASES].sort_values(ascending=False, kind="stable")
+    return sorted(phases.index[:MAX_CONDITIONS])
+
+def _condition_rows(values: pd.Series, conditions: list) -> np.ndarray:
+    # Row of each condition in the rates array; the others go to the pooled (last) row
+    code = {name: i for i, name in enumerate(conditions)}
+    return values.map(code).fillna(len(conditions)).to_numpy(dtype=int)
+
+def _collection_rates(exposure: pd.DataFrame, paid: pd.DataFrame, conditions: list) -> np.ndarray:
+    """
+    (len(conditions) + 1, MAX_AGE) array of monthly collection rates; the last row
+    pools every condition, including those not in `conditions`.
+    """
+    n, size = len(conditions) + 1, MAX_AGE + 1
+
+    value = np.zeros((n, size))
+    count = np.zeros((n, size))
+    started = exposure[exposure["age"].notna() & (exposure["age"] >= 0)]
+    rows = _condition_rows(started["condition"], conditions)
+    ages = started["age"].to_numpy(dtype=int)
+    np.add.at(value, (rows, ages), started["value"].to_numpy(dtype=float))
+    np.add.at(count, (rows, ages), started["phases"].to_numpy(dtype=float))
+
+    # amount[c, lag, age]: paid `lag` months after the start on phases now `age` months old
+    amount = np.zeros((n, size, size))
+    paid = paid[(paid["lag"] >= 0) & (paid["age"] >= 0)]
+    np.add.at(amount, (_condition_rows(paid["condition"], conditions), paid["lag"].to_numpy(dtype=int), paid["age"].to_numpy(dtype=int)),
+              paid["amount"].to_numpy(dtype=float))
+
+    for array in (value, count, amount):
+        array[-1] += array[:-1].sum(axis=0)
+
+    # Observed at month m: phases at least m months old (suffix sums over age)
+    value_from = value[:, ::-1].cumsum(axis=1)[:, ::-1]
+    count_from = count[:, ::-1].cumsum(axis=1)[:, ::-1]
+    amount_from = amount[:, :, ::-1].cumsum(axis=2)[:, :, ::-1]  # [c, lag, m]: paid at lag by phases aged >= m
+    paid_in = np.diagonal(amount_from, axis1=1, axis2=2)  # paid in month m
+    paid_before = np.diagonal(amount_from.cumsum(axis=1) - amount_from, axis1=1, axis2=2)
+    still_open = value_from - paid_before
+
+    with np.errstate(divide="ignore", invalid="ignore"):
+        rates = np.where(still_open > 0, paid_in / still_open, 0.0)
+    rates = np.clip(rates, 0.0, 1.0)
+    rates = np.where(count_from >= MIN_PHASES, rates, rates[-1])
+    rates[:, MAX_AGE] = 0.0  # the capped bin mixes many months
+    return rates
+
+def _expected_receipts(exposure: pd.DataFrame, rates: np.ndarray, conditions: list, months: int) -> np.ndarray:
+    """Expected receipts in each of the next `months` months, summed over all open balances."""
+    open_ = exposure[(exposure["balance"] > 0) & exposure["age"].notna()]
+    rows = _condition_rows(open_["condition"], conditions)
+    ages = open_["age"].clip(lower=0).to_numpy(dtype=int)
+    ahead = ages[:, None] + np.arange(1, months + 1)
+    rate = np.where(ahead < MAX_AGE, rates[rows[:, None], np.clip(ahead, 0, MAX_AGE)], 0.0)
+    # Paid in month k: still open after months 1..k-1, then collected at month k's rate
+    open_before = np.cumprod(np.hstack([np.ones((len(rate), 1)), 1 - rate[:, :-1]]), axis=1)
+    return (open_["balance"].to_numpy(dtype=float)[:, None] * rate * open_before).sum(axis=0)
+
+def get_cash_flow_forecast(session: Session, months: int = 12, as_of: Optional[str] = None) -> pd.DataFrame:
+    """
+    Forward cash flow for the `months` months after as_of (ISO date, default today).
+    Columns: mes (YYYY-MM), inflow (expected receipts), recurring (recurring expenses
+    not yet entered for that month), scheduled (expenses already entered for it),
+    net and cumulative (running net), all in centavos.
+    """
+    if months < 1:
+        raise ValueError(f"Horizonte inválido: {months} (mínimo 1 mês)")
+    return _cash_flow_forecast(session, months, as_of or date.today().isoformat())
+
+@cached("processes", "phases", "payments", "expenses")
+def _cash_flow_forecast(session: Session, months: int, as_of: str) -> pd.DataFrame:
+    labels = [str(p) for p in pd.period_range(pd.Period(as_of[:7], "M") + 1, periods=months, freq="M")]
+    df = pd.DataFrame({"mes": labels})
+
+    exposure, paid = _history(session, as_of)
+    if exposure.empty:
+        df["inflow"] = 0
+    else:
+        conditions = _rated_conditions(exposure)
+        rates = _collection_rates(exposure, paid, conditions)
+        df["inflow"] = np.rint(_expected_receipts(exposure, rates, conditions, months)).astype(np.int64)
+
+    # Recurring bills count from the month after their latest entry
+    recurring = expense_service.get_recurring_expenses(session, as_of)
+    month_index = np.array(labels)
+    df["recurring"] = (
+        (month_index[:, None] > recurring["last_month"].to_numpy(dtype=str)[None, :])
+        * recurring["amount_centavos"].to_numpy(dtype=np.int64)[None, :]
+    ).sum(axis=1) if not recurring.empty else 0
+
+    scheduled = expense_service.get_scheduled_expenses(session, f"{labels[0]}-01", f"{labels[-1]}-31")
+    df["scheduled"] = df["mes"].map(scheduled.set_index("mes")["amount_centavos"]).fillna(0).astype(np.int64)
+
+    df["net"] = df["inflow"] - df["recurring"] - df["scheduled"]
+    df["cumulative"] = df["net"].cumsum()
+    return df
+
+FORECAST_LABELS = {
+    "mes": "Mês",
+    "inflow": "Receita prevista",
+    "recurring": "Despesas recorrentes",
+    "scheduled": "Despesas lançadas",
+    "net": "Saldo",
+    "cumulative": "Saldo acumulado",
+}
+
+def forecast_table(df: pd.DataFrame) -> pd.DataFrame:
+    """get_cash_flow_forecast result with Portuguese headers and amounts in reais, for display."""
+    out = df.rename(columns=FORECAST_LABELS)
+    amounts = [label for column, label in FORECAST_LABELS.items() if column != "mes"]
+    out[amounts] = to_reais(out[amounts])
+    return out
@@ -0,0 +1,140 @@
+import os
+import time
+from typing import Callable, Iterator, List, Optional
+
+import pandas as pd
+from sqlmodel import Session
+
+from models import Client, Process, Phase, Payment, Expense
+from services.bulk import iter_rows, missing_ids, upsert_rows
+from services.cache import bump
+from services.client_service import _client_record
+from services.process_service import _process_record, _phase_record
+from services.finance_service import _payment_record
+from services.expense_service import _expense_record
+
+# Dependency order: every table only references tables listed before it.
+# Each entry: (table name / file stem, model, row coercion, (fk column, parent model) or None)
+IMPORT_ORDER = [
+    ("clients", Client, _client_record, None),
+    ("processes", Process, _process_record, ("client_id", Client)),
+    ("phases", Phase, _phase_record, ("process_id", Process)),
+    ("payments", Payment, _payment_record, ("phase_id", Phase)),
+    ("expenses", Expense, _expense_record, None),
+]
+
+FILE_EXTENSIONS = [".csv", ".csv.gz", ".parquet"]
+
+DEFAULT_IMPORT_CHUNK_SIZE = 50000
+MAX_REJECTED_SAMPLES = 100
+
+def read_chunks(path: str, chunk_size: int = DEFAULT_IMPORT_CHUNK_SIZE) -> Iterator[pd.DataFrame]:
+    """
+    Streams a CSV (optionally gzip) or Parquet file as DataFrames of at most chunk_size rows.
+    CSV columns are read as text so identifiers like CPF keep their leading zeros.
+    """
+    if path.endswith(".parquet"):
+        try:
+            import pyarrow.parquet as pq
+        except ImportError as e:
+            raise RuntimeError("Importar Parquet requer o pacote 'pyarrow'.") from e
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunk_size):
+            yield batch.to_pandas()
+    else:
+        yield from pd.read_csv(path, chunksize=chunk_size, dtype=str, keep_default_na=False, na_values=[""])
+
+def find_backup_file(directory: str, table: str) -> Optional[str]:
+    for ext in FILE_EXTENSIONS:
+        path = os.path.join(directory, table + ext)
+        if os.path.exists(path):
+            return path
+    return None
+
+def import_file(session: Session, table: str, path: str, chunk_size: int = DEFAULT_IMPORT_CHUNK_SIZE) -> dict:
+    """
+    Upserts one backup file into its table, one transaction per chunk.
+    Rows with invalid values or a missing parent are skipped and reported; the rest
+    of the chunk is still imported. Memory use is bounded by chunk_size.
+    Returns a dict with table, file, read, imported, rejected, seconds, rows_per_sec
+    and errors (up to MAX_REJECTED_SAMPLES (row number, reason) pairs, 1-based).
+    """
+    _, model, coerce, foreign_key = next(entry for entry in IMPORT_ORDER if entry[0] == table)
+    report = {"table": table, "file": path, "read": 0, "imported": 0, "rejected": 0, "errors": []}
+
+    def reject(row_number: int, reason: str):
+        report["rejected"] += 1
+        if len(report["errors"]) < MAX_REJECTED_SAMPLES:
+            report["errors"].append((row_number, reason))
+
+    t0 = time.perf_counter()
+    try:
+        for chunk in read_chunks(path, chunk_size):
+            offset = report["read"]
+            report["read"] += len(chunk)
+
+            records = []
+            for n, row in enumerate(iter_rows(chunk), start=offset + 1):
+                try:
+                    record = coerce(row)
+                    record["id"] = None if row.get("id") is None else int(row["id"])
+                except (KeyError, TypeError, ValueError) as e:
+                    reject(n, f"valor inválido: {e!r}")
+                    continue
+                records.append((n, record))
+
+            if foreign_key:
+                column, parent = foreign_key
+                missing = missing_ids(session, parent, (r[column] for _, r in records))
+                if missing:
+                    kept = []
+                    for n, record in records:
+                        if record[column] in missing:
+                            reject(n, f"{column}={record[column]} inexistente em {parent.__tablename__}")
+                        else:
+                            kept.append((n, record))
+                    records = kept
+
+            try:
+                upsert_rows(session, model, [r for _, r in records])
+                session.commit()
+            except Exception:
+                session.rollback()
+                raise
+            report["imported"] += len(records)
+    finally:
+        # Even a partial import changed the table
+        bump(table)
+
+    report["seconds"] = time.perf_counter() - t0
+    report["rows_per_sec"] = report["read"] / report["seconds"] if report["seconds"] > 0 else 0.0
+    return report
+
+def import_backup(session: Session, directory: str = ".", chunk_size: int = DEFAULT_IMPORT_CHUNK_SIZE,
+                  progress: Optional[Callable[[dict], None]] = None) -> List[dict]:
+    """
+    Restores the backup files found in `directory` (clients, processes, phases,
+    payments and expenses as .csv, .csv.gz or .parquet) in dependency order.
+    Missing files are skipped. `progress` is called with each file report as it finishes.
+    """
+    reports = []
+    for table, _, _, _ in IMPORT_ORDER:
+        path = find_backup_file(directory, table)
+        if path is None:
+            continue
+        report = import_file(session, table, path, chunk_size)
+        reports.append(report)
+        if progress:
+            progress(report)
+    return reports
+
+def import_summary(reports: List[dict]) -> pd.DataFrame:
+    # One display row per imported file
+    return pd.DataFrame([{
+        "Tabela": r["table"],
+        "Arquivo": r["file"],
+        "Lidas": r["read"],
+        "Importadas": r["imported"],
+        "Rejeitadas": r["rejected"],
+        "Tempo (s)": round(r["seconds"], 2),
+        "Linhas/s": round(r["rows_per_sec"]),
+    } for r in reports])
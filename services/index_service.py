@@ -0,0 +1,23 @@
+from typing import List
+
+from sqlmodel import SQLModel
+
+def migrate_indexes(bind) -> List[str]:
+    """
+    Creates any index declared in models.py that is missing from an existing database.
+    create_all only creates indexes together with new tables, so older lexfinance.db
+    files (and snapshots restored from them) need this step. Idempotent: returns the
+    names of the indexes created now.
+    """
+    created = []
+    with bind.begin() as conn:
+        existing = {row[0] for row in conn.exec_driver_sql("SELECT name FROM sqlite_master WHERE type = 'index'")}
+        for table in SQLModel.metadata.sorted_tables:
+            for index in table.indexes:
+                if index.name not in existing:
+                    index.create(conn)
+                    created.append(index.name)
+        if created:
+            # Refresh planner statistics so the new indexes are actually picked
+            conn.exec_driver_sql("ANALYZE")
+    return created
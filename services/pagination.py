@@ -0,0 +1,42 @@
+from typing import NamedTuple, Optional, Sequence
+
+from sqlalchemy import tuple_
+from sqlmodel import Session, func
+
+# Keyset ("seek") pagination: instead of OFFSET, each page starts right after the
+# sort key of the previous page's last row, so page N costs the same as page 1
+# and rows inserted meanwhile don't shift the pages. The sort key must be unique,
+# so it always ends with the primary key.
+
+DEFAULT_PAGE_SIZE = 50
+
+class Page(NamedTuple):
+    items: list
+    total: int                      # rows matching the filters, across all pages
+    next_cursor: Optional[tuple]    # pass back to fetch the following page; None on the last one
+
+def keyset_page(session: Session, statement, order_by: Sequence, cursor: Optional[tuple] = None,
+                page_size: int = DEFAULT_PAGE_SIZE, descending: bool = False, options: Sequence = ()) -> Page:
+    """
+    Runs `statement` (a filtered select of one entity, without ORDER BY) for one page.
+    `order_by` are the entity attributes of the sort key, e.g. (Client.name, Client.id);
+    `cursor` is the key of the last row already shown. Loader `options` are applied
+    to the page query only, not to the count.
+    """
+    total = session.exec(statement.with_only_columns(func.count(), maintain_column_froms=True)).one()
+
+    key = tuple_(*order_by)
+    if cursor is not None:
+        statement = statement.where(key < tuple_(*cursor) if descending else key > tuple_(*cursor))
+    statement = statement.order_by(*(column.desc() if descending else column for column in order_by))
+    rows = session.exec(statement.options(*options).limit(page_size + 1)).all()
+
+    items = list(rows[:page_size])
+    next_cursor = None
+    if len(rows) > page_size:
+        next_cursor = tuple(getattr(items[-1], column.key) for column in order_by)
+    return Page(items, total, next_cursor)
+
+def contains(column, text: str):
+    # Case-insensitive substring match; % and _ in the text are literal, not LIKE wildcards
+    return func.lower(column).contains(text.strip().lower(), autoescape=True)
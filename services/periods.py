@@ -0,0 +1,97 @@
+import calendar
+from typing import List, Optional, Tuple
+from sqlalchemy import Integer, String, and_, cast, false, or_
+from sqlmodel import func
+
+# Granularity -> name of the bucket column in the returned DataFrames
+PERIOD_COLUMNS = {
+    "day": "dia",
+    "month": "mes",
+    "quarter": "trimestre",
+    "year": "ano",
+}
+
+def period_column(granularity: str) -> str:
+    if granularity not in PERIOD_COLUMNS:
+        raise ValueError(f"Granularidade inválida: {granularity!r} (use {', '.join(PERIOD_COLUMNS)})")
+    return PERIOD_COLUMNS[granularity]
+
+def period_expression(column, granularity: str = "month"):
+    """
+    SQL expression that truncates an ISO date column (YYYY-MM-DD) to its bucket label:
+    day -> YYYY-MM-DD, month -> YYYY-MM, quarter -> YYYY-T1..T4, year -> YYYY.
+    Labels sort chronologically as plain strings.
+    """
+    period_column(granularity)
+    if granularity == "day":
+        return func.substr(column, 1, 10)
+    if granularity == "month":
+        return func.substr(column, 1, 7)
+    if granularity == "year":
+        return func.substr(column, 1, 4)
+    quarter = (cast(func.substr(column, 6, 2), Integer) + 2) // 3
+    return func.substr(column, 1, 4).op("||")("-T").op("||")(cast(quarter, String))
+
+def filter_date_range(statement, column, start: Optional[str] = None, end: Optional[str] = None):
+    # Bounds are inclusive ISO dates; date objects are accepted too (str(date) is ISO)
+    if start:
+        statement = statement.where(column >= str(start))
+    if end:
+        statement = statement.where(column <= str(end))
+    return statement
+
+def filter_month_range(statement, column, start: Optional[str] = None, end: Optional[str] = None):
+    # For YYYY-MM columns (monthly_ledger): every month the inclusive ISO range touches
+    if start:
+        statement = statement.where(column >= str(start)[:7])
+    if end:
+        statement = statement.where(column <= str(end)[:7])
+    return statement
+
+def _last_day(month: str) -> str:
+    # YYYY-MM -> its last ISO date
+    year, number = int(month[:4]), int(month[5:7])
+    return f"{month}-{calendar.monthrange(year, number)[1]:02d}"
+
+def _shift_month(month: str, delta: int) -> str:
+    index = int(month[:4]) * 12 + int(month[5:7]) - 1 + delta
+    return f"{index // 12:04d}-{index % 12 + 1:02d}"
+
+def split_month_range(start: Optional[str] = None, end: Optional[str] = None) -> Tuple[Optional[str], Optional[str], List[Tuple[str, str]]]:
+    """
+    Splits an inclusive ISO date range for month-level rollups into the first and
+    last months it covers entirely (None = unbounded; first > last when there are
+    none) and the date ranges of the months it covers only in part, at either end,
+    which have to be read from the rows themselves.
+
+        split_month_range("2025-01-20", "2025-03-10")
+        -> ("2025-02", "2025-02", [("2025-01-20", "2025-01-31"), ("2025-03-01", "2025-03-10")])
+    """
+    start = str(start)[:10] if start else None
+    end = str(end)[:10] if end else None
+    first = last = None
+    edges = []
+    start_partial = bool(start) and start[8:10] != "01"
+    if start:
+        first = _shift_month(start[:7], 1) if start_partial else start[:7]
+        if start_partial:
+            edges.append((start, min(_last_day(start[:7]), end) if end else _last_day(start[:7])))
+    if end:
+        end_partial = end < _last_day(end[:7])
+        last = _shift_month(end[:7], -1) if end_partial else end[:7]
+        # A partial start in the same month already covers it
+        if end_partial and not (start_partial and start[:7] == end[:7]):
+            edges.append((max(start, f"{end[:7]}-01") if start else f"{end[:7]}-01", end))
+    return first, last, edges
+
+def filter_full_months(statement, column, start: Optional[str] = None, end: Optional[str] = None):
+    # For YYYY-MM columns (monthly_ledger): only the months the inclusive ISO range covers entirely
+    first, last, _ = split_month_range(start, end)
+    return filter_month_range(statement, column, first, last)
+
+def filter_partial_months(statement, column, start: Optional[str] = None, end: Optional[str] = None):
+    # For ISO date columns: the dates of the range in the months it covers only in part (none: no rows)
+    _, _, edges = split_month_range(start, end)
+    if not edges:
+        return statement.where(false())
+    return statement.where(or_(*(and_(column >= low, column <= high) for low, high in edges)))
@@ -1,6 +1,11 @@
-from typing import List, Optional
+from typing import List, Optional, Tuple, Union
+from sqlalchemy.orm import joinedload
 from sqlmodel import Session, select
-from models import Process, Phase
+from models import Client, Process, Phase
+from services.bulk import Rows, DEFAULT_CHUNK_SIZE, bulk_insert, optional_str
+from services.cache import cached, invalidates, cascade
+from services.pagination import Page, DEFAULT_PAGE_SIZE, keyset_page, contains
+from services.search_service import match_query, matching_ids
 
 # --- Process Operations ---
 def get_processes_by_client(session: Session, client_id: int) -> List[Process]:
@@ -11,6 +16,42 @@ def get_all_processes(session: Session) -> List[Process]:
     statement = select(Process).order_by(Process.title)
     return session.exec(statement).all()
 
+def get_processes_with_client(session: Session, client_id: Optional[int] = None) -> List[Process]:
+    """Processes ordered by title with `client` loaded in the same SELECT (no lazy load per row)."""
+    statement = select(Process).options(joinedload(Process.client)).order_by(Process.title)
+    if client_id is not None:
+        statement = statement.where(Process.client_id == client_id)
+    return session.exec(statement).all()
+
+def list_processes(session: Session, search: Optional[str] = None, client_id: Optional[int] = None,
+                   responsible: Optional[str] = None, status: Optional[str] = None,
+                   cursor: Optional[tuple] = None, page_size: int = DEFAULT_PAGE_SIZE) -> Page:
+    """
+    One page of processes (client loaded) ordered by title. `search` goes through the
+    full-text index (title, CNJ, notes and the client's name and CPF/CNPJ);
+    `responsible` is a case-insensitive substring, `status` an exact value.
+    """
+    statement = select(Process)
+    if match_query(search):
+        statement = statement.where(Process.id.in_(matching_ids("process_search", search)))
+    if client_id is not None:
+        statement = statement.where(Process.client_id == client_id)
+    if responsible and responsible.strip():
+        statement = statement.where(contains(Process.responsible, responsible))
+    if status:
+        statement = statement.where(Process.status == status)
+    return keyset_page(session, statement, (Process.title, Process.id), cursor, page_size,
+                       options=(joinedload(Process.client),))
+
+@cached("processes")
+def get_process_options(session: Session, client_id: Optional[int] = None) -> List[Tuple[int, str]]:
+    # (id, title) pairs for selectboxes, optionally for one client
+    statement = select(Process.id, Process.title).order_by(Process.title)
+    if client_id is not None:
+        statement = statement.where(Process.client_id == client_id)
+    return [tuple(row) for row in session.exec(statement).all()]
+
+@invalidates("processes")
 def create_process(session: Session, client_id: int, title: str, cnj: str = None, responsible: str = None, status: str = "Ativo", notes: str = None) -> Process:
     process = Process(client_id=client_id, title=title, cnj=cnj, responsible=responsible, status=status, notes=notes)
     session.add(process)
@@ -18,6 +59,30 @@ def create_process(session: Session, client_id: int, title: str, cnj: str = None
     session.refresh(process)
     return process
 
+def _process_record(row: dict) -> dict:
+    title = row["title"]
+    if not title or not str(title).strip():
+        raise ValueError("title vazio")
+    status = row.get("status")
+    return {
+        "client_id": int(row["client_id"]),
+        "title": str(title),
+        "cnj": optional_str(row.get("cnj")),
+        "responsible": optional_str(row.get("responsible")),
+        "status": "Ativo" if status is None else str(status),
+        "notes": optional_str(row.get("notes")),
+    }
+
+@invalidates("processes")
+def create_processes_bulk(session: Session, processes: Rows, chunk_size: int = DEFAULT_CHUNK_SIZE, return_ids: bool = False) -> Union[int, List[int]]:
+    """
+    Inserts many processes (DataFrame or iterable of dicts) in a single transaction.
+    Raises ValueError before writing anything if a row is invalid or a client does not exist.
+    Returns the number of rows, or the new ids when return_ids=True.
+    """
+    return bulk_insert(session, Process, processes, _process_record, ("client_id", Client), chunk_size, return_ids)
+
+@invalidates("processes")
 def update_process(session: Session, process_id: int, **kwargs) -> Optional[Process]:
     process = session.get(Process, process_id)
     if not process:
@@ -29,6 +94,7 @@ def update_process(session: Session, process_id: int, **kwargs) -> Optional[Proc
     session.refresh(process)
     return process
 
+@invalidates(*cascade("processes"))
 def delete_process(session: Session, process_id: int):
     process = session.get(Process, process_id)
     if process:
@@ -40,6 +106,7 @@ def get_phases_by_process(session: Session, process_id: int) -> List[Phase]:
     statement = select(Phase).where(Phase.process_id == process_id).order_by(Phase.id)
     return session.exec(statement).all()
 
+@invalidates("phases")
 def create_phase(session: Session, process_id: int, description: str, value_centavos: int, condition: str = None) -> Phase:
     phase = Phase(process_id=process_id, description=description, value_centavos=value_centavos, condition=condition)
     session.add(phase)
@@ -47,6 +114,28 @@ def create_phase(session: Session, process_id: int, description: str, value_cent
     session.refresh(phase)
     return phase
 
+def _phase_record(row: dict) -> dict:
+    description = row["description"]
+    if not description:
+        raise ValueError("description vazia")
+    value = row.get("value_centavos")
+    return {
+        "process_id": int(row["process_id"]),
+        "description": str(description),
+        "condition": optional_str(row.get("condition")),
+        "value_centavos": 0 if value is None else int(value),
+    }
+
+@invalidates("phases")
+def create_phases_bulk(session: Session, phases: Rows, chunk_size: int = DEFAULT_CHUNK_SIZE, return_ids: bool = False) -> Union[int, List[int]]:
+    """
+    Inserts many phases (DataFrame or iterable of dicts) in a single transaction.
+    Raises ValueError before writing anything if a row is invalid or a process does not exist.
+    Returns the number of rows, or the new ids when return_ids=True.
+    """
+    return bulk_insert(session, Phase, phases, _phase_record, ("process_id", Process), chunk_size, return_ids)
+
+@invalidates("phases")
 def update_phase(session: Session, phase_id: int, **kwargs) -> Optional[Phase]:
     phase = session.get(Phase, phase_id)
     if not phase:
@@ -58,6 +147,7 @@ def update_phase(session: Session, phase_id: int, **kwargs) -> Optional[Phase]:
     session.refresh(phase)
     return phase
 
+@invalidates(*cascade("phases"))
 def delete_phase(session: Session, phase_id: int):
     phase = session.get(Phase, phase_id)
     if phase:
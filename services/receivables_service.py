@@ -0,0 +1,153 @@
+from datetime import date
+from typing import Optional
+
+import pandas as pd
+from sqlalchemy import Integer, and_, case, cast
+from sqlmodel import Session, select, func
+
+from models import Client, Process, Phase, Payment, PhaseTotal, PhasePaymentDates
+from services.cache import cached
+from services.money import to_reais
+
+# Accounts-receivable aging: open phase balances (value - received) bucketed by how
+# long they have been outstanding.
+#
+# Phases have no due date, so the age comes from the payment history (kept in the
+# phase_payment_dates rollup, see rollup_service.py): a phase is
+# aged from the last payment received on it (the client has owed the rest since
+# then); a phase without payments from the first payment of its process (when the
+# engagement started). Processes with no payment at all have no reference date and
+# are reported under no_payments.
+#
+# The report is as of a date: payments received after as_of are left out of both
+# the balances and the dates, so a past as_of shows what was open back then.
+
+# column -> (min days, max days); None means unbounded.
+AGING_BUCKETS = {
+    "d0_30": (None, 30),
+    "d31_60": (31, 60),
+    "d61_90": (61, 90),
+    "d90_plus": (91, None),
+}
+AGING_LABELS = {
+    "d0_30": "0–30 dias",
+    "d31_60": "31–60 dias",
+    "d61_90": "61–90 dias",
+    "d90_plus": "90+ dias",
+    "no_payments": "Sem pagamentos",
+    "total_open": "Total em aberto",
+}
+GROUPINGS = ("client", "responsible")
+
+def late_payments(as_of: str):
+    """Subquery: per phase_id, the amount of the payments received after as_of (phases without any are absent)."""
+    return (
+        select(Payment.phase_id, func.sum(Payment.amount_centavos).label("amount"))
+        .where(Payment.received_date > as_of)
+        .group_by(Payment.phase_id)
+        .subquery("late_payments")
+    )
+
+def paid_date_as_of(aggregate, rollup_column, late, as_of: str):
+    """The phase_payment_dates rollup column, or for a phase with payments after as_of the same aggregate of its payments up to as_of."""
+    dated = (
+        select(aggregate(Payment.received_date))
+        .where(Payment.phase_id == Phase.id, Payment.received_date <= as_of)
+        .scalar_subquery()
+    )
+    return case((late.c.phase_id.is_(None), rollup_column), else_=dated)
+
+def _open_phases(as_of: str):
+    """Subquery: one row per phase with an open balance at as_of, with its client, responsible and age in days."""
+    # Balances and dates come from the phase_totals and phase_payment_dates rollups,
+    # corrected for payments after as_of: those are few (none for today), found on the
+    # received_date index, and only their phases read payment rows (by phase_id index).
+    # The scan is driven by phases in process order, which gives the window its
+    # partitions for free; processes are then looked up by primary key.
+    late = late_payments(as_of)
+    first_paid = paid_date_as_of(func.min, PhasePaymentDates.first_paid_date, late, as_of)
+    last_paid = paid_date_as_of(func.max, PhasePaymentDates.last_paid_date, late, as_of)
+    process_first = func.min(first_paid).over(partition_by=Phase.process_id)
+    received = func.coalesce(PhaseTotal.received_centavos, 0) - func.coalesce(late.c.amount, 0)
+    phases = (
+        select(
+            Phase.process_id,
+            (Phase.value_centavos - received).label("balance"),
+            func.coalesce(last_paid, process_first).label("since"),
+        )
+        .outerjoin(PhaseTotal, PhaseTotal.phase_id == Phase.id)
+        .outerjoin(PhasePaymentDates, PhasePaymentDates.phase_id == Phase.id)
+        .outerjoin(late, late.c.phase_id == Phase.id)
+        .subquery("phase_balances")
+    )
+    return (
+        select(
+            Process.client_id,
+            Process.responsible,
+            phases.c.balance,
+            cast(func.julianday(as_of) - func.julianday(phases.c.since), Integer).label("days"),
+        )
+        .join(Process, Process.id == phases.c.process_id)
+        .where(phases.c.balance > 0)
+        .subquery("open_phases")
+    )
+
+def _bucket_sums(open_phases) -> list:
+    days, balance = open_phases.c.days, open_phases.c.balance
+    sums = []
+    for column, (low, high) in AGING_BUCKETS.items():
+        conditions = [days.is_not(None)]
+        if low is not None:
+            conditions.append(days >= low)
+        if high is not None:
+            conditions.append(days <= high)
+        sums.append(func.sum(case((and_(*conditions), balance), else_=0)).label(column))
+    sums.append(func.sum(case((days.is_(None), balance), else_=0)).label("no_payments"))
+    sums.append(func.sum(balance).label("total_open"))
+    return sums
+
+def get_receivables_aging(session: Session, group_by: str = "client", as_of: Optional[str] = None) -> pd.DataFrame:
+    """
+    Open balances per aging bucket, one aggregate query. group_by="client" gives
+    client_id and client_name columns, "responsible" a responsible column; then
+    d0_30, d31_60, d61_90, d90_plus, no_payments and total_open (centavos), largest
+    total first. The report is as of as_of (ISO date, default today): ages are
+    measured at that date and payments received after it are not counted.
+    """
+    if group_by not in GROUPINGS:
+        raise ValueError(f"Agrupamento inválido: {group_by!r} (use {', '.join(GROUPINGS)})")
+    return _receivables_aging(session, group_by, as_of or date.today().isoformat())
+
+@cached("clients", "processes", "phases", "payments")
+def _receivables_aging(session: Session, group_by: str, as_of: str) -> pd.DataFrame:
+    open_phases = _open_phases(as_of)
+    sums = _bucket_sums(open_phases)
+    if group_by == "client":
+        keys = ["client_id", "client_name"]
+        statement = (
+            select(open_phases.c.client_id, Client.name, *sums)
+            .join(Client, Client.id == open_phases.c.client_id)
+            .group_by(open_phases.c.client_id)
+        )
+    else:
+        keys = ["responsible"]
+        responsible = func.coalesce(func.nullif(func.trim(open_phases.c.responsible), ""), "(sem responsável)")
+        statement = select(responsible, *sums).group_by(responsible)
+    statement = statement.order_by(func.sum(open_phases.c.balance).desc())
+
+    columns = keys + list(AGING_BUCKETS) + ["no_payments", "total_open"]
+    return pd.DataFrame(session.exec(statement).all(), columns=columns)
+
+def aging_table(df: pd.DataFrame) -> pd.DataFrame:
+    """get_receivables_aging result with Portuguese headers and amounts in reais, for display."""
+    out = df.rename(columns={"client_id": "ID", "client_name": "Cliente", "responsible": "Responsável", **AGING_LABELS})
+    amounts = list(AGING_LABELS.values())
+    out[amounts] = to_reais(out[amounts])
+    return out
+
+def aging_csv(df: pd.DataFrame) -> bytes:
+    """
+    get_receivables_aging result as CSV for spreadsheets in Portuguese: ";" separated,
+    decimal comma, amounts in reais, UTF-8 with BOM so Excel detects the accents.
+    """
+    return aging_table(df).to_csv(index=False, sep=";", decimal=",", float_format="%.2f").encode("utf-8-sig")
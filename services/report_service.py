@@ -1,7 +1,24 @@
 from fpdf import FPDF
-from models import Client, Process, Phase, Payment
-from typing import List, Tuple
+from models import Client, Process, Phase, Payment, PhaseTotal, ClientTotal, ClientVersion
+from typing import BinaryIO, Iterator, List, Optional, Tuple, Union
+from concurrent.futures import ProcessPoolExecutor
+from sqlmodel import Session, select, func
+from services.cache import cached
+from services.money import format_brl
 import os
+import time
+import zipfile
+
+# A statement is the plain-data view of one client report (dicts and ints only, so it
+# can be sent to worker processes):
+#   {"client": {id, name, cpf_cnpj, email, phone},
+#    "financials": {total_contracted, total_received, balance},
+#    "processes": [{title, cnj, status, responsible, notes,
+#                   "phases": [{description, value_centavos, received_centavos}]}]}
+Statement = dict
+
+# Statements sent to a worker process per task
+STATEMENTS_PER_TASK = 16
 
 class PDFReport(FPDF):
     def header(self):
@@ -14,24 +31,24 @@ class PDFReport(FPDF):
         self.set_font('Arial', 'I', 8)
         self.cell(0, 10, f'Página {self.page_no()}/{{nb}}', 0, 0, 'C')
 
-def generate_client_report(client: Client, processes: List[Process], financials: dict) -> str:
-    """
-    Generates a PDF report for a specific client.
-    Returns the filename of the generated PDF.
-    """
+def _render(statement: Statement) -> PDFReport:
+    client = statement['client']
+    processes = statement['processes']
+    financials = statement['financials']
+
     pdf = PDFReport()
     pdf.alias_nb_pages()
     pdf.add_page()
     
     # --- Client Info ---
     pdf.set_font('Arial', 'B', 12)
-    pdf.cell(0, 10, f'Cliente: {client.name}', 0, 1)
+    pdf.cell(0, 10, f"Cliente: {client['name']}", 0, 1)
     pdf.set_font('Arial', '', 10)
     
     info_line = []
-    if client.cpf_cnpj: info_line.append(f"CPF/CNPJ: {client.cpf_cnpj}")
-    if client.email: info_line.append(f"Email: {client.email}")
-    if client.phone: info_line.append(f"Tel: {client.phone}")
+    if client['cpf_cnpj']: info_line.append(f"CPF/CNPJ: {client['cpf_cnpj']}")
+    if client['email']: info_line.append(f"Email: {client['email']}")
+    if client['phone']: info_line.append(f"Tel: {client['phone']}")
     
     if info_line:
         pdf.cell(0, 6, " | ".join(info_line), 0, 1)
@@ -45,13 +62,9 @@ def generate_client_report(client: Client, processes: List[Process], financials:
     
     pdf.set_font('Arial', '', 10)
     # financials dict expected keys: 'total_contracted', 'total_received', 'balance' (all in centavos)
-    tot = financials.get('total_contracted', 0) / 100
-    rec = financials.get('total_received', 0) / 100
-    bal = financials.get('balance', 0) / 100
-    
-    pdf.cell(63, 8, f"Total Contratado: R$ {tot:,.2f}".replace(",", "X").replace(".", ",").replace("X", "."), 1)
-    pdf.cell(63, 8, f"Total Pago: R$ {rec:,.2f}".replace(",", "X").replace(".", ",").replace("X", "."), 1)
-    pdf.cell(63, 8, f"Saldo Devedor: R$ {bal:,.2f}".replace(",", "X").replace(".", ",").replace("X", "."), 1)
+    pdf.cell(63, 8, f"Total Contratado: {format_brl(financials.get('total_contracted', 0))}", 1)
+    pdf.cell(63, 8, f"Total Pago: {format_brl(financials.get('total_received', 0))}", 1)
+    pdf.cell(63, 8, f"Saldo Devedor: {format_brl(financials.get('balance', 0))}", 1)
     pdf.ln(10)
     
     # --- Processes ---
@@ -65,13 +78,13 @@ def generate_client_report(client: Client, processes: List[Process], financials:
         for proc in processes:
             pdf.set_font('Arial', 'B', 11)
             pdf.set_fill_color(230, 230, 250) # Lavender
-            title = f"Processo: {proc.title}"
-            if proc.cnj:
-                title += f" (CNJ: {proc.cnj})"
+            title = f"Processo: {proc['title']}"
+            if proc['cnj']:
+                title += f" (CNJ: {proc['cnj']})"
             pdf.cell(0, 8, title, 1, 1, 'L', fill=True)
             
             pdf.set_font('Arial', '', 9)
-            pdf.multi_cell(0, 6, f"Status: {proc.status} | Responsável: {proc.responsible or 'N/A'}\nObs: {proc.notes or '-'}")
+            pdf.multi_cell(0, 6, f"Status: {proc['status']} | Responsável: {proc['responsible'] or 'N/A'}\nObs: {proc['notes'] or '-'}")
             
             # Phases table
             pdf.ln(2)
@@ -83,35 +96,173 @@ def generate_client_report(client: Client, processes: List[Process], financials:
             
             pdf.set_font('Arial', '', 9)
             
-            # We need to calculate phase totals here or pass them in.
-            # For simplicity, we'll assume the caller might pass enriched objects or we calculate on the fly.
-            # But since we are inside the service, we can't easily query DB if we just passed objects.
-            # Ideally, this service should receive data structures ready for printing.
-            # However, to keep it simple, let's assume 'proc' has 'phases' loaded and we sum payments.
-            
-            if not proc.phases:
+            if not proc['phases']:
                 pdf.cell(190, 6, "Nenhuma fase cadastrada.", 1, 1, 'C')
             else:
-                for phase in proc.phases:
-                    val = phase.value_centavos / 100
-                    
-                    # Calculate received for this phase
-                    rec_phase = sum(p.amount_centavos for p in phase.payments) / 100
+                for phase in proc['phases']:
+                    val = phase['value_centavos']
+                    rec_phase = phase['received_centavos']
                     
                     status = "Quitado" if rec_phase >= val and val > 0 else "Pendente"
                     if val == 0: status = "-"
                     if rec_phase > 0 and rec_phase < val: status = "Parcial"
                     
-                    pdf.cell(80, 6, f"{phase.description}", 1)
-                    pdf.cell(35, 6, f"{val:,.2f}".replace(",", "X").replace(".", ",").replace("X", "."), 1)
-                    pdf.cell(35, 6, f"{rec_phase:,.2f}".replace(",", "X").replace(".", ",").replace("X", "."), 1)
+                    pdf.cell(80, 6, f"{phase['description']}", 1)
+                    pdf.cell(35, 6, format_brl(val, symbol=False), 1)
+                    pdf.cell(35, 6, format_brl(rec_phase, symbol=False), 1)
                     pdf.cell(40, 6, status, 1, 1)
             
             pdf.ln(5)
-            
-    # Output
-    filename = f"Relatorio_{client.name.replace(' ', '_')}_{client.id}.pdf"
+
+    return pdf
+
+def report_filename(client_id: int, client_name: str) -> str:
+    filename = f"Relatorio_{client_name.replace(' ', '_')}_{client_id}.pdf"
     # Sanitize filename
-    filename = "".join([c for c in filename if c.isalpha() or c.isdigit() or c in (' ', '.', '_')]).strip()
-    pdf.output(filename)
+    return "".join([c for c in filename if c.isalpha() or c.isdigit() or c in (' ', '.', '_')]).strip()
+
+def _statement_from_orm(client: Client, processes: List[Process], financials: dict) -> Statement:
+    # Walks proc.phases / phase.payments; load them with client_service.get_client_report_graph
+    # or every phase costs a lazy SELECT
+    return {
+        "client": {"id": client.id, "name": client.name, "cpf_cnpj": client.cpf_cnpj, "email": client.email, "phone": client.phone},
+        "financials": financials,
+        "processes": [{
+            "title": proc.title, "cnj": proc.cnj, "status": proc.status, "responsible": proc.responsible, "notes": proc.notes,
+            "phases": [{
+                "description": phase.description,
+                "value_centavos": phase.value_centavos,
+                "received_centavos": sum(p.amount_centavos for p in phase.payments),
+            } for phase in proc.phases],
+        } for proc in processes],
+    }
+
+def generate_client_report(client: Client, processes: List[Process], financials: dict,
+                           stream: Optional[BinaryIO] = None) -> str:
+    """
+    Generates a PDF report for a specific client.
+    Written to `stream` when given (nothing touches the disk), otherwise to a file
+    in the working directory. Returns the filename of the generated PDF.
+    """
+    pdf = _render(_statement_from_orm(client, processes, financials))
+    filename = report_filename(client.id, client.name)
+    if stream is not None:
+        stream.write(pdf.output(dest='S').encode('latin-1'))
+    else:
+        pdf.output(filename)
     return filename
+
+# --- Batch statements ---
+def load_statements(session: Session, client_ids: Optional[List[int]] = None) -> List[Statement]:
+    """
+    Statements for the given clients (all clients when None), ordered by name.
+    Clients with their rollup totals, processes, and phases with their received
+    totals are read in three queries, whatever the number of clients.
+    """
+    clients_q = (
+        select(Client, func.coalesce(ClientTotal.contracted_centavos, 0), func.coalesce(ClientTotal.received_centavos, 0))
+        .outerjoin(ClientTotal, ClientTotal.client_id == Client.id)
+        .order_by(Client.name)
+    )
+    processes_q = select(Process).order_by(Process.client_id, Process.id)
+    phases_q = (
+        select(Phase.process_id, Phase.description, Phase.value_centavos, func.coalesce(PhaseTotal.received_centavos, 0))
+        .join(Process, Process.id == Phase.process_id)
+        .outerjoin(PhaseTotal, PhaseTotal.phase_id == Phase.id)
+        .order_by(Phase.process_id, Phase.id)
+    )
+    if client_ids is not None:
+        clients_q = clients_q.where(Client.id.in_(client_ids))
+        processes_q = processes_q.where(Process.client_id.in_(client_ids))
+        phases_q = phases_q.where(Process.client_id.in_(client_ids))
+
+    phases_by_process = {}
+    for process_id, description, value, received in session.exec(phases_q):
+        phases_by_process.setdefault(process_id, []).append(
+            {"description": description, "value_centavos": value, "received_centavos": received})
+
+    processes_by_client = {}
+    for proc in session.exec(processes_q):
+        processes_by_client.setdefault(proc.client_id, []).append({
+            "title": proc.title, "cnj": proc.cnj, "status": proc.status, "responsible": proc.responsible, "notes": proc.notes,
+            "phases": phases_by_process.get(proc.id, []),
+        })
+
+    statements = []
+    for client, contracted, received in session.exec(clients_q):
+        statements.append({
+            "client": {"id": client.id, "name": client.name, "cpf_cnpj": client.cpf_cnpj, "email": client.email, "phone": client.phone},
+            "financials": {"total_contracted": contracted, "total_received": received, "balance": contracted - received},
+            "processes": processes_by_client.get(client.id, []),
+        })
+    return statements
+
+def render_statement(statement: Statement) -> Tuple[str, bytes, float]:
+    """Renders one statement; returns (filename, PDF bytes, render seconds). Runs in worker processes."""
+    t0 = time.perf_counter()
+    # fpdf 1.7 returns the document as a latin-1 str
+    data = _render(statement).output(dest='S').encode('latin-1')
+    client = statement["client"]
+    return report_filename(client["id"], client["name"]), data, time.perf_counter() - t0
+
+def get_client_report(session: Session, client_id: int) -> Tuple[str, bytes]:
+    """
+    Renders one client statement in memory; returns (filename, PDF bytes).
+    Nothing touches the disk, and the bytes stay cached until this client's data
+    changes: the cache key is its change counter (client_versions, kept by triggers),
+    so writes to other clients leave the report cached.
+    """
+    version = session.exec(select(ClientVersion.version).where(ClientVersion.client_id == client_id)).first()
+    return _client_report(session, client_id, version or 0)
+
+@cached()  # keyed by the version argument, not by table versions
+def _client_report(session: Session, client_id: int, version: int) -> Tuple[str, bytes]:
+    statements = load_statements(session, [client_id])
+    if not statements:
+        raise ValueError(f"Cliente {client_id} não encontrado.")
+    name, data, _ = render_statement(statements[0])
+    return name, data
+
+def write_client_report(session: Session, client_id: int, stream: BinaryIO) -> str:
+    """Writes the PDF statement of a client to a caller-supplied binary stream; returns its filename."""
+    name, data = get_client_report(session, client_id)
+    stream.write(data)
+    return name
+
+def _render_all(statements: List[Statement], workers: Optional[int]) -> Iterator[Tuple[Statement, Tuple[str, bytes, float]]]:
+    """Renders in statement order; workers=1 stays in-process, None uses every core."""
+    if workers == 1 or len(statements) <= 1:
+        for statement in statements:
+            yield statement, render_statement(statement)
+        return
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        yield from zip(statements, pool.map(render_statement, statements, chunksize=STATEMENTS_PER_TASK))
+
+def _document_report(statement: Statement, name: str, data: bytes, seconds: float) -> dict:
+    return {"client_id": statement["client"]["id"], "client": statement["client"]["name"],
+            "file": name, "bytes": len(data), "seconds": seconds}
+
+def generate_statements(session: Session, directory: str, client_ids: Optional[List[int]] = None,
+                        workers: Optional[int] = None) -> List[dict]:
+    """
+    Writes one PDF statement per client into `directory`, rendering in a process pool.
+    Returns one dict per document: client_id, client, file, bytes, seconds (render time).
+    """
+    os.makedirs(directory, exist_ok=True)
+    documents = []
+    for statement, (name, data, seconds) in _render_all(load_statements(session, client_ids), workers):
+        with open(os.path.join(directory, name), "wb") as f:
+            f.write(data)
+        documents.append(_document_report(statement, name, data, seconds))
+    return documents
+
+def generate_statements_zip(session: Session, target: Union[str, BinaryIO], client_ids: Optional[List[int]] = None,
+                            workers: Optional[int] = None) -> List[dict]:
+    """Same as generate_statements, packed into a single zip (path or writable binary stream)."""
+    documents = []
+    # PDFs are already compressed; storing them keeps the zip step cheap
+    with zipfile.ZipFile(target, "w", compression=zipfile.ZIP_STORED) as zf:
+        for statement, (name, data, seconds) in _render_all(load_statements(session, client_ids), workers):
+            zf.writestr(name, data)
+            documents.append(_document_report(statement, name, data, seconds))
+    return documents
@@ -0,0 +1,345 @@
+from typing import List
+
+import pandas as pd
+from sqlalchemy import text
+from sqlmodel import Session
+
+from services.cache import bump
+
+# Stored rollups of contracted and received amounts (centavos) per phase, process
+# and client (tables phase_totals, process_totals and client_totals in models.py),
+# the first and last payment date per phase (phase_payment_dates), the cash
+# movements per month (monthly_ledger: received, expenses paid and pending, net)
+# and a change counter per client (client_versions, not reconciled: it only ever grows).
+#
+# They are kept in sync by SQLite triggers on payments, phases, processes and
+# expenses, so
+# every write path (service functions, bulk inserts, backup imports, ORM cascades,
+# raw SQL) updates them in the same transaction. Balance is contracted - received.
+# reconcile_rollups() recomputes everything from the base tables to detect and
+# repair drift (e.g. a database edited with triggers dropped).
+
+# table -> columns compared by reconcile_rollups
+ROLLUP_COLUMNS = {
+    "phase_totals": ("contracted_centavos", "received_centavos"),
+    "process_totals": ("contracted_centavos", "received_centavos"),
+    "client_totals": ("contracted_centavos", "received_centavos"),
+    "phase_payment_dates": ("first_paid_date", "last_paid_date"),
+    "monthly_ledger": ("received_centavos", "expenses_paid_centavos", "expenses_pending_centavos", "net_centavos"),
+}
+ROLLUP_TABLES = tuple(ROLLUP_COLUMNS)
+
+def _add_received(phase_id: str, amount: str) -> str:
+    """Statements adding `amount` to the received totals of a phase, its process and its client."""
+    return f"""
+    INSERT INTO phase_totals (phase_id, received_centavos) VALUES ({phase_id}, {amount})
+        ON CONFLICT(phase_id) DO UPDATE SET received_centavos = received_centavos + excluded.received_centavos;
+    INSERT INTO process_totals (process_id, contracted_centavos, received_centavos)
+        VALUES ((SELECT process_id FROM phases WHERE id = {phase_id}), 0, {amount})
+        ON CONFLICT(process_id) DO UPDATE SET received_centavos = received_centavos + excluded.received_centavos;
+    INSERT INTO client_totals (client_id, contracted_centavos, received_centavos)
+        VALUES ((SELECT pr.client_id FROM phases ph JOIN processes pr ON pr.id = ph.process_id WHERE ph.id = {phase_id}), 0, {amount})
+        ON CONFLICT(client_id) DO UPDATE SET received_centavos = received_centavos + excluded.received_centavos;"""
+
+def _add_process_totals(process_id: str, contracted: str, received: str) -> str:
+    """Statements adding to the totals of a process and its client."""
+    return f"""
+    INSERT INTO process_totals (process_id, contracted_centavos, received_centavos) VALUES ({process_id}, {contracted}, {received})
+        ON CONFLICT(process_id) DO UPDATE SET
+            contracted_centavos = contracted_centavos + excluded.contracted_centavos,
+            received_centavos = received_centavos + excluded.received_centavos;
+    INSERT INTO client_totals (client_id, contracted_centavos, received_centavos)
+        VALUES ((SELECT client_id FROM processes WHERE id = {process_id}), {contracted}, {received})
+        ON CONFLICT(client_id) DO UPDATE SET
+            contracted_centavos = contracted_centavos + excluded.contracted_centavos,
+            received_centavos = received_centavos + excluded.received_centavos;"""
+
+def _add_client_totals(client_id: str, contracted: str, received: str) -> str:
+    return f"""
+    INSERT INTO client_totals (client_id, contracted_centavos, received_centavos) VALUES ({client_id}, {contracted}, {received})
+        ON CONFLICT(client_id) DO UPDATE SET
+            contracted_centavos = contracted_centavos + excluded.contracted_centavos,
+            received_centavos = received_centavos + excluded.received_centavos;"""
+
+def _refresh_payment_dates(phase_id: str) -> str:
+    """Statements recomputing the payment dates of one phase (an index range on ix_payments_phase_date)."""
+    return f"""
+    DELETE FROM phase_payment_dates WHERE phase_id = {phase_id};
+    INSERT INTO phase_payment_dates (phase_id, first_paid_date, last_paid_date)
+        SELECT phase_id, MIN(received_date), MAX(received_date) FROM payments WHERE phase_id = {phase_id} GROUP BY phase_id;"""
+
+def _add_ledger(date: str, received: str, paid: str, pending: str) -> str:
+    """Statement adding to the ledger row of the month of `date`; only that month is touched."""
+    return f"""
+    INSERT INTO monthly_ledger (month, received_centavos, expenses_paid_centavos, expenses_pending_centavos, net_centavos)
+        VALUES (substr({date}, 1, 7), {received}, {paid}, {pending}, ({received}) - ({paid}))
+        ON CONFLICT(month) DO UPDATE SET
+            received_centavos = received_centavos + excluded.received_centavos,
+            expenses_paid_centavos = expenses_paid_centavos + excluded.expenses_paid_centavos,
+            expenses_pending_centavos = expenses_pending_centavos + excluded.expenses_pending_centavos,
+            net_centavos = net_centavos + excluded.net_centavos;"""
+
+def _add_expense(row: str, sign: str = "") -> str:
+    paid = f"CASE WHEN {row}.paid THEN {sign}{row}.amount_centavos ELSE 0 END"
+    pending = f"CASE WHEN {row}.paid THEN 0 ELSE {sign}{row}.amount_centavos END"
+    return _add_ledger(f"{row}.date", "0", paid, pending)
+
+def _drop_empty_month(date: str) -> str:
+    return f"""
+    DELETE FROM monthly_ledger WHERE month = substr({date}, 1, 7)
+        AND received_centavos = 0 AND expenses_paid_centavos = 0 AND expenses_pending_centavos = 0;"""
+
+def _bump_client(client_id: str) -> str:
+    """Statement bumping the change counter of a client (client_versions); a NULL id (orphan row) is skipped."""
+    return f"""
+    INSERT INTO client_versions (client_id, version) SELECT {client_id}, 1 WHERE {client_id} IS NOT NULL
+        ON CONFLICT(client_id) DO UPDATE SET version = version + 1;"""
+
+_PHASE_CLIENT = "(SELECT client_id FROM processes WHERE id = {})"
+_PAYMENT_CLIENT = "(SELECT pr.client_id FROM phases ph JOIN processes pr ON pr.id = ph.process_id WHERE ph.id = {})"
+
+_PHASE_RECEIVED = "COALESCE((SELECT received_centavos FROM phase_totals WHERE phase_id = {}), 0)"
+_PROCESS_COLUMN = "COALESCE((SELECT {} FROM process_totals WHERE process_id = OLD.id), 0)"
+
+# name -> (event, body). ORM cascades delete children first, so a phase or process is
+# deleted after its payments/phases have already been subtracted.
+TRIGGERS = {
+    "trg_payments_rollup_insert": (
+        "AFTER INSERT ON payments",
+        _add_received("NEW.phase_id", "NEW.amount_centavos"),
+    ),
+    "trg_payments_rollup_delete": (
+        "AFTER DELETE ON payments",
+        _add_received("OLD.phase_id", "-OLD.amount_centavos"),
+    ),
+    "trg_payments_rollup_update": (
+        "AFTER UPDATE OF phase_id, amount_centavos ON payments",
+        _add_received("OLD.phase_id", "-OLD.amount_centavos") + _add_received("NEW.phase_id", "NEW.amount_centavos"),
+    ),
+    "trg_payments_dates_insert": (
+        "AFTER INSERT ON payments",
+        """
+    INSERT INTO phase_payment_dates (phase_id, first_paid_date, last_paid_date) VALUES (NEW.phase_id, NEW.received_date, NEW.received_date)
+        ON CONFLICT(phase_id) DO UPDATE SET
+            first_paid_date = MIN(first_paid_date, excluded.first_paid_date),
+            last_paid_date = MAX(last_paid_date, excluded.last_paid_date);""",
+    ),
+    "trg_payments_dates_delete": (
+        "AFTER DELETE ON payments",
+        _refresh_payment_dates("OLD.phase_id"),
+    ),
+    "trg_payments_dates_update": (
+        "AFTER UPDATE OF phase_id, received_date ON payments",
+        _refresh_payment_dates("OLD.phase_id") + _refresh_payment_dates("NEW.phase_id"),
+    ),
+    "trg_payments_ledger_insert": (
+        "AFTER INSERT ON payments",
+        _add_ledger("NEW.received_date", "NEW.amount_centavos", "0", "0"),
+    ),
+    "trg_payments_ledger_delete": (
+        "AFTER DELETE ON payments",
+        _add_ledger("OLD.received_date", "-OLD.amount_centavos", "0", "0") + _drop_empty_month("OLD.received_date"),
+    ),
+    "trg_payments_ledger_update": (
+        "AFTER UPDATE OF amount_centavos, received_date ON payments",
+        _add_ledger("OLD.received_date", "-OLD.amount_centavos", "0", "0")
+        + _add_ledger("NEW.received_date", "NEW.amount_centavos", "0", "0")
+        + _drop_empty_month("OLD.received_date"),
+    ),
+    "trg_expenses_ledger_insert": (
+        "AFTER INSERT ON expenses",
+        _add_expense("NEW"),
+    ),
+    "trg_expenses_ledger_delete": (
+        "AFTER DELETE ON expenses",
+        _add_expense("OLD", "-") + _drop_empty_month("OLD.date"),
+    ),
+    "trg_expenses_ledger_update": (
+        "AFTER UPDATE OF amount_centavos, date, paid ON expenses",
+        _add_expense("OLD", "-") + _add_expense("NEW") + _drop_empty_month("OLD.date"),
+    ),
+    "trg_phases_rollup_insert": (
+        "AFTER INSERT ON phases",
+        _add_process_totals("NEW.process_id", "NEW.value_centavos", "0"),
+    ),
+    "trg_phases_rollup_delete": (
+        "AFTER DELETE ON phases",
+        _add_process_totals("OLD.process_id", "-OLD.value_centavos", "-" + _PHASE_RECEIVED.format("OLD.id"))
+        + "\n    DELETE FROM phase_totals WHERE phase_id = OLD.id;"
+        + "\n    DELETE FROM phase_payment_dates WHERE phase_id = OLD.id;",
+    ),
+    "trg_phases_rollup_update": (
+        "AFTER UPDATE OF process_id, value_centavos ON phases",
+        # A phase moved to another process takes its received amount along
+        _add_process_totals("OLD.process_id", "-OLD.value_centavos", "-" + _PHASE_RECEIVED.format("OLD.id"))
+        + _add_process_totals("NEW.process_id", "NEW.value_centavos", _PHASE_RECEIVED.format("NEW.id")),
+    ),
+    "trg_processes_rollup_update": (
+        "AFTER UPDATE OF client_id ON processes",
+        _add_client_totals("OLD.client_id", "-" + _PROCESS_COLUMN.format("contracted_centavos"), "-" + _PROCESS_COLUMN.format("received_centavos"))
+        + _add_client_totals("NEW.client_id", _PROCESS_COLUMN.format("contracted_centavos"), _PROCESS_COLUMN.format("received_centavos")),
+    ),
+    "trg_processes_rollup_delete": (
+        "AFTER DELETE ON processes",
+        "\n    DELETE FROM process_totals WHERE process_id = OLD.id;",
+    ),
+    "trg_clients_rollup_delete": (
+        "AFTER DELETE ON clients",
+        "\n    DELETE FROM client_totals WHERE client_id = OLD.id;",
+    ),
+    # Client change counters: any write to what a client statement shows. The counter of a
+    # deleted client is bumped, not dropped, so a reused id never matches a cached report.
+    "trg_clients_version_update": ("AFTER UPDATE ON clients", _bump_client("OLD.id") + _bump_client("NEW.id")),
+    "trg_clients_version_delete": ("AFTER DELETE ON clients", _bump_client("OLD.id")),
+    "trg_processes_version_insert": ("AFTER INSERT ON processes", _bump_client("NEW.client_id")),
+    "trg_processes_version_delete": ("AFTER DELETE ON processes", _bump_client("OLD.client_id")),
+    "trg_processes_version_update": (
+        "AFTER UPDATE ON processes",
+        _bump_client("OLD.client_id") + _bump_client("NEW.client_id"),
+    ),
+    "trg_phases_version_insert": ("AFTER INSERT ON phases", _bump_client(_PHASE_CLIENT.format("NEW.process_id"))),
+    "trg_phases_version_delete": ("AFTER DELETE ON phases", _bump_client(_PHASE_CLIENT.format("OLD.process_id"))),
+    "trg_phases_version_update": (
+        "AFTER UPDATE ON phases",
+        _bump_client(_PHASE_CLIENT.format("OLD.process_id")) + _bump_client(_PHASE_CLIENT.format("NEW.process_id")),
+    ),
+    "trg_payments_version_insert": ("AFTER INSERT ON payments", _bump_client(_PAYMENT_CLIENT.format("NEW.phase_id"))),
+    "trg_payments_version_delete": ("AFTER DELETE ON payments", _bump_client(_PAYMENT_CLIENT.format("OLD.phase_id"))),
+    "trg_payments_version_update": (
+        "AFTER UPDATE OF phase_id, amount_centavos ON payments",
+        _bump_client(_PAYMENT_CLIENT.format("OLD.phase_id")) + _bump_client(_PAYMENT_CLIENT.format("NEW.phase_id")),
+    ),
+}
+
+# Expected rollups, aggregated from the base tables one level at a time (payments per
+# phase, phases per process, processes per client). Every step is a GROUP BY or a
+# primary-key lookup, so a full rebuild stays linear even without secondary indexes.
+_PHASE_SUMS = "SELECT phase_id, SUM(amount_centavos) AS received FROM payments GROUP BY phase_id"
+_PROCESS_SUMS = f"""
+        SELECT ph.process_id, SUM(ph.value_centavos) AS contracted, SUM(COALESCE(r.received, 0)) AS received
+        FROM phases ph LEFT JOIN ({_PHASE_SUMS}) r ON r.phase_id = ph.id
+        GROUP BY ph.process_id"""
+
+EXPECTED_SQL = {
+    "phase_totals": f"""
+        SELECT phase_id AS id, 0 AS contracted_centavos, received AS received_centavos FROM ({_PHASE_SUMS})""",
+    "process_totals": f"""
+        SELECT p.id, COALESCE(s.contracted, 0) AS contracted_centavos, COALESCE(s.received, 0) AS received_centavos
+        FROM processes p LEFT JOIN ({_PROCESS_SUMS}) s ON s.process_id = p.id""",
+    "client_totals": f"""
+        SELECT c.id, COALESCE(s.contracted, 0) AS contracted_centavos, COALESCE(s.received, 0) AS received_centavos
+        FROM clients c LEFT JOIN (
+            SELECT pr.client_id, SUM(t.contracted) AS contracted, SUM(t.received) AS received
+            FROM processes pr JOIN ({_PROCESS_SUMS}) t ON t.process_id = pr.id
+            GROUP BY pr.client_id
+        ) s ON s.client_id = c.id""",
+    "phase_payment_dates": """
+        SELECT phase_id AS id, MIN(received_date) AS first_paid_date, MAX(received_date) AS last_paid_date
+        FROM payments GROUP BY phase_id""",
+    # Both sides grouped on the covering indexes (received_date / paid, date), then merged per month
+    "monthly_ledger": """
+        SELECT month AS id, SUM(received) AS received_centavos, SUM(paid) AS expenses_paid_centavos,
+            SUM(pending) AS expenses_pending_centavos, SUM(received) - SUM(paid) AS net_centavos
+        FROM (
+            SELECT substr(received_date, 1, 7) AS month, SUM(amount_centavos) AS received, 0 AS paid, 0 AS pending
+            FROM payments GROUP BY month
+            UNION ALL
+            SELECT substr(date, 1, 7), 0, SUM(CASE WHEN paid THEN amount_centavos ELSE 0 END),
+                SUM(CASE WHEN paid THEN 0 ELSE amount_centavos END)
+            FROM expenses GROUP BY substr(date, 1, 7)
+        )
+        GROUP BY month""",
+}
+
+STORED_SQL = {
+    "phase_totals": "SELECT phase_id AS id, 0 AS contracted_centavos, received_centavos FROM phase_totals",
+    "process_totals": "SELECT process_id AS id, contracted_centavos, received_centavos FROM process_totals",
+    "client_totals": "SELECT client_id AS id, contracted_centavos, received_centavos FROM client_totals",
+    "phase_payment_dates": "SELECT phase_id AS id, first_paid_date, last_paid_date FROM phase_payment_dates",
+    "monthly_ledger": """
+        SELECT month AS id, received_centavos, expenses_paid_centavos, expenses_pending_centavos, net_centavos
+        FROM monthly_ledger""",
+}
+
+REBUILD_SQL = [
+    "DELETE FROM phase_totals",
+    "DELETE FROM process_totals",
+    "DELETE FROM client_totals",
+    "DELETE FROM phase_payment_dates",
+    "DELETE FROM monthly_ledger",
+    "INSERT INTO phase_totals (phase_id, received_centavos) SELECT id, received_centavos FROM (" + EXPECTED_SQL["phase_totals"] + ")",
+    "INSERT INTO process_totals (process_id, contracted_centavos, received_centavos) " + EXPECTED_SQL["process_totals"],
+    "INSERT INTO client_totals (client_id, contracted_centavos, received_centavos) " + EXPECTED_SQL["client_totals"],
+    "INSERT INTO phase_payment_dates (phase_id, first_paid_date, last_paid_date) " + EXPECTED_SQL["phase_payment_dates"],
+    "INSERT INTO monthly_ledger (month, received_centavos, expenses_paid_centavos, expenses_pending_centavos, net_centavos) "
+    + EXPECTED_SQL["monthly_ledger"],
+]
+
+def install_rollups(bind) -> List[str]:
+    """
+    Creates the rollup triggers missing from the database (the tables themselves come
+    from create_all). When any trigger was missing the rollups are rebuilt from scratch,
+    which backfills databases created before this migration. Idempotent: returns the
+    names of the triggers created now.
+    """
+    created = []
+    with bind.begin() as conn:
+        existing = {row[0] for row in conn.exec_driver_sql("SELECT name FROM sqlite_master WHERE type = 'trigger'")}
+        for name, (when, body) in TRIGGERS.items():
+            if name not in existing:
+                conn.exec_driver_sql(f"CREATE TRIGGER {name} {when} BEGIN{body}\nEND")
+                created.append(name)
+        if created:
+            for statement in REBUILD_SQL:
+                conn.exec_driver_sql(statement)
+    return created
+
+def reconcile_rollups(session: Session, repair: bool = True) -> pd.DataFrame:
+    """
+    Compares the stored rollups with values recomputed from payments, phases and expenses.
+    A missing amount row counts as zero (a missing date row as no date). Returns one
+    row per mismatch with columns table, id, column, stored, expected (empty when in
+    sync). With repair=True and any drift found, all rollups are rebuilt in one
+    transaction.
+    """
+    drift = []
+    for table, columns in ROLLUP_COLUMNS.items():
+        expected = pd.read_sql_query(text(EXPECTED_SQL[table]), session.connection()).set_index("id")
+        stored = pd.read_sql_query(text(STORED_SQL[table]), session.connection()).set_index("id")
+        amounts = table != "phase_payment_dates"
+        expected, stored = expected.align(stored, join="outer", fill_value=0 if amounts else None)
+        for column in columns:
+            diff = (expected[column] != stored[column]) & ~(expected[column].isna() & stored[column].isna())
+            for row_id in expected.index[diff]:
+                drift.append({
+                    "table": table,
+                    "id": _plain(row_id),
+                    "column": column,
+                    "stored": _plain(stored.at[row_id, column]),
+                    "expected": _plain(expected.at[row_id, column]),
+                })
+    # Reading opened a transaction; the rebuild below starts its own
+    session.rollback()
+
+    if repair and drift:
+        rebuild_rollups(session)
+    return pd.DataFrame(drift, columns=["table", "id", "column", "stored", "expected"])
+
+def _plain(value):
+    # numpy scalars -> int, missing -> None, dates and months stay strings
+    if pd.isna(value):
+        return None
+    return int(value) if not isinstance(value, str) else value
+
+def rebuild_rollups(session: Session):
+    """Recomputes every rollup from the base tables."""
+    try:
+        for statement in REBUILD_SQL:
+            session.connection().exec_driver_sql(statement)
+        session.commit()
+    except Exception:
+        session.rollback()
+        raise
+    finally:
+        # Rollup readers are cached under the base tables they summarize
+        bump("clients", "processes", "phases", "payments", "expenses")
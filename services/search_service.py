@@ -0,0 +1,173 @@
+import re
+from typing import List, Optional
+
+import pandas as pd
+from sqlalchemy import column, text
+from sqlmodel import Session
+
+# Full-text search over clients and processes with SQLite FTS5.
+#
+# client_search holds one row per client (rowid = clients.id) and process_search one
+# row per process (rowid = processes.id). The process row repeats its client's name
+# and document, so "Silva" or a CPF also finds the client's processes. Triggers on
+# clients and processes keep both tables in sync on every write path, like the
+# rollups in rollup_service.py.
+#
+# The unicode61 tokenizer folds case and accents ("Joao" finds "João"). CPF/CNPJ and
+# CNJ are indexed twice: as written (each group of digits is a token) and with the
+# punctuation removed, so "123.456.789-01", "12345678901" and "1234567" all match.
+
+SEARCH_TABLES = {
+    "client_search": "name, document",
+    "process_search": "title, cnj, notes, client_name, client_document",
+}
+TOKENIZE = "unicode61 remove_diacritics 2"
+# Extra prefix indexes so the short prefixes typed while searching ("jo", "ação") stay fast
+PREFIX = "2 3"
+
+# Column weights for bm25 ranking: names, titles and numbers count more than notes
+RANK = {
+    "client_search": "bm25(10.0, 10.0)",
+    "process_search": "bm25(10.0, 10.0, 1.0, 5.0, 5.0)",
+}
+
+def _document(value: str) -> str:
+    # SQL expression: digits-only copy of a CPF/CNPJ/CNJ followed by the original text
+    stripped = f"COALESCE({value}, '')"
+    for char in (".", "-", "/", " "):
+        stripped = f"replace({stripped}, '{char}', '')"
+    return f"{stripped} || ' ' || COALESCE({value}, '')"
+
+def _process_row(alias: str) -> str:
+    return f"""
+    INSERT INTO process_search (rowid, title, cnj, notes, client_name, client_document)
+        SELECT {alias}.id, {alias}.title, {_document(f"{alias}.cnj")}, {alias}.notes, c.name, {_document("c.cpf_cnpj")}
+        FROM clients c WHERE c.id = {alias}.client_id;"""
+
+_CLIENT_ROW = f"""
+    INSERT INTO client_search (rowid, name, document) VALUES (NEW.id, NEW.name, {_document("NEW.cpf_cnpj")});"""
+
+# name -> (event, body)
+TRIGGERS = {
+    "trg_clients_search_insert": ("AFTER INSERT ON clients", _CLIENT_ROW),
+    "trg_clients_search_update": (
+        "AFTER UPDATE OF name, cpf_cnpj ON clients",
+        "\n    DELETE FROM client_search WHERE rowid = OLD.id;" + _CLIENT_ROW + f"""
+    UPDATE process_search SET client_name = NEW.name, client_document = {_document("NEW.cpf_cnpj")}
+        WHERE rowid IN (SELECT id FROM processes WHERE client_id = NEW.id);""",
+    ),
+    "trg_clients_search_delete": (
+        "AFTER DELETE ON clients",
+        "\n    DELETE FROM client_search WHERE rowid = OLD.id;",
+    ),
+    "trg_processes_search_insert": ("AFTER INSERT ON processes", _process_row("NEW")),
+    "trg_processes_search_update": (
+        "AFTER UPDATE OF title, cnj, notes, client_id ON processes",
+        "\n    DELETE FROM process_search WHERE rowid = OLD.id;" + _process_row("NEW"),
+    ),
+    "trg_processes_search_delete": (
+        "AFTER DELETE ON processes",
+        "\n    DELETE FROM process_search WHERE rowid = OLD.id;",
+    ),
+}
+
+REBUILD_SQL = [
+    "DELETE FROM client_search",
+    "DELETE FROM process_search",
+    f"INSERT INTO client_search (rowid, name, document) SELECT id, name, {_document('cpf_cnpj')} FROM clients",
+    f"""INSERT INTO process_search (rowid, title, cnj, notes, client_name, client_document)
+        SELECT p.id, p.title, {_document("p.cnj")}, p.notes, c.name, {_document("c.cpf_cnpj")}
+        FROM processes p JOIN clients c ON c.id = p.client_id""",
+    # Merge the b-trees written by the bulk insert
+    "INSERT INTO client_search (client_search) VALUES ('optimize')",
+    "INSERT INTO process_search (process_search) VALUES ('optimize')",
+]
+
+def install_search_index(bind) -> List[str]:
+    """
+    Creates the FTS5 tables and sync triggers missing from the database. When any of
+    them was missing the index is rebuilt from clients and processes, which backfills
+    existing databases. Idempotent: returns the names of the objects created now.
+    """
+    created = []
+    with bind.begin() as conn:
+        existing = {row[0] for row in conn.exec_driver_sql("SELECT name FROM sqlite_master WHERE type IN ('table', 'trigger')")}
+        for table, columns in SEARCH_TABLES.items():
+            if table not in existing:
+                conn.exec_driver_sql(f"CREATE VIRTUAL TABLE {table} USING fts5({columns}, tokenize = '{TOKENIZE}', prefix = '{PREFIX}')")
+                conn.exec_driver_sql(f"INSERT INTO {table} ({table}, rank) VALUES ('rank', '{RANK[table]}')")
+                created.append(table)
+        for name, (when, body) in TRIGGERS.items():
+            if name not in existing:
+                conn.exec_driver_sql(f"CREATE TRIGGER {name} {when} BEGIN{body}\nEND")
+                created.append(name)
+        if created:
+            for statement in REBUILD_SQL:
+                conn.exec_driver_sql(statement)
+    return created
+
+def rebuild_search_index(session: Session):
+    """Reindexes every client and process."""
+    try:
+        for statement in REBUILD_SQL:
+            session.connection().exec_driver_sql(statement)
+        session.commit()
+    except Exception:
+        session.rollback()
+        raise
+
+def match_query(search: Optional[str]) -> Optional[str]:
+    """
+    Turns what the user typed into an FTS5 query: every word must match as a prefix.
+    Punctuation between digits is dropped ("123.456-7" -> "1234567") so formatted and
+    unformatted numbers match alike. Returns None when nothing searchable is left.
+    """
+    if not search:
+        return None
+    terms = []
+    for word in search.split():
+        if any(char.isdigit() for char in word):
+            word = re.sub(r"(?<=\d)[.\-/](?=\d)", "", word)
+        # Quoting keeps FTS5 operators (AND, NEAR, "-", ":") literal
+        terms.extend(f'"{token}"*' for token in re.findall(r"\w+", word))
+    return " ".join(terms) or None
+
+def matching_ids(table: str, search: str):
+    """
+    Subquery with the ids (clients or processes) matching `search` in `table`, for use
+    as `Model.id.in_(...)`. `search` must have a match_query.
+    """
+    statement = text(f"SELECT rowid FROM {table} WHERE {table} MATCH :match")
+    return statement.bindparams(match=match_query(search)).columns(column("rowid"))
+
+def ranked_matches(table: str, search: str):
+    """Like matching_ids, with the bm25 rank as a second column; use as a join target."""
+    statement = text(f"SELECT rowid, rank FROM {table} WHERE {table} MATCH :match")
+    return statement.bindparams(match=match_query(search)).columns(column("rowid"), column("rank")).subquery()
+
+def search(session: Session, query: str, limit: int = 20) -> pd.DataFrame:
+    """
+    Clients and processes matching `query`, best match first. Columns: kind
+    ("cliente" or "processo"), id, client_id, client_name, title (processes only),
+    document (CPF/CNPJ or CNJ) and rank (bm25, lower is better).
+    """
+    columns = ["kind", "id", "client_id", "client_name", "title", "document", "rank"]
+    match = match_query(query)
+    if match is None:
+        return pd.DataFrame(columns=columns)
+
+    # Each side keeps only its best `limit` rows (FTS5 stops early on ORDER BY rank LIMIT)
+    statement = text("""
+        SELECT 'cliente', c.id, c.id, c.name, NULL, c.cpf_cnpj, s.rank
+        FROM (SELECT rowid, rank FROM client_search WHERE client_search MATCH :match ORDER BY rank LIMIT :limit) s
+        JOIN clients c ON c.id = s.rowid
+        UNION ALL
+        SELECT 'processo', p.id, p.client_id, c.name, p.title, p.cnj, s.rank
+        FROM (SELECT rowid, rank FROM process_search WHERE process_search MATCH :match ORDER BY rank LIMIT :limit) s
+        JOIN processes p ON p.id = s.rowid
+        LEFT JOIN clients c ON c.id = p.client_id
+        ORDER BY 7
+        LIMIT :limit
+    """)
+    rows = session.connection().execute(statement, {"match": match, "limit": limit}).all()
+    return pd.DataFrame(rows, columns=columns)
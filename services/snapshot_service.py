@@ -0,0 +1,206 @@
+import os
+import re
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Callable, List, Optional
+
+from sqlmodel import SQLModel, Session
+
+from services.cache import ALL_TABLES, bump, clear_cache
+from services.index_service import migrate_indexes
+from services.rollup_service import install_rollups
+from services.search_service import install_search_index
+
+SNAPSHOT_PREFIX = "lexfinance_"
+SNAPSHOT_PATTERN = re.compile(r"^lexfinance_(\d{8}_\d{6})(?:_([\w-]+))?\.db$")
+TIMESTAMP_FORMAT = "%Y%m%d_%H%M%S"
+
+# Pages copied per backup step; locks are released between steps so the app keeps writing
+DEFAULT_STEP_PAGES = 1024
+DEFAULT_STEP_SLEEP = 0.01  # seconds between steps
+
+# Default retention: the last N snapshots, plus the newest one of each of the last D days and M months,
+# plus every snapshot younger than keep_days days. Labelled snapshots (e.g. "pre-restore") are never pruned.
+DEFAULT_RETENTION = {"keep_last": 5, "keep_daily": 7, "keep_monthly": 6, "keep_days": 1}
+
+ProgressCallback = Callable[[int, int], None]  # (pages copied, total pages)
+
+def _copy(source: sqlite3.Connection, target: sqlite3.Connection, pages: int, sleep: float,
+          progress: Optional[ProgressCallback]) -> int:
+    """Runs the online backup API step by step; returns the total page count."""
+    total = [0]
+
+    def on_step(status, remaining, count):
+        total[0] = count
+        if progress:
+            progress(count - remaining, count)
+
+    source.backup(target, pages=pages, progress=on_step, sleep=sleep)
+    return total[0]
+
+def integrity_check(path: str) -> bool:
+    conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+    try:
+        return conn.execute("PRAGMA integrity_check").fetchone()[0] == "ok"
+    finally:
+        conn.close()
+
+def create_snapshot(session: Session, directory: str, label: Optional[str] = None,
+                    pages: int = DEFAULT_STEP_PAGES, sleep: float = DEFAULT_STEP_SLEEP,
+                    progress: Optional[ProgressCallback] = None) -> dict:
+    """
+    Copies the live database into `directory` with the SQLite online backup API,
+    `pages` pages per step, so writers are only blocked for one step at a time
+    (the copy restarts by itself if another connection writes meanwhile).
+    The copy is written to a .tmp file, checked with PRAGMA integrity_check and
+    only then renamed to lexfinance_<timestamp>[_label].db.
+    Returns a dict with path, seconds, bytes, pages and integrity.
+    """
+    os.makedirs(directory, exist_ok=True)
+    name = SNAPSHOT_PREFIX + datetime.now().strftime(TIMESTAMP_FORMAT)
+    if label:
+        name += "_" + re.sub(r"[^\w-]", "-", label)
+    path = os.path.join(directory, name + ".db")
+    tmp_path = path + ".tmp"
+
+    t0 = time.perf_counter()
+    target = sqlite3.connect(tmp_path)
+    try:
+        with session.get_bind().connect() as conn:
+            total_pages = _copy(conn.connection.driver_connection, target, pages, sleep, progress)
+        # Snapshots are standalone files: no -wal/-shm companions
+        target.execute("PRAGMA journal_mode=DELETE")
+    finally:
+        target.close()
+
+    ok = integrity_check(tmp_path)
+    if not ok:
+        os.remove(tmp_path)
+        raise RuntimeError(f"Snapshot corrompido (integrity_check falhou): {tmp_path}")
+    os.replace(tmp_path, path)
+
+    return {
+        "path": path,
+        "seconds": time.perf_counter() - t0,
+        "bytes": os.path.getsize(path),
+        "pages": total_pages,
+        "integrity": ok,
+    }
+
+_executor: Optional[ThreadPoolExecutor] = None
+_executor_lock = threading.Lock()
+
+def start_snapshot(bind, directory: str, label: Optional[str] = None, prune: bool = True, **kwargs) -> Future:
+    """
+    Runs create_snapshot on `bind` (an Engine) in a background thread, one snapshot at a
+    time, and prunes `directory` afterwards unless prune=False. Returns a Future for
+    create_snapshot's dict (plus "pruned", the deleted paths); until it is done,
+    future.progress holds (pages copied, total pages) for polling.
+    """
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="lexfinance-snapshot")
+    future = Future()
+    future.progress = (0, 0)
+
+    def on_progress(done: int, total: int):
+        future.progress = (done, total)
+
+    def run():
+        if not future.set_running_or_notify_cancel():
+            return
+        try:
+            with Session(bind) as session:
+                info = create_snapshot(session, directory, label=label, progress=on_progress, **kwargs)
+            info["pruned"] = prune_snapshots(directory) if prune else []
+        except Exception as exc:
+            future.set_exception(exc)
+        else:
+            future.set_result(info)
+
+    _executor.submit(run)
+    return future
+
+def list_snapshots(directory: str) -> List[dict]:
+    """Snapshots in `directory`, newest first, as dicts with path, name, label (or None), created and bytes."""
+    if not os.path.isdir(directory):
+        return []
+    snapshots = []
+    for name in os.listdir(directory):
+        match = SNAPSHOT_PATTERN.match(name)
+        if not match:
+            continue
+        path = os.path.join(directory, name)
+        snapshots.append({
+            "path": path,
+            "name": name,
+            "label": match.group(2),
+            "created": datetime.strptime(match.group(1), TIMESTAMP_FORMAT),
+            "bytes": os.path.getsize(path),
+        })
+    return sorted(snapshots, key=lambda s: s["created"], reverse=True)
+
+def prune_snapshots(directory: str, keep_last: int = DEFAULT_RETENTION["keep_last"],
+                    keep_daily: int = DEFAULT_RETENTION["keep_daily"],
+                    keep_monthly: int = DEFAULT_RETENTION["keep_monthly"],
+                    keep_days: int = DEFAULT_RETENTION["keep_days"]) -> List[str]:
+    """
+    Applies the retention rules and deletes every snapshot not kept by at least one of them:
+    the keep_last newest, the newest of each of the keep_daily most recent days, the
+    newest of each of the keep_monthly most recent months and all from the last keep_days
+    days. Labelled snapshots were taken on purpose (before a restore, say): they are left
+    out of the rules and never deleted. Returns the deleted paths.
+    """
+    snapshots = [s for s in list_snapshots(directory) if s["label"] is None]
+    keep = {s["path"] for s in snapshots[:keep_last]}
+    cutoff = datetime.now() - timedelta(days=keep_days)
+    keep.update(s["path"] for s in snapshots if s["created"] >= cutoff)
+
+    for key_format, limit in (("%Y-%m-%d", keep_daily), ("%Y-%m", keep_monthly)):
+        seen = []
+        for s in snapshots:
+            key = s["created"].strftime(key_format)
+            if key in seen:
+                continue
+            if len(seen) >= limit:
+                break
+            seen.append(key)
+            keep.add(s["path"])
+
+    deleted = []
+    for s in snapshots:
+        if s["path"] not in keep:
+            os.remove(s["path"])
+            deleted.append(s["path"])
+    return deleted
+
+def restore_snapshot(session: Session, snapshot_path: str, pages: int = DEFAULT_STEP_PAGES,
+                     progress: Optional[ProgressCallback] = None) -> dict:
+    """
+    Overwrites the live database with a snapshot through the backup API (the database file
+    stays in place, open connections see the restored data on their next transaction).
+    The snapshot is integrity-checked first. Snapshots taken before a schema migration
+    get the missing tables, indexes, rollup triggers and search index afterwards. Returns a dict with seconds and pages.
+    """
+    if not integrity_check(snapshot_path):
+        raise RuntimeError(f"Snapshot corrompido (integrity_check falhou): {snapshot_path}")
+
+    t0 = time.perf_counter()
+    source = sqlite3.connect(f"file:{snapshot_path}?mode=ro", uri=True)
+    try:
+        with session.get_bind().connect() as conn:
+            total_pages = _copy(source, conn.connection.driver_connection, pages, 0, progress)
+        SQLModel.metadata.create_all(session.get_bind())
+        migrate_indexes(session.get_bind())
+        install_rollups(session.get_bind())
+        install_search_index(session.get_bind())
+    finally:
+        source.close()
+        bump(*ALL_TABLES)
+        # Results keyed by per-row counters (client_versions) could match the restored counters
+        clear_cache()
+    return {"seconds": time.perf_counter() - t0, "pages": total_pages}
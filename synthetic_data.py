@@ -0,0 +1,159 @@
+"""
+Synthetic law-firm datasets for benchmarks (bench_indexes.py, bench_services.py).
+
+Shapes the data like a real practice rather than uniform noise:
+- a few clients own most processes (Pareto weights);
+- every process has at least one phase, large cases have more;
+- activity grows over time: process start dates lean towards the end of the range;
+- payments arrive some months after the process starts, in installments;
+- expenses mix monthly recurring bills with one-off costs; recent ones may be pending.
+
+Rows are written with raw executemany on a fresh database, then the declared
+indexes, the rollup triggers and the search index are installed (which backfills
+the rollups and the index).
+"""
+import math
+import random
+from datetime import date, timedelta
+from typing import Optional
+
+from sqlmodel import SQLModel
+
+import models  # noqa: F401 (registers the tables in SQLModel.metadata)
+from database import migrate_indexes
+from services.bulk import chunked
+from services.rollup_service import install_rollups
+from services.search_service import install_search_index
+
+FIRST_NAMES = ["Ana", "Bruno", "Carla", "Diego", "Eduarda", "Felipe", "Gabriela", "Henrique", "Isabela", "João",
+               "Larissa", "Marcos", "Natália", "Otávio", "Paula", "Rafael", "Sofia", "Thiago", "Vanessa", "William"]
+LAST_NAMES = ["Silva", "Santos", "Oliveira", "Souza", "Lima", "Pereira", "Ferreira", "Costa", "Rodrigues", "Almeida",
+              "Nascimento", "Carvalho", "Araújo", "Ribeiro", "Gomes", "Martins", "Rocha", "Barbosa", "Moura", "Cardoso"]
+COMPANY_SUFFIXES = ["Ltda", "S.A.", "ME", "EIRELI", "Comércio Ltda", "Serviços Ltda"]
+RESPONSIBLES = ["Glauco", "Ana", "Bruno", "Carla", "Diego"]
+STATUSES = (["Ativo", "Encerrado", "Suspenso"], [70, 25, 5])
+CONDITIONS = (["Entrada", "Assinatura", "Sentença", "Êxito", "Mensal", None], [25, 15, 15, 20, 15, 10])
+RECURRING_EXPENSES = [("Aluguel", "Escritório", 450_000), ("Internet", "Escritório", 25_000), ("Software jurídico", "Sistemas", 60_000)]
+EXPENSE_CATEGORIES = ["Custas", "Diligências", "Deslocamento", "Cartório", "Geral", "Marketing"]
+
+INSERT_CHUNK = 50_000
+
+def drop_declared_indexes(engine):
+    with engine.begin() as conn:
+        for table in SQLModel.metadata.sorted_tables:
+            for index in table.indexes:
+                conn.exec_driver_sql(f"DROP INDEX IF EXISTS {index.name}")
+
+def generate(engine, clients: int, processes: int, phases: int, payments: int, expenses: int,
+             seed: int = 42, start: date = date(2015, 1, 1), end: date = date(2025, 12, 31),
+             with_indexes: bool = True, with_rollups: bool = True, with_search: bool = True, progress: Optional[callable] = None) -> dict:
+    """
+    Creates the schema on `engine` (an empty database) and fills it. `phases` is raised
+    to `processes` when lower, since every process gets one. With with_indexes=False
+    the declared indexes are left out (bench_indexes adds them itself); with_rollups=False
+    skips the rollup triggers and with_search=False the full-text index. Returns the
+    row counts actually written.
+    """
+    rnd = random.Random(seed)
+    phases = max(phases, processes)
+    span = (end - start).days
+    say = progress or (lambda message: None)
+
+    SQLModel.metadata.create_all(engine)
+    # Bulk loads are faster without indexes; they are built once at the end
+    drop_declared_indexes(engine)
+
+    def recent_day() -> int:
+        # Density grows linearly towards `end`: more recent activity
+        return int(span * math.sqrt(rnd.random()))
+
+    raw = engine.raw_connection()
+    try:
+        cur = raw.cursor()
+
+        say(f"clients: {clients:,}")
+        def client_rows():
+            for i in range(1, clients + 1):
+                if rnd.random() < 0.3:
+                    name = f"{rnd.choice(LAST_NAMES)} {rnd.choice(LAST_NAMES)} {rnd.choice(COMPANY_SUFFIXES)} {i}"
+                    doc = f"{rnd.randrange(10**13, 10**14):014d}"
+                else:
+                    name = f"{rnd.choice(FIRST_NAMES)} {rnd.choice(LAST_NAMES)} {rnd.choice(LAST_NAMES)} {i}"
+                    doc = f"{rnd.randrange(10**10, 10**11):011d}"
+                email = f"cliente{i}@exemplo.com.br" if rnd.random() < 0.7 else None
+                phone = f"(11) 9{rnd.randrange(10**7, 10**8)}" if rnd.random() < 0.8 else None
+                yield i, name, doc, email, phone
+        for chunk in chunked(client_rows(), INSERT_CHUNK):
+            cur.executemany("INSERT INTO clients (id, name, cpf_cnpj, email, phone) VALUES (?, ?, ?, ?, ?)", chunk)
+
+        say(f"processes: {processes:,}")
+        client_weights = [rnd.paretovariate(1.2) for _ in range(clients)]
+        process_client = rnd.choices(range(1, clients + 1), weights=client_weights, k=processes)
+        process_start = [recent_day() for _ in range(processes)]
+        def process_rows():
+            for i in range(1, processes + 1):
+                year = (start + timedelta(days=process_start[i - 1])).year
+                cnj = f"{rnd.randrange(10**7):07d}-{rnd.randrange(100):02d}.{year}.8.26.{rnd.randrange(10**4):04d}"
+                status = rnd.choices(*STATUSES)[0]
+                notes = "Acordo em negociação" if rnd.random() < 0.1 else None
+                yield i, process_client[i - 1], cnj, f"Ação {rnd.choice(['Cível', 'Trabalhista', 'Tributária', 'Previdenciária'])} {i}", rnd.choice(RESPONSIBLES), status, notes
+        for chunk in chunked(process_rows(), INSERT_CHUNK):
+            cur.executemany("INSERT INTO processes (id, client_id, cnj, title, responsible, status, notes) VALUES (?, ?, ?, ?, ?, ?, ?)", chunk)
+
+        say(f"phases: {phases:,}")
+        # One phase per process, the rest go to large cases first
+        process_weights = [rnd.paretovariate(1.5) for _ in range(processes)]
+        phase_process = list(range(1, processes + 1)) + rnd.choices(range(1, processes + 1), weights=process_weights, k=phases - processes)
+        phase_value = [int(rnd.lognormvariate(14.5, 1.0)) // 100 * 100 + 10_000 for _ in range(phases)]
+        def phase_rows():
+            for i in range(1, phases + 1):
+                yield i, phase_process[i - 1], f"Fase {i}", rnd.choices(*CONDITIONS)[0], phase_value[i - 1]
+        for chunk in chunked(phase_rows(), INSERT_CHUNK):
+            cur.executemany("INSERT INTO phases (id, process_id, description, condition, value_centavos) VALUES (?, ?, ?, ?, ?)", chunk)
+
+        say(f"payments: {payments:,}")
+        phase_weights = [rnd.paretovariate(2.0) for _ in range(phases)]
+        payment_phase = rnd.choices(range(1, phases + 1), weights=phase_weights, k=payments)
+        def payment_rows():
+            for phase_id in payment_phase:
+                first = process_start[phase_process[phase_id - 1] - 1]
+                day = min(span, first + int(rnd.expovariate(1 / 120)))
+                amount = max(1_000, phase_value[phase_id - 1] // rnd.randint(1, 12) // 100 * 100)
+                yield phase_id, amount, (start + timedelta(days=day)).isoformat()
+        for chunk in chunked(payment_rows(), INSERT_CHUNK):
+            cur.executemany("INSERT INTO payments (phase_id, amount_centavos, received_date) VALUES (?, ?, ?)", chunk)
+
+        say(f"expenses: {expenses:,}")
+        def expense_rows():
+            written = 0
+            month = date(start.year, start.month, 1)
+            while month <= end and written < expenses:
+                for description, category, amount in RECURRING_EXPENSES:
+                    if written >= expenses:
+                        break
+                    day = month + timedelta(days=4)
+                    yield f"{description} {month:%m/%Y}", amount, day.isoformat(), category, (end - day).days > 30 or rnd.random() < 0.5
+                    written += 1
+                month = date(month.year + month.month // 12, month.month % 12 + 1, 1)
+            for _ in range(expenses - written):
+                day = start + timedelta(days=recent_day())
+                yield (f"{rnd.choice(EXPENSE_CATEGORIES)} diversa", rnd.randrange(1_000, 300_000, 100), day.isoformat(),
+                       rnd.choice(EXPENSE_CATEGORIES), (end - day).days > 60 or rnd.random() < 0.6)
+        for chunk in chunked(expense_rows(), INSERT_CHUNK):
+            cur.executemany("INSERT INTO expenses (description, amount_centavos, date, category, paid) VALUES (?, ?, ?, ?, ?)", chunk)
+
+        raw.commit()
+    finally:
+        raw.close()
+
+    if with_indexes:
+        say("indexes")
+        migrate_indexes(engine)
+    if with_rollups:
+        say("rollups")
+        install_rollups(engine)
+    if with_search:
+        say("search index")
+        install_search_index(engine)
+
+    return {"clients": clients, "processes": processes, "phases": phases, "payments": payments, "expenses": expenses}
@@ -1,22 +1,110 @@
 import streamlit as st
 import pandas as pd
-from database import get_session
-from models import Client, Process, Phase, Payment
-from sqlmodel import select
+from datetime import date
+from database import engine, read_session, write_session, snapshot_dir
+from services.export_service import export_backup, export_backup_zip
+from services.import_service import import_backup, import_summary
+from services.rollup_service import reconcile_rollups
+from services.search_service import rebuild_search_index
+from services.snapshot_service import create_snapshot, list_snapshots, restore_snapshot, start_snapshot
+from ui.utils import download_zip
+
+@st.fragment(run_every=1.0)
+def _snapshot_progress():
+    job = st.session_state["snapshot_job"]
+    if not job.done():
+        done, total = job.progress
+        st.progress(done / total if total else 0.0, text=f"{done}/{total} páginas")
+        return
+    del st.session_state["snapshot_job"]
+    try:
+        info = job.result()
+    except Exception as exc:  # noqa: BLE001 (shown to the user)
+        st.session_state["snapshot_msg"] = ("error", f"Falha ao criar o snapshot: {exc}")
+    else:
+        st.session_state["snapshot_msg"] = ("success", f"Snapshot criado em {info['seconds']:.1f}s ({info['bytes'] / 1024 / 1024:.1f} MB). {len(info['pruned'])} antigo(s) removido(s).")
+    st.rerun()
 
 def show_backup():
     st.subheader("Backup & Exportação")
     
-    if st.button("Gerar CSVs"):
-        with next(get_session()) as session:
-            clients = session.exec(select(Client)).all()
-            processes = session.exec(select(Process)).all()
-            phases = session.exec(select(Phase)).all()
-            payments = session.exec(select(Payment)).all()
-            
-            pd.DataFrame([c.model_dump() for c in clients]).to_csv("clients.csv", index=False)
-            pd.DataFrame([p.model_dump() for p in processes]).to_csv("processes.csv", index=False)
-            pd.DataFrame([ph.model_dump() for ph in phases]).to_csv("phases.csv", index=False)
-            pd.DataFrame([pay.model_dump() for pay in payments]).to_csv("payments.csv", index=False)
-            
-            st.success("Arquivos CSV gerados na pasta do projeto.")
+    formats = {"CSV": "csv", "CSV compactado (.csv.gz)": "csv.gz", "Parquet": "parquet"}
+    fmt_label = st.selectbox("Formato", list(formats.keys()))
+    
+    c1, c2 = st.columns(2)
+    if c1.button("Gerar arquivos"):
+        with read_session() as session:
+            manifest = export_backup(session, ".", formats[fmt_label])
+        st.dataframe(pd.DataFrame.from_dict(manifest["tables"], orient="index"), use_container_width=True)
+        st.success("Arquivos e manifest.json gerados na pasta do projeto.")
+    
+    if c2.button("Gerar ZIP"):
+        with read_session() as session:
+            download_zip("Baixar ZIP", lambda target: export_backup_zip(session, target, formats[fmt_label]),
+                         file_name=f"lexfinance_backup_{date.today().isoformat()}.zip")
+
+    st.markdown("---")
+    st.subheader("Importar Backup")
+    st.caption("Lê clients, processes, phases, payments e expenses (.csv, .csv.gz ou .parquet) da pasta informada.")
+    folder = st.text_input("Pasta dos arquivos", value=".")
+    
+    if st.button("Importar"):
+        with write_session() as session:
+            with st.spinner("Importando..."):
+                reports = import_backup(session, folder)
+        
+        if not reports:
+            st.warning("Nenhum arquivo de backup encontrado na pasta.")
+        else:
+            st.dataframe(import_summary(reports), use_container_width=True)
+            for r in reports:
+                if r["errors"]:
+                    with st.expander(f"Linhas rejeitadas em {r['file']} ({r['rejected']})"):
+                        st.dataframe(pd.DataFrame(r["errors"], columns=["Linha", "Motivo"]), use_container_width=True)
+            st.success("Importação concluída.")
+
+    st.markdown("---")
+    st.subheader("Snapshots do Banco")
+    st.caption(f"Backup online de 'lexfinance.db' (pode ser feito com o app em uso). Pasta: '{snapshot_dir}'.")
+    
+    # Copied in the background; the fragment below polls the progress
+    if st.button("Criar Snapshot", disabled="snapshot_job" in st.session_state):
+        st.session_state["snapshot_job"] = start_snapshot(engine, snapshot_dir)
+    if "snapshot_job" in st.session_state:
+        _snapshot_progress()
+    if "snapshot_msg" in st.session_state:
+        kind, msg = st.session_state.pop("snapshot_msg")
+        getattr(st, kind)(msg)
+    
+    snapshots = list_snapshots(snapshot_dir)
+    if snapshots:
+        st.dataframe(pd.DataFrame([{"Snapshot": s["name"], "Criado em": s["created"], "Tamanho (MB)": round(s["bytes"] / 1024 / 1024, 2)} for s in snapshots]), use_container_width=True)
+        
+        with st.expander("Restaurar Snapshot"):
+            snap_map = {s["name"]: s["path"] for s in snapshots}
+            sel_snap = st.selectbox("Snapshot", list(snap_map.keys()))
+            confirm = st.checkbox("Confirmo que desejo substituir os dados atuais.")
+            if st.button("Restaurar") and confirm:
+                with write_session() as session:
+                    create_snapshot(session, snapshot_dir, label="pre-restore")
+                    restore_snapshot(session, snap_map[sel_snap])
+                st.success("Snapshot restaurado.")
+                st.rerun()
+
+    st.markdown("---")
+    st.subheader("Conferir Saldos")
+    st.caption("Recalcula os saldos consolidados por fase, processo e cliente e corrige divergências.")
+    if st.button("Conferir e corrigir saldos"):
+        with write_session() as session:
+            drift = reconcile_rollups(session)
+        if drift.empty:
+            st.success("Saldos conferem com os lançamentos.")
+        else:
+            st.dataframe(drift, use_container_width=True)
+            st.warning(f"{len(drift)} divergência(s) corrigida(s).")
+
+    st.caption("Reconstrói o índice de busca de clientes e processos.")
+    if st.button("Reindexar busca"):
+        with write_session() as session:
+            rebuild_search_index(session)
+        st.success("Índice de busca reconstruído.")
@@ -1,12 +1,14 @@
 import streamlit as st
-from services.client_service import create_client, get_all_clients
-from database import get_session
+from services.client_service import create_client, list_clients
+from database import read_session
+from write_queue import write
+from ui.utils import paginate
 import pandas as pd
 
 def show_clients():
     st.subheader("Clientes")
     
-    with next(get_session()) as session:
+    with read_session() as session:
         with st.form("novo_cliente"):
             st.markdown("**Cadastrar Cliente**")
             name = st.text_input("Nome *")
@@ -16,14 +18,18 @@ def show_clients():
             submitted = st.form_submit_button("Salvar")
             
             if submitted and name.strip():
-                create_client(session, name.strip(), cpf.strip(), email.strip(), phone.strip())
+                write(create_client, name.strip(), cpf.strip(), email.strip(), phone.strip())
                 st.success("Cliente salvo.")
                 st.rerun()
         
         st.markdown("---")
-        clients = get_all_clients(session)
+        busca = st.text_input("Buscar cliente (nome ou CPF/CNPJ)", key="busca_clientes")
+        page = paginate("pag_clientes", lambda cursor, size: list_clients(session, busca, cursor, size), filters=(busca,))
+        clients = page.items
         if clients:
             data = [{"ID": c.id, "Nome": c.name, "CPF/CNPJ": c.cpf_cnpj, "Email": c.email, "Telefone": c.phone} for c in clients]
             st.dataframe(pd.DataFrame(data), use_container_width=True)
+        elif busca:
+            st.info("Nenhum cliente encontrado.")
         else:
             st.info("Nenhum cliente cadastrado.")
@@ -1,22 +1,21 @@
 import streamlit as st
-from services.finance_service import get_global_financials, get_firm_revenue_by_month
-from services.process_service import get_all_processes
-from services.finance_service import get_process_financials
-from ui.utils import money
-from database import get_session
+from services.finance_service import get_global_financials, get_firm_revenue_by_month, get_portfolio_financials
+from services.forecast_service import get_cash_flow_forecast, forecast_table
+from services.money import format_brl, to_reais
+from database import read_session
 import pandas as pd
 
 def show_dashboard():
     st.subheader("Visão geral")
     
-    with next(get_session()) as session:
+    with read_session() as session:
         # KPIs
         total_contratado, total_recebido, saldo = get_global_financials(session)
         
         col1, col2, col3 = st.columns(3)
-        col1.metric("Total Contratado", money(total_contratado))
-        col2.metric("Total Recebido", money(total_recebido))
-        col3.metric("Saldo a Receber", money(saldo))
+        col1.metric("Total Contratado", format_brl(total_contratado))
+        col2.metric("Total Recebido", format_brl(total_recebido))
+        col3.metric("Saldo a Receber", format_brl(saldo))
         
         st.markdown("---")
         
@@ -30,28 +29,42 @@ def show_dashboard():
             st.bar_chart(dfm.set_index("mes")["Recebido"])
             
         st.markdown("---")
+        show_forecast()
+        st.markdown("---")
         
         # Processes with Balance
         st.subheader("Processos com saldo a receber")
-        processes = get_all_processes(session)
-        
-        data = []
-        for p in processes:
-            tot, rec, sal, pct = get_process_financials(session, p.id)
-            if sal > 0: # Only show if there is balance
-                data.append({
-                    "Cliente": p.client.name,
-                    "Processo": p.title,
-                    "Responsável": p.responsible,
-                    "Status": p.status,
-                    "Total Contrato": tot/100,
-                    "Recebido": rec/100,
-                    "Saldo": sal/100,
-                    "% Recebido": round(pct*100, 2)
-                })
+        df_fin = get_portfolio_financials(session)
+        df_fin = df_fin[df_fin["balance"] > 0] # Only show if there is balance
         
-        if not data:
+        if df_fin.empty:
              st.info("Nenhum processo com saldo pendente.")
         else:
-            df_proc = pd.DataFrame(data)
+            df_proc = pd.DataFrame({
+                "Cliente": df_fin["client_name"],
+                "Processo": df_fin["title"],
+                "Responsável": df_fin["responsible"],
+                "Status": df_fin["status"],
+                "Total Contrato": to_reais(df_fin["total_contracted"]),
+                "Recebido": to_reais(df_fin["total_received"]),
+                "Saldo": to_reais(df_fin["balance"]),
+                "% Recebido": (df_fin["pct"] * 100).round(2)
+            })
             st.dataframe(df_proc, use_container_width=True)
+
+@st.fragment
+def show_forecast():
+    # A fragment: changing the horizon reruns only this section
+    st.subheader("Previsão de caixa")
+    months = st.selectbox("Horizonte", [6, 12, 24], index=1, format_func=lambda m: f"{m} meses")
+    with read_session() as session:
+        df = get_cash_flow_forecast(session, months=months)
+
+    col1, col2, col3 = st.columns(3)
+    col1.metric("Receita prevista", format_brl(df["inflow"].sum()))
+    col2.metric("Despesas previstas", format_brl((df["recurring"] + df["scheduled"]).sum()))
+    col3.metric("Saldo previsto", format_brl(df["cumulative"].iloc[-1]))
+    table = forecast_table(df).set_index("Mês")
+    st.line_chart(table[["Receita prevista", "Saldo acumulado"]])
+    st.dataframe(table, use_container_width=True)
+    st.caption("Processos sem nenhum recebimento não entram na previsão (não há data de início).")
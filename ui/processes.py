@@ -1,15 +1,16 @@
 import streamlit as st
-from services.client_service import get_all_clients
-from services.process_service import create_process, get_all_processes, update_process, delete_process
-from database import get_session
+from services.client_service import get_client_options
+from services.process_service import create_process, list_processes, update_process, delete_process
+from database import read_session
+from write_queue import write
+from ui.utils import paginate
 import pandas as pd
 
 def show_processes():
     st.subheader("Processos")
     
-    with next(get_session()) as session:
-        clients = get_all_clients(session)
-        client_map = {c.name: c.id for c in clients}
+    with read_session() as session:
+        client_map = {name: cid for cid, name in get_client_options(session)}
         
         if not client_map:
             st.info("Cadastre um cliente primeiro.")
@@ -26,12 +27,21 @@ def show_processes():
             ok = st.form_submit_button("Salvar")
             
             if ok and title.strip():
-                create_process(session, client_map[cliente_nome], title.strip(), cnj.strip(), responsible.strip(), status, notes.strip())
+                write(create_process, client_map[cliente_nome], title.strip(), cnj.strip(), responsible.strip(), status, notes.strip())
                 st.success("Processo salvo.")
                 st.rerun()
 
         st.markdown("---")
-        processes = get_all_processes(session)
+        c1, c2, c3 = st.columns(3)
+        busca = c1.text_input("Buscar (título ou CNJ)", key="busca_processos")
+        resp = c2.text_input("Responsável", key="filtro_resp_processos")
+        status_f = c3.selectbox("Status", ["Todos", "Ativo", "Encerrado", "Suspenso"], key="filtro_status_processos")
+        status_f = None if status_f == "Todos" else status_f
+        
+        page = paginate("pag_processos",
+                        lambda cursor, size: list_processes(session, busca, responsible=resp, status=status_f, cursor=cursor, page_size=size),
+                        filters=(busca, resp, status_f))
+        processes = page.items
         
         if processes:
             data = [{
@@ -57,8 +67,8 @@ def show_processes():
             c1, c2 = st.columns(2)
             with c1:
                 if st.button("Excluir Processo"):
-                    delete_process(session, sel_proc_id)
+                    write(delete_process, sel_proc_id)
                     st.success("Processo excluído.")
                     st.rerun()
         else:
-            st.info("Nenhum processo cadastrado.")
+            st.info("Nenhum processo encontrado.")
@@ -1,30 +1,64 @@
 import streamlit as st
-from services.process_service import get_all_processes
-from services.finance_service import get_process_financials
-from database import get_session
+from datetime import date
+from services.finance_service import get_portfolio_financials
+from services.receivables_service import AGING_LABELS, get_receivables_aging, aging_table, aging_csv
+from services.money import format_brl, to_reais
+from database import read_session
 import pandas as pd
 
 def show_reports():
     st.subheader("Relatórios")
+    tab_portfolio, tab_aging = st.tabs(["Carteira", "Aging de recebíveis"])
     
-    with next(get_session()) as session:
-        processes = get_all_processes(session)
-        
-        data = []
-        for p in processes:
-            tot, rec, sal, pct = get_process_financials(session, p.id)
-            data.append({
-                "Cliente": p.client.name,
-                "Processo": p.title,
-                "Responsável": p.responsible,
-                "Total Contrato": tot/100,
-                "Recebido": rec/100,
-                "Saldo": sal/100,
-                "% Recebido": round(pct*100, 2)
-            })
-            
-        if data:
-            df = pd.DataFrame(data)
-            st.dataframe(df, use_container_width=True)
-        else:
-            st.info("Sem dados para relatório.")
+    with tab_portfolio:
+        show_portfolio()
+
+    with tab_aging:
+        show_aging()
+
+# Each tab is a fragment: its filters rerun only that tab's query
+
+@st.fragment
+def show_portfolio():
+    busca = st.text_input("Buscar (cliente, CPF/CNPJ, processo, CNJ ou observações)")
+    with read_session() as session:
+        df_fin = get_portfolio_financials(session, search=busca)
+
+    if not df_fin.empty:
+        df = pd.DataFrame({
+            "Cliente": df_fin["client_name"],
+            "Processo": df_fin["title"],
+            "Responsável": df_fin["responsible"],
+            "Total Contrato": to_reais(df_fin["total_contracted"]),
+            "Recebido": to_reais(df_fin["total_received"]),
+            "Saldo": to_reais(df_fin["balance"]),
+            "% Recebido": (df_fin["pct"] * 100).round(2)
+        })
+        st.dataframe(df, use_container_width=True)
+    else:
+        st.info("Sem dados para relatório.")
+
+@st.fragment
+def show_aging():
+    c1, c2 = st.columns([1, 2])
+    as_of = c1.date_input("Posição em", value=date.today())
+    por = c2.radio("Agrupar por", ["Cliente", "Responsável"], horizontal=True)
+    group_by = "client" if por == "Cliente" else "responsible"
+    with read_session() as session:
+        df = get_receivables_aging(session, group_by, as_of.isoformat())
+    st.caption("Idade contada desde o último recebimento da fase; fases sem recebimento contam desde o primeiro recebimento do processo.")
+
+    if df.empty:
+        st.info("Nenhum saldo em aberto.")
+        return
+
+    totals = df[list(AGING_LABELS)].sum()
+    for col, (key, value) in zip(st.columns(len(totals)), totals.items()):
+        col.metric(AGING_LABELS[key], format_brl(value))
+    st.dataframe(aging_table(df), use_container_width=True, hide_index=True)
+    st.download_button(
+        label="Exportar CSV",
+        data=aging_csv(df),
+        file_name=f"aging_{group_by}_{as_of.isoformat()}.csv",
+        mime="text/csv"
+    )
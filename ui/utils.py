@@ -1,11 +1,62 @@
-from typing import Optional
+import math
+import os
+import tempfile
+from typing import Callable, Optional
 
-def money(cents_val: Optional[int]) -> str:
-    if cents_val is None:
-        cents_val = 0
-    return f"R$ {cents_val/100:,.2f}".replace(",", "X").replace(".", ",").replace("X", ".")
+import streamlit as st
+from streamlit.errors import StreamlitAPIException
 
-def cents(n: Optional[float]) -> int:
-    if n is None:
-        return 0
-    return int(round(float(n) * 100))
+from services.pagination import Page, DEFAULT_PAGE_SIZE
+
+def rerun_fragment():
+    """
+    Reruns only the calling fragment, for changes nothing outside it depends on.
+    Streamlit allows that only while the fragment reruns on its own; when it ran as
+    part of the whole page (or outside any fragment) the page reruns instead.
+    """
+    try:
+        st.rerun(scope="fragment")
+    except StreamlitAPIException:
+        st.rerun()
+
+def download_zip(label: str, build: Callable, file_name: str):
+    """
+    Builds a zip with `build(stream)` in a temporary file on disk, not in memory, and
+    offers it with a download button; returns what `build` returned. The file is
+    removed once Streamlit has taken the download.
+    """
+    with tempfile.NamedTemporaryFile(prefix="lexfinance_", suffix=".zip", delete=False) as tmp:
+        path = tmp.name
+    try:
+        with open(path, "wb") as f:
+            result = build(f)
+        with open(path, "rb") as f:
+            st.download_button(label=label, data=f, file_name=file_name, mime="application/zip")
+    finally:
+        os.remove(path)
+    return result
+
+def paginate(key: str, fetch: Callable[[Optional[tuple], int], Page], filters: tuple = (),
+             page_size: int = DEFAULT_PAGE_SIZE) -> Page:
+    """
+    Shows one page of a keyset-paginated listing with Anterior/Próxima buttons and
+    returns it. `fetch(cursor, page_size)` loads a page; the cursors of the pages
+    visited so far live in st.session_state[key], and new `filters` restart at page 1.
+    """
+    state = st.session_state.get(key)
+    if state is None or state["filters"] != filters:
+        state = st.session_state[key] = {"filters": filters, "cursors": [None]}
+
+    page = fetch(state["cursors"][-1], page_size)
+    number = len(state["cursors"])
+    pages = max(1, math.ceil(page.total / page_size))
+
+    c1, c2, c3 = st.columns([1, 1, 4])
+    if c1.button("← Anterior", key=f"{key}_prev", disabled=number == 1):
+        state["cursors"].pop()
+        rerun_fragment()
+    if c2.button("Próxima →", key=f"{key}_next", disabled=page.next_cursor is None):
+        state["cursors"].append(page.next_cursor)
+        rerun_fragment()
+    c3.caption(f"Página {number} de {pages} — {page.total} registro(s)")
+    return page
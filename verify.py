@@ -6,7 +6,7 @@ sys.path.append(os.getcwd())
 
 try:
     print("Importing modules...")
-    from database import create_db_and_tables, get_session
+    from database import create_db_and_tables, read_session
     from models import Client, Process
     from services.client_service import create_client, get_all_clients
     
@@ -14,7 +14,7 @@ try:
     create_db_and_tables()
     
     print("Testing Client Service...")
-    with next(get_session()) as session:
+    with read_session() as session:
         # Check if we can query (even if empty)
         clients = get_all_clients(session)
         print(f"Clients found: {len(clients)}")
@@ -0,0 +1,91 @@
+from sqlalchemy import text
+from sqlmodel import Session
+from database import create_db_and_tables, engine
+from services import client_service, process_service, finance_service, rollup_service, receivables_service
+
+AS_OF = "2030-06-30"
+BUCKETS = ["d0_30", "d31_60", "d61_90", "d90_plus", "no_payments", "total_open"]
+
+def client_row(session, client_id: int, as_of: str = AS_OF) -> list:
+    df = receivables_service.get_receivables_aging(session, "client", as_of)
+    return df[df["client_id"] == client_id][BUCKETS].iloc[0].tolist()
+
+def responsible_rows(session) -> dict:
+    df = receivables_service.get_receivables_aging(session, "responsible", AS_OF)
+    df = df[df["responsible"].str.startswith("Aging Resp")]
+    return {row["responsible"]: [row[c] for c in BUCKETS] for _, row in df.iterrows()}
+
+def verify_aging():
+    print("Initializing DB...")
+    create_db_and_tables()
+
+    with Session(engine) as session:
+        print("Creating Test Data...")
+        client = client_service.create_client(session, "Aging Client", "771", None, None)
+        proc = process_service.create_process(session, client.id, "Aging Process", responsible="Aging Resp X")
+        unpaid = process_service.create_process(session, client.id, "Aging Unpaid", responsible="Aging Resp Y")
+        other = process_service.create_process(session, client.id, "Aging Other", responsible="Aging Resp X")
+
+        ph1 = process_service.create_phase(session, proc.id, "Recent", 100000)
+        latest = finance_service.create_payment(session, ph1.id, 30000, "2030-06-20")
+        finance_service.create_payment(session, ph1.id, 10000, "2030-01-01")
+        ph2 = process_service.create_phase(session, proc.id, "Paid", 50000)
+        finance_service.create_payment(session, ph2.id, 50000, "2030-05-01")
+        process_service.create_phase(session, proc.id, "Not started", 20000)
+        ph4 = process_service.create_phase(session, proc.id, "Partial", 30000)
+        partial = finance_service.create_payment(session, ph4.id, 5000, "2030-05-15")
+        process_service.create_phase(session, unpaid.id, "Never paid", 40000)
+        ph6 = process_service.create_phase(session, other.id, "Older", 10000)
+        finance_service.create_payment(session, ph6.id, 1000, "2030-04-15")
+
+        try:
+            print("Checking buckets...")
+            # 10 days since the last payment; 46; 76; the unpaid phase of a process
+            # counts from the process's first payment (180 days); no payment at all
+            assert client_row(session, client.id) == [60000, 25000, 9000, 20000, 40000, 154000]
+            assert responsible_rows(session) == {
+                "Aging Resp X": [60000, 25000, 9000, 20000, 0, 114000],
+                "Aging Resp Y": [0, 0, 0, 0, 40000, 40000],
+            }
+            # As of an earlier date, later payments count neither for balances nor for ages
+            assert client_row(session, client.id, "2029-12-31") == [0, 0, 0, 0, 250000, 250000]
+            # Phase 1 owes 90000 since 2030-01-01 and "Not started"/"Partial" count from
+            # there too (129 days); "Older" owes 9000 since 2030-04-15; "Paid" is closed
+            assert client_row(session, client.id, "2030-05-10") == [9000, 0, 0, 140000, 40000, 189000]
+
+            print("Checking payment changes...")
+            finance_service.delete_payment(session, latest.id)
+            finance_service.update_payment(session, partial.id, received_date="2030-06-25")
+            assert client_row(session, client.id) == [25000, 0, 9000, 110000, 40000, 184000]
+            rollup_service.rebuild_rollups(session)
+            assert client_row(session, client.id) == [25000, 0, 9000, 110000, 40000, 184000]
+
+            print("Checking reconcile...")
+            assert rollup_service.reconcile_rollups(session, repair=False).empty
+            session.execute(text("UPDATE phase_payment_dates SET last_paid_date = '2000-01-01' WHERE phase_id = :id"), {"id": ph4.id})
+            session.commit()
+            drift = rollup_service.reconcile_rollups(session, repair=True)
+            assert drift[["table", "id", "column", "expected"]].values.tolist() == [["phase_payment_dates", ph4.id, "last_paid_date", "2030-06-25"]]
+            assert rollup_service.reconcile_rollups(session, repair=False).empty
+
+            print("Checking CSV export...")
+            df = receivables_service.get_receivables_aging(session, "client", AS_OF)
+            csv = receivables_service.aging_csv(df[df["client_id"] == client.id]).decode("utf-8-sig").splitlines()
+            assert csv[0] == "ID;Cliente;0–30 dias;31–60 dias;61–90 dias;90+ dias;Sem pagamentos;Total em aberto"
+            assert csv[1] == f"{client.id};Aging Client;250,00;0,00;90,00;1100,00;400,00;1840,00"
+
+            try:
+                receivables_service.get_receivables_aging(session, "process")
+            except ValueError:
+                pass
+            else:
+                raise AssertionError("Agrupamento inválido deveria falhar")
+        finally:
+            print("Cleaning up...")
+            client_service.delete_client(session, client.id)
+            assert rollup_service.reconcile_rollups(session, repair=False).empty
+
+    print("Verification Successful!")
+
+if __name__ == "__main__":
+    verify_aging()
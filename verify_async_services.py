@@ -0,0 +1,97 @@
+import asyncio
+import threading
+from sqlalchemy.exc import IntegrityError
+import async_services
+from database import create_db_and_tables, read_session
+from services import client_service, process_service, finance_service, forecast_service
+from write_queue import get_write_queue, write
+
+def expect_error(error, call, fn, *args, **kwargs):
+    try:
+        call(fn, *args, **kwargs)
+    except error:
+        pass
+    else:
+        raise AssertionError(f"{fn.__name__} deveria falhar com {error.__name__}")
+
+def scenario(read, write):
+    """The same checks for both layers: read/write run a sync service function through the layer under test."""
+    client = write(client_service.create_client, "Async Verify Client", "881", None, None)
+    try:
+        proc = write(process_service.create_process, client.id, "Async Verify Process")
+        phase = write(process_service.create_phase, proc.id, "Fase 1", 300000, condition="Entrada")
+        pay = write(finance_service.create_payment, phase.id, 100000, "2093-01-10")
+        assert write(finance_service.update_payment, pay.id, amount_centavos=120000).amount_centavos == 120000
+
+        assert read(finance_service.get_process_financials, proc.id) == (300000, 120000, 180000, 0.4)
+        page = read(client_service.list_clients, search="Async Verify Client")
+        assert [c.id for c in page.items] == [client.id] and page.total == 1
+        assert [p.description for p in read(process_service.get_phases_by_process, proc.id)] == ["Fase 1"]
+        rows = read(finance_service.get_payments_by_process, proc.id)
+        assert [(p.amount_centavos, ph.id) for p, ph in rows] == [(120000, phase.id)]
+        df = read(finance_service.get_phase_financials, proc.id)
+        assert df["balance_centavos"].tolist() == [180000]
+        graph = read(client_service.get_client_report_graph, client.id)
+        assert graph.processes[0].phases[0].payments[0].amount_centavos == 120000
+
+        expect_error(ValueError, read, forecast_service.get_cash_flow_forecast, months=0)
+        expect_error(IntegrityError, write, finance_service.create_payment, 999999999, 1, "2093-01-10")
+
+        write(finance_service.delete_payment, pay.id)
+        assert read(finance_service.get_process_financials, proc.id)[1] == 0
+    finally:
+        write(client_service.delete_client, client.id)
+    assert read(client_service.list_clients, search="Async Verify Client").total == 0
+
+def sync_read(fn, *args, **kwargs):
+    with read_session() as session:
+        return fn(session, *args, **kwargs)
+
+def verify_async_services():
+    print("Initializing DB...")
+    create_db_and_tables()
+
+    print("Checking sync layer...")
+    scenario(sync_read, write)
+
+    print("Checking async layer...")
+    loop = asyncio.new_event_loop()
+    try:
+        def via_async(fn, *args, **kwargs):
+            # The async counterpart of a sync service function, e.g. async_services.finance_service.create_payment
+            service = getattr(async_services, fn.__module__.rsplit(".", 1)[-1])
+            return loop.run_until_complete(getattr(service, fn.__name__)(*args, **kwargs))
+        scenario(via_async, via_async)
+
+        print("Checking concurrent requests...")
+        client = loop.run_until_complete(async_services.client_service.create_client("Async Verify Load", "882", None, None))
+        proc = loop.run_until_complete(async_services.process_service.create_process(client.id, "Async Verify Load"))
+        phase = loop.run_until_complete(async_services.process_service.create_phase(proc.id, "Fase 1", 1000000))
+        try:
+            threads_before = threading.active_count()
+            batches_before = get_write_queue().stats()["batches"]
+
+            async def requests():
+                reads = [async_services.finance_service.get_phase_financials(proc.id) for _ in range(200)]
+                writes = [async_services.finance_service.create_payment(phase.id, 100, "2093-02-01") for _ in range(50)]
+                return await asyncio.gather(*reads, *writes)
+
+            results = loop.run_until_complete(requests())
+            assert len(results) == 250
+            # Reads share the read pool; waiting writes hold no thread
+            pool = async_services.database.POOL_SIZE + async_services.database.POOL_OVERFLOW
+            assert threading.active_count() <= threads_before + pool, threading.active_count()
+            assert get_write_queue().stats()["batches"] - batches_before < 50
+            financials = loop.run_until_complete(async_services.finance_service.get_process_financials(proc.id))
+            assert financials[1] == 50 * 100
+        finally:
+            print("Cleaning up...")
+            loop.run_until_complete(async_services.client_service.delete_client(client.id))
+    finally:
+        loop.close()
+        async_services.shutdown()
+
+    print("Verification Successful!")
+
+if __name__ == "__main__":
+    verify_async_services()
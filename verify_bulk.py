@@ -0,0 +1,73 @@
+import time
+import pandas as pd
+from sqlmodel import Session, select, func
+from database import create_db_and_tables, engine
+from services import client_service, process_service, finance_service, expense_service
+from models import Payment, Expense
+
+N_PAYMENTS = 20000
+
+def verify_bulk():
+    print("Initializing DB...")
+    create_db_and_tables()
+
+    with Session(engine) as session:
+        print("Creating Clients/Processes/Phases in bulk...")
+        client_ids = client_service.create_clients_bulk(session, [{"name": "Bulk Client A"}, {"name": "Bulk Client B", "cpf_cnpj": "1"}], return_ids=True)
+        assert len(client_ids) == 2
+
+        proc_ids = process_service.create_processes_bulk(session, pd.DataFrame({
+            "client_id": client_ids,
+            "title": ["Bulk Process A", "Bulk Process B"],
+        }), return_ids=True)
+        phase_ids = process_service.create_phases_bulk(session, [
+            {"process_id": pid, "description": f"Bulk Phase {i}", "value_centavos": 1000000}
+            for i, pid in enumerate(proc_ids)
+        ], return_ids=True)
+        assert process_service.get_phases_by_process(session, proc_ids[1])[0].id == phase_ids[1]
+
+        print(f"Creating {N_PAYMENTS} Payments in bulk...")
+        df = pd.DataFrame({
+            "phase_id": [phase_ids[i % 2] for i in range(N_PAYMENTS)],
+            "amount_centavos": [100] * N_PAYMENTS,
+            "received_date": pd.date_range("2024-01-01", periods=N_PAYMENTS, freq="h"),
+        })
+        t0 = time.perf_counter()
+        count = finance_service.create_payments_bulk(session, df)
+        print(f"Inserted {count} payments in {time.perf_counter() - t0:.2f}s")
+        assert count == N_PAYMENTS
+
+        tot, rec, _, _ = finance_service.get_process_financials(session, proc_ids[0])
+        assert rec == (N_PAYMENTS // 2) * 100
+
+        print("Checking foreign key validation...")
+        before = session.exec(select(func.count(Payment.id))).one()
+        try:
+            finance_service.create_payments_bulk(session, [
+                {"phase_id": phase_ids[0], "amount_centavos": 1, "received_date": "2025-01-01"},
+                {"phase_id": -1, "amount_centavos": 1, "received_date": "2025-01-01"},
+            ])
+            raise AssertionError("invalid phase_id accepted")
+        except ValueError as e:
+            print(f"Rejected as expected: {e}")
+        assert session.exec(select(func.count(Payment.id))).one() == before
+
+        print("Creating Expenses in bulk...")
+        exp_ids = expense_service.create_expenses_bulk(session, [
+            {"description": "Bulk Rent", "amount_centavos": 5000, "date": "2025-01-10"},
+            {"description": "Bulk Tax", "amount_centavos": 7000, "date": "2025-01-11", "paid": "False"},
+        ], return_ids=True)
+        exps = [session.get(Expense, i) for i in exp_ids]
+        assert exps[0].paid is True and exps[0].category == "Geral"
+        assert exps[1].paid is False
+
+        print("Cleaning up...")
+        for eid in exp_ids:
+            expense_service.delete_expense(session, eid)
+        for cid in client_ids:
+            client_service.delete_client(session, cid)
+
+    print("Verification Successful!")
+
+if __name__ == "__main__":
+    verify_bulk()
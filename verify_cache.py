@@ -0,0 +1,53 @@
+from sqlmodel import Session
+from database import create_db_and_tables, engine
+from services import client_service, process_service, finance_service, cache
+
+def verify_cache():
+    print("Initializing DB...")
+    create_db_and_tables()
+    cache.set_cache_enabled(True)
+    cache.clear_cache()
+
+    with Session(engine) as session:
+        print("Creating Test Data...")
+        client = client_service.create_client(session, "Cache Client", "777", "cache@test.com", "777")
+        proc = process_service.create_process(session, client.id, "Cache Process")
+        phase = process_service.create_phase(session, proc.id, "Phase 1", 100000)
+
+        print("Checking hits...")
+        before = cache.cache_stats()
+        first = finance_service.get_process_financials(session, proc.id)
+        second = finance_service.get_process_financials(session, proc.id)
+        after = cache.cache_stats()
+        assert first == second == (100000, 0, 100000, 0.0)
+        assert after["misses"] == before["misses"] + 1
+        assert after["hits"] == before["hits"] + 1
+
+        print("Checking invalidation on write...")
+        finance_service.create_payment(session, phase.id, 40000, "2025-03-01")
+        assert finance_service.get_process_financials(session, proc.id) == (100000, 40000, 60000, 0.4)
+
+        df = finance_service.get_portfolio_financials(session, client_id=client.id)
+        df["total_received"] = 0  # callers get a copy, the cached frame must not change
+        assert finance_service.get_portfolio_financials(session, client_id=client.id).iloc[0]["total_received"] == 40000
+
+        assert (client.id, "Cache Client") in client_service.get_client_options(session)
+        client_service.update_client(session, client.id, name="Cache Client Renamed")
+        assert (client.id, "Cache Client Renamed") in client_service.get_client_options(session)
+
+        print("Checking eviction...")
+        cache.set_cache_size(2)
+        for status in ("Ativo", "Encerrado", "Suspenso"):
+            finance_service.get_portfolio_financials(session, status=status)
+        stats = cache.cache_stats()
+        assert stats["entries"] == 2 and stats["evictions"] > 0
+        print(stats)
+
+        print("Cleaning up...")
+        client_service.delete_client(session, client.id)
+        assert not any(cid == client.id for cid, _ in client_service.get_client_options(session))
+
+    print("Verification Successful!")
+
+if __name__ == "__main__":
+    verify_cache()
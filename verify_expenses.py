@@ -30,7 +30,19 @@ def verify_expenses():
         # Should have one entry for 2025-01 with 2000.00
         assert not df.empty
         assert df.iloc[0]["Despesas"] == 2000.00
-        
+
+        print("Checking Date Range and Granularity...")
+        df_q = expense_service.get_expenses_by_month(session, start="2025-01-01", end="2025-01-31", granularity="quarter")
+        print(df_q)
+        assert list(df_q["trimestre"]) == ["2025-T1"]
+        assert df_q.iloc[0]["Despesas"] == 2000.00
+
+        df_cash = finance_service.get_cash_flow(session, start="2025-01-01", end="2025-01-31")
+        print(df_cash)
+        row = df_cash[df_cash["mes"] == "2025-01"].iloc[0]
+        assert row["Despesas"] == 2000.00
+        assert row["Saldo"] == row["Recebido"] - row["Despesas"]
+
         print("Cleaning up...")
         expense_service.delete_expense(session, exp1.id)
         expense_service.delete_expense(session, exp2.id)
@@ -0,0 +1,66 @@
+import hashlib
+import json
+import math
+import os
+import shutil
+import tempfile
+import zipfile
+import pyarrow.parquet as pq
+from database import create_db_and_tables, read_session, unit_of_work
+from services import client_service, export_service
+
+CHUNK = 500
+
+def verify_export():
+    print("Initializing DB...")
+    create_db_and_tables()
+
+    with unit_of_work() as session:
+        client_ids = client_service.create_clients_bulk(
+            session, [{"name": f"Export Client {i}", "document": f"66{i}"} for i in range(3 * CHUNK)], return_ids=True)
+
+    tmpdir = tempfile.mkdtemp(prefix="lexfinance_export_")
+    sink_writes = {}
+    write = export_service._HashingWriter.write
+    def recording_write(self, data):
+        sink_writes.setdefault(self, []).append(len(data))
+        return write(self, data)
+    try:
+        print("Checking Parquet streams one row group per chunk...")
+        export_service._HashingWriter.write = recording_write
+        with read_session() as session:
+            manifest = export_service.export_backup(session, tmpdir, "parquet", chunk_size=CHUNK)
+        export_service._HashingWriter.write = write
+        clients = manifest["tables"]["clients"]
+        assert clients["rows"] >= 3 * CHUNK
+        metadata = pq.ParquetFile(os.path.join(tmpdir, clients["file"])).metadata
+        assert metadata.num_rows == clients["rows"]
+        assert metadata.num_row_groups == math.ceil(clients["rows"] / CHUNK), metadata.num_row_groups
+        # Row groups reach the sink as they are written, not as one file-sized write at the end
+        largest = max(max(sizes) for sizes in sink_writes.values() if sum(sizes) == clients["bytes"])
+        assert largest < clients["bytes"] / 2, (largest, clients["bytes"])
+        assert all(export_service.verify_manifest(tmpdir).values())
+
+        print("Checking the zip export to a file...")
+        path = os.path.join(tmpdir, "backup.zip")
+        with open(path, "wb") as target, read_session() as session:
+            manifest = export_service.export_backup_zip(session, target, "csv.gz", chunk_size=CHUNK)
+        with zipfile.ZipFile(path) as zf:
+            assert json.loads(zf.read(export_service.MANIFEST_NAME)) == manifest
+            for table, entry in manifest["tables"].items():
+                data = zf.read(entry["file"])
+                assert len(data) == entry["bytes"] and hashlib.sha256(data).hexdigest() == entry["sha256"], table
+        assert set(manifest["tables"]) == {"clients", "processes", "phases", "payments", "expenses"}
+        assert manifest["tables"]["clients"]["rows"] == clients["rows"]
+    finally:
+        export_service._HashingWriter.write = write
+        print("Cleaning up...")
+        shutil.rmtree(tmpdir, ignore_errors=True)
+        with unit_of_work() as session:
+            for client_id in client_ids:
+                client_service.delete_client(session, client_id)
+
+    print("Verification Successful!")
+
+if __name__ == "__main__":
+    verify_export()
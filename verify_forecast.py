@@ -0,0 +1,108 @@
+import pandas as pd
+from sqlmodel import Session
+from database import create_db_and_tables, engine
+from services import client_service, process_service, finance_service, expense_service, forecast_service
+
+# Far in the future, so earlier data is older than MAX_AGE and not projected
+AS_OF = "2089-12-31"
+CONDITION = "Previsão Teste"
+
+def forecast(session, months: int = 3) -> dict:
+    df = forecast_service.get_cash_flow_forecast(session, months=months, as_of=AS_OF)
+    return {column: df[column].tolist() for column in df.columns}
+
+def verify_forecast():
+    print("Initializing DB...")
+    create_db_and_tables()
+
+    with Session(engine) as session:
+        print("Creating Test Data...")
+        client = client_service.create_client(session, "Forecast Client", "661", None, None)
+        # History: half paid in the first month, the rest in the second
+        for i in range(forecast_service.MIN_PHASES):
+            proc = process_service.create_process(session, client.id, f"Forecast History {i}")
+            phase = process_service.create_phase(session, proc.id, "Honorários", 100000, condition=CONDITION)
+            finance_service.create_payment(session, phase.id, 50000, "2089-01-10")
+            finance_service.create_payment(session, phase.id, 50000, "2089-02-10")
+        # Started this month: the second half is due next month
+        proc = process_service.create_process(session, client.id, "Forecast Open")
+        phase = process_service.create_phase(session, proc.id, "Honorários", 100000, condition=f"  {CONDITION} ")
+        finance_service.create_payment(session, phase.id, 50000, "2089-12-05")
+        # Six months in: past the history's curve, nothing more expected
+        late = process_service.create_process(session, client.id, "Forecast Late")
+        late_phase = process_service.create_phase(session, late.id, "Honorários", 100000, condition=CONDITION)
+        finance_service.create_payment(session, late_phase.id, 50000, "2089-06-05")
+        # Never paid: no start date, not projected
+        unstarted = process_service.create_process(session, client.id, "Forecast Unstarted")
+        process_service.create_phase(session, unstarted.id, "Honorários", 900000, condition=CONDITION)
+
+        expense_ids = [expense_service.create_expense(session, f"Forecast Aluguel {m:02d}/2089", 300000, f"2089-{m:02d}-05", "Forecast").id
+                       for m in range(6, 13)]
+        expense_ids += [expense_service.create_expense(session, f"Forecast Diversa {m}", 10000 * m, f"2089-{m:02d}-15", "Forecast").id
+                        for m in range(6, 12)]
+        expense_ids.append(expense_service.create_expense(session, "Forecast Aluguel 01/2090", 300000, "2090-01-05", "Forecast", paid=False).id)
+
+        try:
+            print("Checking recurring expenses...")
+            recurring = expense_service.get_recurring_expenses(session, AS_OF)
+            recurring = recurring[recurring["category"] == "Forecast"]
+            assert recurring[["description", "amount_centavos", "months", "last_month"]].values.tolist() == [
+                ["Forecast Aluguel 11/2089", 300000, 6, "2090-01"]
+            ]
+
+            print("Checking forecast...")
+            # Month-2 rate: 20 phases paid their open half, the late one did not (20/21)
+            assert forecast(session) == {
+                "mes": ["2090-01", "2090-02", "2090-03"],
+                "inflow": [47619, 0, 0],
+                "recurring": [0, 300000, 300000],
+                "scheduled": [300000, 0, 0],
+                "net": [-252381, -300000, -300000],
+                "cumulative": [-252381, -552381, -852381],
+            }
+
+            print("Checking pooled rates for thin conditions...")
+            exposure = pd.DataFrame({"condition": ["a"] * 2 + ["b"], "age": [1, 1, 1], "phases": [30, 30, 1],
+                                     "value": [100, 100, 200], "balance": [0, 0, 200]})
+            paid = pd.DataFrame({"condition": ["a", "a"], "age": [1, 1], "lag": [0, 1], "amount": [100, 100]})
+            rates = forecast_service._collection_rates(exposure, paid, ["a", "b"])
+            assert rates[0, :2].tolist() == [0.5, 1.0]
+            # "b" has a single phase, so it takes the rates of both conditions together
+            assert rates[1, :2].tolist() == rates[2, :2].tolist() == [0.25, 100 / 300]
+            # Thin conditions are folded into the pooled row up front, with the same rates
+            assert forecast_service._rated_conditions(exposure) == ["a"]
+            folded = forecast_service._collection_rates(exposure, paid, ["a"])
+            assert folded.shape[0] == 2 and folded[:, :2].tolist() == [[0.5, 1.0], [0.25, 100 / 300]]
+            messy = pd.DataFrame({"condition": [f"cond {i}" for i in range(3000)], "age": [1] * 3000,
+                                  "phases": [1] * 3000, "value": [100] * 3000, "balance": [100] * 3000})
+            assert forecast_service._rated_conditions(messy) == []
+
+            print("Checking payments after as_of...")
+            # Not known at AS_OF: neither the open balance nor the late process's start move
+            after = finance_service.create_payment(session, phase.id, 50000, "2090-01-15")
+            unstarted_phase = process_service.get_phases_by_process(session, unstarted.id)[0]
+            future_start = finance_service.create_payment(session, unstarted_phase.id, 100000, "2090-02-01")
+            assert forecast(session)["inflow"] == [47619, 0, 0]
+            finance_service.delete_payment(session, after.id)
+            finance_service.delete_payment(session, future_start.id)
+
+            print("Checking invalidation...")
+            finance_service.create_payment(session, phase.id, 50000, "2089-12-20")
+            assert forecast(session)["inflow"] == [0, 0, 0]
+
+            try:
+                forecast_service.get_cash_flow_forecast(session, months=0)
+            except ValueError:
+                pass
+            else:
+                raise AssertionError("Horizonte inválido deveria falhar")
+        finally:
+            print("Cleaning up...")
+            client_service.delete_client(session, client.id)
+            for expense_id in expense_ids:
+                expense_service.delete_expense(session, expense_id)
+
+    print("Verification Successful!")
+
+if __name__ == "__main__":
+    verify_forecast()
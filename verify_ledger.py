@@ -0,0 +1,104 @@
+from sqlalchemy import text
+from sqlmodel import Session, select
+from database import create_db_and_tables, engine
+from models import MonthlyLedger
+from services import client_service, process_service, finance_service, expense_service, rollup_service
+
+def ledger(session) -> dict:
+    # month -> (received, expenses paid, expenses pending, net)
+    rows = session.exec(select(MonthlyLedger)).all()
+    return {r.month: (r.received_centavos, r.expenses_paid_centavos, r.expenses_pending_centavos, r.net_centavos) for r in rows}
+
+def test_months(session) -> dict:
+    return {month: row for month, row in ledger(session).items() if month.startswith("2091")}
+
+def verify_ledger():
+    print("Initializing DB...")
+    create_db_and_tables()
+
+    with Session(engine) as session:
+        before = ledger(session)
+
+        print("Creating Test Data...")
+        client = client_service.create_client(session, "Ledger Client", "441", None, None)
+        proc = process_service.create_process(session, client.id, "Ledger Process")
+        phase = process_service.create_phase(session, proc.id, "Phase 1", 500000)
+        pay = finance_service.create_payment(session, phase.id, 100000, "2091-01-10")
+        finance_service.create_payments_bulk(session, [
+            {"phase_id": phase.id, "amount_centavos": 50000, "received_date": "2091-01-20"},
+            {"phase_id": phase.id, "amount_centavos": 70000, "received_date": "2091-02-05"},
+        ])
+        rent = expense_service.create_expense(session, "Ledger Rent", 30000, "2091-01-05", "Ledger", True)
+        bill = expense_service.create_expense(session, "Ledger Bill", 8000, "2091-02-15", "Ledger", False)
+        bulk_ids = expense_service.create_expenses_bulk(session, [
+            {"description": "Ledger Bulk", "amount_centavos": 2000, "date": "2091-02-20", "paid": True},
+        ], return_ids=True)
+
+        try:
+            print("Checking incremental refresh...")
+            assert test_months(session) == {
+                "2091-01": (150000, 30000, 0, 120000),
+                "2091-02": (70000, 2000, 8000, 68000),
+            }
+            finance_service.update_payment(session, pay.id, received_date="2091-03-01", amount_centavos=90000)
+            expense_service.update_expense(session, bill.id, paid=True)
+            expense_service.update_expense(session, rent.id, date="2091-03-02")
+            assert test_months(session) == {
+                "2091-01": (50000, 0, 0, 50000),
+                "2091-02": (70000, 10000, 0, 60000),
+                "2091-03": (90000, 30000, 0, 60000),
+            }
+            # Months left empty disappear
+            finance_service.delete_payment(session, pay.id)
+            expense_service.delete_expense(session, rent.id)
+            assert "2091-03" not in test_months(session)
+            # Other months are never touched
+            assert {m: r for m, r in ledger(session).items() if not m.startswith("2091")} == before
+
+            print("Checking readers...")
+            df = finance_service.get_cash_flow(session, start="2091-01-01", end="2091-02-28")
+            assert df.values.tolist() == [["2091-01", 500.0, 0.0, 0.0, 500.0], ["2091-02", 700.0, 100.0, 0.0, 600.0]]
+            # Bounds inside a month keep only the days in range
+            df = finance_service.get_cash_flow(session, start="2091-01-15", end="2091-02-01")
+            assert df.values.tolist() == [["2091-01", 500.0, 0.0, 0.0, 500.0]]
+            df = finance_service.get_cash_flow(session, start="2091-02-10", end="2091-02-28")
+            assert df.values.tolist() == [["2091-02", 0.0, 100.0, 0.0, -100.0]]
+            df = finance_service.get_cash_flow(session, start="2091-01-21", end="2091-12-31", granularity="quarter")
+            assert df.values.tolist() == [["2091-T1", 700.0, 100.0, 0.0, 600.0]]
+            revenue = finance_service.get_firm_revenue_by_month(session, start="2091-01-21", end="2091-02-06")
+            assert revenue.values.tolist() == [["2091-02", 700.0]]
+            expenses = expense_service.get_expenses_by_month(session, start="2091-02-16", end="2091-03-15")
+            assert expenses.values.tolist() == [["2091-02", 20.0]]
+            df = finance_service.get_cash_flow(session, start="2091-01-01", end="2091-12-31", granularity="quarter")
+            assert df.values.tolist() == [["2091-T1", 1200.0, 100.0, 0.0, 1100.0]]
+            df = finance_service.get_cash_flow(session, start="2091-01-01", end="2091-12-31", granularity="day")
+            assert df["dia"].tolist() == ["2091-01-20", "2091-02-05", "2091-02-15", "2091-02-20"]
+            assert df["Recebido"].sum() == 1200.0 and df["Despesas"].sum() == 100.0
+            revenue = finance_service.get_firm_revenue_by_month(session, start="2091-01-01", end="2091-12-31")
+            assert revenue.values.tolist() == [["2091-01", 500.0], ["2091-02", 700.0]]
+            expenses = expense_service.get_expenses_by_month(session, start="2091-01-01", end="2091-12-31")
+            assert expenses.values.tolist() == [["2091-02", 100.0]]
+
+            print("Checking reconcile and rebuild...")
+            assert rollup_service.reconcile_rollups(session, repair=False).empty
+            session.execute(text("UPDATE monthly_ledger SET net_centavos = 1 WHERE month = '2091-02'"))
+            session.commit()
+            drift = rollup_service.reconcile_rollups(session, repair=True)
+            assert drift[["table", "id", "column", "stored", "expected"]].values.tolist() == [
+                ["monthly_ledger", "2091-02", "net_centavos", 1, 60000]
+            ]
+            current = ledger(session)
+            rollup_service.rebuild_rollups(session)
+            assert ledger(session) == current
+        finally:
+            print("Cleaning up...")
+            client_service.delete_client(session, client.id)
+            for expense_id in [rent.id, bill.id] + bulk_ids:
+                expense_service.delete_expense(session, expense_id)
+            assert test_months(session) == {}
+            assert ledger(session) == before
+
+    print("Verification Successful!")
+
+if __name__ == "__main__":
+    verify_ledger()
@@ -0,0 +1,51 @@
+import numpy as np
+import pandas as pd
+from services.money import format_brl, format_brl_series, parse_cents, to_reais
+
+def verify_money():
+    print("Checking scalar formatting...")
+    assert format_brl(123456) == "R$ 1.234,56"
+    assert format_brl(None) == "R$ 0,00"
+    assert format_brl(-5) == "R$ -0,05"
+    assert format_brl(100000000, symbol=False) == "1.000.000,00"
+
+    print("Checking vectorized formatting...")
+    values = np.random.default_rng(7).integers(-10**12, 10**12, 20_000)
+    values[:6] = [0, 1, -1, 99_999, 100_000, 10**17]
+    assert format_brl_series(values).tolist() == [format_brl(v) for v in values.tolist()]
+    assert format_brl_series(values, symbol=False).tolist() == [format_brl(v, symbol=False) for v in values.tolist()]
+    series = pd.Series([150, None, 2_500_00], index=[10, 20, 30], dtype="Int64")
+    formatted = format_brl_series(series)
+    assert formatted.index.tolist() == [10, 20, 30]
+    assert formatted.tolist() == ["R$ 1,50", "R$ 0,00", "R$ 2.500,00"]
+    assert format_brl_series([]).tolist() == []
+
+    print("Checking cents parsing...")
+    assert parse_cents(None) == 0 and parse_cents("") == 0
+    assert parse_cents(12) == 1200
+    assert parse_cents(0.1 + 0.2) == 30
+    assert parse_cents(1.005) == 101  # round(1.005 * 100) == 100
+    assert parse_cents("1.234,56") == 123456
+    assert parse_cents("R$ 1.234,5") == 123450
+    assert parse_cents("1234.56") == 123456
+    assert parse_cents("1.234.567") == 123456700
+    # pt-BR: dots in groups of three are thousands, never a decimal point
+    assert parse_cents("1.234") == 123400
+    assert parse_cents("-12.500") == -1250000
+    assert parse_cents("1234.5") == 123450 and parse_cents("0.125") == 13
+    for bad in ("abc", "nan", float("inf"), "1.23.4", "1.2345.678"):
+        try:
+            parse_cents(bad)
+        except ValueError:
+            pass
+        else:
+            raise AssertionError(f"{bad!r} deveria ser rejeitado")
+
+    print("Checking reais columns...")
+    df = to_reais(pd.DataFrame({"a": [12345, 0], "b": [-1, 100]}))
+    assert df["a"].tolist() == [123.45, 0.0] and df["b"].tolist() == [-0.01, 1.0]
+
+    print("Verification Successful!")
+
+if __name__ == "__main__":
+    verify_money()
@@ -0,0 +1,90 @@
+from sqlmodel import Session
+from database import create_db_and_tables, engine
+from services import client_service, process_service, expense_service, finance_service
+
+def walk(fetch, page_size: int) -> list:
+    # Follows next_cursor until the last page, returning every item in order
+    items, cursor = [], None
+    while True:
+        page = fetch(cursor=cursor, page_size=page_size)
+        assert len(page.items) <= page_size
+        items.extend(page.items)
+        if page.next_cursor is None:
+            return items
+        cursor = page.next_cursor
+
+def verify_pagination():
+    print("Initializing DB...")
+    create_db_and_tables()
+
+    with Session(engine) as session:
+        print("Creating Test Data...")
+        clients = [
+            client_service.create_client(session, f"Paginação Cliente {n:02d}", f"123.456.789-{n:02d}", None, None)
+            for n in range(7)
+        ]
+        # Duplicate name: the id breaks the tie between pages
+        clients.append(client_service.create_client(session, "Paginação Cliente 03", "987.654.321-00", None, None))
+        processes = [
+            process_service.create_process(session, clients[0].id, f"Paginação Processo {n}",
+                                           cnj=f"000{n}123-45.2024.8.26.0100", responsible="Ana" if n % 2 else "Bruno")
+            for n in range(5)
+        ]
+        expenses = [
+            expense_service.create_expense(session, f"Paginação despesa {n}", 1000, f"2024-01-{n % 3 + 1:02d}",
+                                           category="Custas", paid=n % 2 == 0)
+            for n in range(6)
+        ]
+
+        try:
+            print("Walking client pages...")
+            fetch = lambda **kw: client_service.list_clients(session, "paginação cliente", **kw)
+            walked = walk(fetch, page_size=3)
+            assert fetch().total == len(clients) == len(walked)
+            assert len({c.id for c in walked}) == len(clients)
+            keys = [(c.name, c.id) for c in walked]
+            assert keys == sorted(keys)
+
+            print("Searching by document digits...")
+            assert [c.id for c in client_service.list_clients(session, "98765432100").items] == [clients[-1].id]
+            assert client_service.list_clients(session, "987.654").total == 1
+
+            print("Walking process pages...")
+            fetch = lambda **kw: process_service.list_processes(session, client_id=clients[0].id, **kw)
+            walked = walk(fetch, page_size=2)
+            assert [p.id for p in walked] == [p.id for p in processes]
+            assert walked[0].client.name == clients[0].name
+            assert process_service.list_processes(session, client_id=clients[0].id, responsible="ana").total == 2
+            assert process_service.list_processes(session, "0003123452024").items[0].id == processes[3].id
+
+            print("Walking expense pages (newest first)...")
+            fetch = lambda **kw: expense_service.list_expenses(session, "paginação despesa", **kw)
+            walked = walk(fetch, page_size=4)
+            assert len(walked) == len(expenses)
+            keys = [(e.date, e.id) for e in walked]
+            assert keys == sorted(keys, reverse=True)
+            page = expense_service.list_expenses(session, "paginação despesa", paid=False, start="2024-01-02", end="2024-01-03")
+            assert {e.id for e in page.items} == {e.id for e in expenses if not e.paid and e.date >= "2024-01-02"}
+
+            print("Checking LIKE wildcards are literal...")
+            # Unescaped, "a_a" would match "Ana" and "paginação despesa _" every test expense
+            assert process_service.list_processes(session, client_id=clients[0].id, responsible="a_a").total == 0
+            assert finance_service.get_portfolio_financials(session, responsible="a_a", client_id=clients[0].id).empty
+            assert len(finance_service.get_portfolio_financials(session, responsible="ana", client_id=clients[0].id)) == 2
+            assert expense_service.list_expenses(session, "paginação despesa _").total == 0
+            assert expense_service.list_expenses(session, "paginação despesa %").total == 0
+
+            print("Checking an empty result...")
+            page = client_service.list_clients(session, "nenhum cliente com este nome")
+            assert page.items == [] and page.total == 0 and page.next_cursor is None
+        finally:
+            print("Cleaning up...")
+            for expense in expenses:
+                expense_service.delete_expense(session, expense.id)
+            for client in clients:
+                client_service.delete_client(session, client.id)
+
+    print("Verification Successful!")
+
+if __name__ == "__main__":
+    verify_pagination()
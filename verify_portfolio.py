@@ -0,0 +1,52 @@
+from sqlmodel import Session
+from database import create_db_and_tables, engine
+from services import client_service, process_service, finance_service
+
+def verify_portfolio():
+    print("Initializing DB...")
+    create_db_and_tables()
+
+    with Session(engine) as session:
+        print("Creating Test Data...")
+        client = client_service.create_client(session, "Portfolio Client", "555", "port@test.com", "555")
+        proc1 = process_service.create_process(session, client.id, "Portfolio Process A", responsible="Glauco")
+        proc2 = process_service.create_process(session, client.id, "Portfolio Process B", responsible="Outro", status="Encerrado")
+        proc3 = process_service.create_process(session, client.id, "Portfolio Process C (sem fases)")
+
+        ph1 = process_service.create_phase(session, proc1.id, "Entrada", 100000)
+        ph2 = process_service.create_phase(session, proc1.id, "Êxito", 300000)
+        ph3 = process_service.create_phase(session, proc2.id, "Integral", 50000)
+        finance_service.create_payment(session, ph1.id, 100000, "2025-01-10")
+        finance_service.create_payment(session, ph2.id, 25000, "2025-02-10")
+        finance_service.create_payment(session, ph3.id, 60000, "2025-03-10")
+
+        print("Comparing against get_process_financials...")
+        df = finance_service.get_portfolio_financials(session)
+        assert len(df) == len(process_service.get_all_processes(session))
+
+        for row in df.itertuples():
+            tot, rec, sal, pct = finance_service.get_process_financials(session, row.process_id)
+            assert (row.total_contracted, row.total_received, row.balance) == (tot, rec, sal), row
+            assert abs(row.pct - pct) < 1e-9, row
+
+        print("Checking filters...")
+        df_cli = finance_service.get_portfolio_financials(session, client_id=client.id)
+        assert set(df_cli["process_id"]) == {proc1.id, proc2.id, proc3.id}
+
+        df_resp = finance_service.get_portfolio_financials(session, responsible="glau", client_id=client.id)
+        assert list(df_resp["process_id"]) == [proc1.id]
+
+        df_status = finance_service.get_portfolio_financials(session, status="Encerrado", client_id=client.id)
+        assert list(df_status["process_id"]) == [proc2.id]
+        assert df_status.iloc[0]["balance"] == -10000
+
+        row3 = df_cli[df_cli["process_id"] == proc3.id].iloc[0]
+        assert row3["total_contracted"] == 0 and row3["pct"] == 0.0
+
+        print("Cleaning up...")
+        client_service.delete_client(session, client.id)
+
+    print("Verification Successful!")
+
+if __name__ == "__main__":
+    verify_portfolio()
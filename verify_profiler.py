@@ -0,0 +1,75 @@
+import threading
+import database
+from sqlalchemy import text
+from sqlalchemy.exc import OperationalError
+from sqlmodel import Session
+from database import create_db_and_tables, engine
+from services import client_service, process_service, finance_service, cache
+
+def verify_profiler():
+    print("Initializing DB...")
+    create_db_and_tables()
+    cache.set_cache_enabled(False)
+    database.reset_profiler()
+
+    with Session(engine) as session:
+        print("Checking that a disabled profiler records nothing...")
+        database.disable_profiler()
+        client_service.get_client_options(session)
+        assert database.profile_by_caller() == []
+
+        print("Recording...")
+        database.enable_profiler()
+        database.slow_query_ms = 0  # log everything as slow
+        try:
+            database.profile_page("Teste")
+            client = client_service.create_client(session, "Profiler Client", None, None, None)
+            proc = process_service.create_process(session, client.id, "Profiler Process")
+            process_service.create_phase(session, proc.id, "Phase 1", 1000)
+            finance_service.get_process_financials(session, proc.id)
+            finance_service.get_process_financials(session, proc.id)
+
+            # A failed statement leaves nothing behind on its connection
+            try:
+                session.execute(text("SELECT * FROM no_such_table"))
+            except OperationalError:
+                session.rollback()
+            else:
+                raise AssertionError("Tabela inexistente deveria falhar")
+            assert "profile_t0" not in session.connection().info
+
+            # Renders counted from several script threads at once
+            def render():
+                for _ in range(2000):
+                    database.profile_page("Concorrente")
+            threads = [threading.Thread(target=render) for _ in range(8)]
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+        finally:
+            database.disable_profiler()
+            database.slow_query_ms = 100
+
+        pages = {row["page"]: row for row in database.profile_by_page()}
+        assert pages["Teste"]["renders"] == 1 and pages["Teste"]["queries"] >= 5
+        assert pages["Teste"]["p50_ms"] <= pages["Teste"]["p95_ms"]
+        assert pages["Concorrente"]["renders"] == 8 * 2000
+
+        callers = {row["caller"]: row for row in database.profile_by_caller()}
+        assert callers["services.finance_service.get_process_financials"]["queries"] == 2
+        assert "services.client_service.create_client" in callers
+
+        insert = next(q for q in database.slow_queries() if q["statement"].startswith("INSERT INTO clients"))
+        assert insert["rows"] == 1 and insert["params"] == "4"
+        print(callers["services.finance_service.get_process_financials"])
+
+        print("Cleaning up...")
+        client_service.delete_client(session, client.id)
+        database.reset_profiler()
+        assert database.profile_by_page() == [] and database.slow_queries() == []
+
+    print("Verification Successful!")
+
+if __name__ == "__main__":
+    verify_profiler()
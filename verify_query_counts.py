@@ -0,0 +1,109 @@
+import os
+os.environ.setdefault("LEXFINANCE_CACHE", "0")
+
+from sqlmodel import Session
+from streamlit.testing.v1 import AppTest
+from database import create_db_and_tables, engine, count_statements
+from services import client_service, process_service, finance_service, cache
+
+# Maximum SQL statements per page render (cache disabled). The limits do not depend
+# on the amount of data: a lazy relationship access inside a loop breaks them.
+PAGE_LIMITS = {
+    "app.py": {
+        # Cash-flow forecast: one history query plus recurring and scheduled expenses
+        "Painel": 8,
+        # Paginated listings: one COUNT plus one page query
+        "Clientes": 2,
+        "Processos": 3,
+        "Fases & Recebimentos": 7,
+        "Despesas": 2,
+        # Portfolio tab plus the aging tab (st.tabs renders both)
+        "Relatórios": 2,
+        "Backup & Utilitários": 0,
+    },
+    "main.py": {
+        "Painel": 7,
+        "Clientes": 2,
+        "Processos": 3,
+        "Fases & Recebimentos": 5,
+        "Relatórios": 2,
+        "Backup": 0,
+    },
+}
+
+# Statements a single page section (an st.fragment in ui/) runs when one of its
+# widgets changes: far fewer than its page, which no longer reruns as a whole.
+SECTION_LIMITS = {
+    # Phase options come from the page run
+    ("ui.finance", "show_phases"): 0,
+    # Payment list and process summary
+    ("ui.finance", "show_payments"): 2,
+    ("ui.dashboard", "show_forecast"): 3,
+    ("ui.reports", "show_portfolio"): 1,
+    ("ui.reports", "show_aging"): 1,
+}
+
+def render_counts(script: str, pages) -> dict:
+    at = AppTest.from_file(script, default_timeout=60)
+    at.run()
+    counts = {}
+    for page in pages:
+        with count_statements() as statements:
+            at.sidebar.radio[0].set_value(page).run()
+        assert not at.exception, (script, page, at.exception)
+        counts[page] = len(statements)
+    return counts
+
+def section_script(module: str, name: str, args: tuple):
+    import importlib
+    getattr(importlib.import_module(module), name)(*args)
+
+def section_count(module: str, name: str, *args) -> int:
+    at = AppTest.from_function(section_script, args=(module, name, args), default_timeout=60)
+    with count_statements() as statements:
+        at.run()
+    assert not at.exception, (module, name, at.exception)
+    return len(statements)
+
+def verify_query_counts():
+    print("Initializing DB...")
+    create_db_and_tables()
+    cache.set_cache_enabled(False)
+
+    with Session(engine) as session:
+        print("Creating Test Data...")
+        # Several processes, phases and payments so a per-row lazy load shows up in the counts
+        clients = [client_service.create_client(session, f"Count Client {i}", None, None, None) for i in range(3)]
+        for client in clients:
+            for j in range(3):
+                proc = process_service.create_process(session, client.id, f"Count Process {j}")
+                for k in range(3):
+                    phase = process_service.create_phase(session, proc.id, f"Phase {k}", 10000)
+                    finance_service.create_payment(session, phase.id, 1000, "2025-01-15")
+
+        try:
+            for script, limits in PAGE_LIMITS.items():
+                print(f"Rendering {script}...")
+                counts = render_counts(script, limits)
+                for page, count in counts.items():
+                    print(f"  {page:<24}{count:>4} / {limits[page]}")
+                for page, count in counts.items():
+                    assert count <= limits[page], f"{script} {page}: {count} statements (max {limits[page]})"
+
+            print("Rendering sections...")
+            process_id = process_service.get_process_options(session, clients[0].id)[0][0]
+            phase_map = {phase.description: phase.id for phase in process_service.get_phases_by_process(session, process_id)}
+            for (module, name), limit in SECTION_LIMITS.items():
+                args = (process_id, phase_map) if module == "ui.finance" else ()
+                count = section_count(module, name, *args)
+                print(f"  {name:<24}{count:>4} / {limit}")
+                assert count <= limit, f"{module}.{name}: {count} statements (max {limit})"
+        finally:
+            print("Cleaning up...")
+            for client in clients:
+                client_service.delete_client(session, client.id)
+
+    print("Verification Successful!")
+
+if __name__ == "__main__":
+    verify_query_counts()
@@ -1,6 +1,7 @@
 from sqlmodel import Session
-from database import create_db_and_tables, engine
-from services import client_service, process_service, finance_service, report_service
+from database import create_db_and_tables, engine, count_statements
+from services import client_service, process_service, finance_service, report_service, cache
+import io
 import os
 
 def verify_report():
@@ -14,12 +15,14 @@ def verify_report():
         phase = process_service.create_phase(session, proc.id, "Phase 1", 100000)
         finance_service.create_payment(session, phase.id, 50000, "2025-02-01")
         
-        # Reload to get relationships
-        session.refresh(client)
-        session.refresh(proc)
-        
-        # Prepare data for report
-        procs = [proc] # In real app we fetch list
+        # Load the whole report graph up front
+        client_id = client.id
+        session.expire_all()
+        with count_statements() as statements:
+            client = client_service.get_client_report_graph(session, client_id)
+            procs = sorted(client.processes, key=lambda p: p.title)
+            assert sum(p.amount_centavos for pr in procs for ph in pr.phases for p in ph.payments) == 50000
+        assert len(statements) == 4, statements  # client, processes, phases, payments
         
         # Financials
         tot, rec, bal, _ = finance_service.get_process_financials(session, proc.id)
@@ -36,7 +39,50 @@ def verify_report():
         assert os.path.exists(filename)
         assert filename.endswith(".pdf")
         
+        print("Generating PDF in memory...")
+        buffer = io.BytesIO()
+        name = report_service.generate_client_report(client, procs, fins, stream=buffer)
+        assert name == filename and buffer.getvalue().startswith(b"%PDF-")
+        
+        cache.set_cache_enabled(True)
+        before = cache.cache_stats()
+        name, data = report_service.get_client_report(session, client.id)
+        assert report_service.get_client_report(session, client.id) == (name, data)
+        assert cache.cache_stats()["hits"] == before["hits"] + 1
+        assert not os.path.exists(name) or name == filename
+        
+        stream = io.BytesIO()
+        report_service.write_client_report(session, client.id, stream)
+        assert stream.getvalue() == data
+        
+        # Writes to another client leave this report cached
+        other = client_service.create_client(session, "Report Other", "998", None, None)
+        other_proc = process_service.create_process(session, other.id, "Other Process")
+        other_phase = process_service.create_phase(session, other_proc.id, "Phase 1", 5000)
+        finance_service.create_payment(session, other_phase.id, 1000, "2025-03-01")
+        client_service.update_client(session, other.id, name="Report Other 2")
+        before = cache.cache_stats()
+        assert report_service.get_client_report(session, client.id) == (name, data)
+        assert cache.cache_stats()["hits"] == before["hits"] + 1
+        
+        # A new payment changes the statement, so it is rendered again
+        finance_service.create_payment(session, phase.id, 10000, "2025-03-01")
+        paid_more = report_service.get_client_report(session, client.id)[1]
+        assert paid_more != data
+        data = paid_more
+        
+        print("Checking edits that change only text...")
+        for write in (lambda: client_service.update_client(session, client.id, email="novo@test.com"),
+                      lambda: process_service.update_process(session, proc.id, notes="Anotação"),
+                      lambda: process_service.update_phase(session, phase.id, description="Fase renomeada")):
+            write()
+            before = cache.cache_stats()
+            renamed = report_service.get_client_report(session, client.id)
+            assert cache.cache_stats()["misses"] == before["misses"] + 1 and renamed[1] != data
+            data = renamed[1]
+        
         print("Cleaning up...")
+        client_service.delete_client(session, other.id)
         process_service.delete_process(session, proc.id)
         # Client cleanup skipped for simplicity
         if os.path.exists(filename):
@@ -0,0 +1,67 @@
+from sqlmodel import Session
+from database import create_db_and_tables, engine
+from services import client_service, process_service, finance_service, rollup_service, cache
+
+def verify_rollups():
+    print("Initializing DB...")
+    create_db_and_tables()
+    cache.set_cache_enabled(False)
+
+    with Session(engine) as session:
+        print("Checking existing rollups...")
+        assert rollup_service.reconcile_rollups(session, repair=False).empty
+
+        print("Creating Test Data...")
+        client_a = client_service.create_client(session, "Rollup Client A", "881", "a@test.com", "881")
+        client_b = client_service.create_client(session, "Rollup Client B", "882", "b@test.com", "882")
+        proc = process_service.create_process(session, client_a.id, "Rollup Process")
+        other = process_service.create_process(session, client_a.id, "Rollup Other")
+        p1 = process_service.create_phase(session, proc.id, "Phase 1", 100000)
+        p2 = process_service.create_phase(session, proc.id, "Phase 2", 50000)
+        pay = finance_service.create_payment(session, p1.id, 30000, "2025-01-10")
+        finance_service.create_payments_bulk(session, [
+            {"phase_id": p1.id, "amount_centavos": 10000, "received_date": "2025-02-10"},
+            {"phase_id": p2.id, "amount_centavos": 5000, "received_date": "2025-02-11"},
+        ])
+        assert finance_service.get_process_financials(session, proc.id) == (150000, 45000, 105000, 0.3)
+        assert finance_service.get_client_financials(session, client_a.id)[:3] == (150000, 45000, 105000)
+        phases = finance_service.get_phase_financials(session, proc.id)
+        assert phases["received_centavos"].tolist() == [40000, 5000]
+        assert phases["balance_centavos"].tolist() == [60000, 45000]
+
+        print("Checking updates...")
+        finance_service.update_payment(session, pay.id, amount_centavos=20000, phase_id=p2.id)
+        assert finance_service.get_phase_financials(session, proc.id)["received_centavos"].tolist() == [10000, 25000]
+        process_service.update_phase(session, p2.id, value_centavos=60000)
+        process_service.update_phase(session, p2.id, process_id=other.id)
+        assert finance_service.get_process_financials(session, proc.id)[:2] == (100000, 10000)
+        assert finance_service.get_process_financials(session, other.id)[:2] == (60000, 25000)
+        process_service.update_process(session, other.id, client_id=client_b.id)
+        assert finance_service.get_client_financials(session, client_a.id)[:2] == (100000, 10000)
+        assert finance_service.get_client_financials(session, client_b.id)[:2] == (60000, 25000)
+
+        print("Checking deletes...")
+        process_service.delete_phase(session, p1.id)
+        assert finance_service.get_process_financials(session, proc.id) == (0, 0, 0, 0.0)
+        df = finance_service.get_portfolio_financials(session, client_id=client_b.id)
+        assert df["total_contracted"].tolist() == [60000] and df["total_received"].tolist() == [25000]
+        assert rollup_service.reconcile_rollups(session, repair=False).empty
+
+        print("Checking drift repair...")
+        session.connection().exec_driver_sql(
+            f"UPDATE process_totals SET received_centavos = 1 WHERE process_id = {other.id}")
+        session.commit()
+        drift = rollup_service.reconcile_rollups(session)
+        assert set(drift["table"]) == {"process_totals"}, drift
+        assert rollup_service.reconcile_rollups(session, repair=False).empty
+        assert finance_service.get_process_financials(session, other.id)[:2] == (60000, 25000)
+
+        print("Cleaning up...")
+        client_service.delete_client(session, client_a.id)
+        client_service.delete_client(session, client_b.id)
+        assert rollup_service.reconcile_rollups(session, repair=False).empty
+
+    print("Verification Successful!")
+
+if __name__ == "__main__":
+    verify_rollups()
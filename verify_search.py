@@ -0,0 +1,77 @@
+from sqlmodel import Session
+from database import create_db_and_tables, engine
+from services import client_service, process_service, finance_service, search_service
+
+def found(session, query: str, kind: str) -> list:
+    df = search_service.search(session, query, limit=50)
+    return df[df["kind"] == kind]["id"].tolist()
+
+def verify_search():
+    print("Initializing DB...")
+    create_db_and_tables()
+
+    with Session(engine) as session:
+        print("Creating Test Data...")
+        client = client_service.create_client(session, "Conceição Buscável Araújo", "123.456.789-09", None, None)
+        other = client_service.create_client(session, "Empresa Buscável Ltda", "12.345.678/0001-95", None, None)
+        proc = process_service.create_process(session, client.id, "Ação Indenizatória Buscável",
+                                              cnj="0801234-56.2024.8.26.0100", notes="Perícia médica marcada")
+        proc_notes = process_service.create_process(session, other.id, "Execução Fiscal",
+                                                    notes="Indenizatória buscável citada nas observações")
+        bulk_ids = client_service.create_clients_bulk(session, [{"name": "Joaquim Buscável Lote", "cpf_cnpj": "98765432100"}], return_ids=True)
+
+        try:
+            print("Checking accents and case...")
+            assert client.id in found(session, "conceicao araujo", "cliente")
+            assert proc.id in found(session, "ACAO buscavel", "processo")
+            assert proc.id in found(session, "pericia", "processo")
+
+            print("Checking CPF/CNPJ and CNJ punctuation...")
+            for query in ("123.456.789-09", "12345678909", "123456789"):
+                assert found(session, query, "cliente") == [client.id], query
+            assert found(session, "12345678000195", "cliente") == [other.id]
+            for query in ("0801234-56.2024.8.26.0100", "08012345620248260100", "0801234"):
+                assert found(session, query, "processo") == [proc.id], query
+            # The client's document also finds their processes
+            assert proc.id in found(session, "12345678909", "processo")
+
+            print("Checking ranking...")
+            ranked = found(session, "indenizatoria buscavel", "processo")
+            assert ranked[:2] == [proc.id, proc_notes.id], ranked  # title beats notes
+
+            print("Checking sync on writes...")
+            assert found(session, "98765432100", "cliente") == bulk_ids
+            client_service.update_client(session, client.id, name="Maria Buscável Renomeada", cpf_cnpj="111.222.333-44")
+            assert found(session, "conceicao buscavel", "cliente") == []
+            assert found(session, "renomeada", "cliente") == [client.id]
+            assert proc.id in found(session, "renomeada", "processo")
+            assert proc.id in found(session, "11122233344", "processo")
+            process_service.update_process(session, proc.id, title="Revisional Buscável", cnj="0999999-11.2023.8.26.0001")
+            assert found(session, "0801234", "processo") == []
+            assert found(session, "revisional buscavel", "processo") == [proc.id]
+            process_service.delete_process(session, proc_notes.id)
+            assert proc_notes.id not in found(session, "execucao fiscal buscavel", "processo")
+
+            print("Checking filtered listings...")
+            assert [c.id for c in client_service.list_clients(session, "maria renomeada").items] == [client.id]
+            assert [p.id for p in process_service.list_processes(session, "revisional buscavel").items] == [proc.id]
+            df = finance_service.get_portfolio_financials(session, search="0999999")
+            assert df["process_id"].tolist() == [proc.id]
+
+            print("Checking rebuild and odd input...")
+            search_service.rebuild_search_index(session)
+            assert found(session, "revisional buscavel", "processo") == [proc.id]
+            for query in ("", "  ", '"', "NEAR(", "-", "AND OR"):
+                search_service.search(session, query)
+            assert search_service.match_query("- / .") is None
+        finally:
+            print("Cleaning up...")
+            for client_id in [client.id, other.id] + bulk_ids:
+                client_service.delete_client(session, client_id)
+            assert found(session, "buscavel", "cliente") == []
+            assert found(session, "buscavel", "processo") == []
+
+    print("Verification Successful!")
+
+if __name__ == "__main__":
+    verify_search()
@@ -0,0 +1,66 @@
+from sqlalchemy.exc import OperationalError
+from database import create_db_and_tables, engine, read_session, unit_of_work, write_session
+from models import Client
+from services import client_service, process_service, finance_service, cache
+
+def verify_sessions():
+    print("Initializing DB...")
+    create_db_and_tables()
+    cache.set_cache_enabled(True)
+    client_id = None
+
+    try:
+        print("Checking read-only sessions...")
+        with read_session() as session:
+            before = len(client_service.get_all_clients(session))
+            try:
+                client_service.create_client(session, "Session Read Only", None, None, None)
+            except OperationalError as e:
+                assert "readonly" in str(e.orig), e
+            else:
+                raise AssertionError("Escrita em read_session deveria falhar")
+        # The connection went back to the pool writable
+        with write_session() as session:
+            client_id = client_service.create_client(session, "Session Writable", None, None, None).id
+            client_service.delete_client(session, client_id)
+        client_id = None
+
+        print("Checking unit of work rollback...")
+        try:
+            with unit_of_work() as session:
+                discarded_id = client_service.create_client(session, "Session Rolled Back", None, None, None).id
+                discarded_process_id = process_service.create_process(session, discarded_id, "Session Process").id
+                process_service.create_phase(session, discarded_process_id, "Discarded", 55555)
+                # Cached inside the block, with rows that are about to be discarded
+                assert finance_service.get_phase_financials(session, discarded_process_id)["value_centavos"].tolist() == [55555]
+                raise RuntimeError("abort")
+        except RuntimeError:
+            pass
+        with read_session() as session:
+            assert session.get(Client, discarded_id) is None
+            assert finance_service.get_phase_financials(session, discarded_process_id).empty
+            assert len(client_service.get_all_clients(session)) == before
+
+        print("Checking unit of work commit...")
+        with unit_of_work() as session:
+            client_id = client_service.create_client(session, "Session Committed", None, None, None).id
+            proc = process_service.create_process(session, client_id, "Session Process")
+            phase = process_service.create_phase(session, proc.id, "Phase 1", 100000)
+            finance_service.create_payment(session, phase.id, 40000, "2025-03-10")
+            # Reads inside the block see its own writes
+            assert finance_service.get_process_financials(session, proc.id)[:3] == (100000, 40000, 60000)
+        with read_session() as session:
+            assert finance_service.get_client_financials(session, client_id)[:3] == (100000, 40000, 60000)
+
+        print("Checking pool...")
+        assert engine.pool.checkedout() == 0
+    finally:
+        print("Cleaning up...")
+        if client_id is not None:
+            with write_session() as session:
+                client_service.delete_client(session, client_id)
+
+    print("Verification Successful!")
+
+if __name__ == "__main__":
+    verify_sessions()
@@ -0,0 +1,88 @@
+import os
+import shutil
+import tempfile
+from datetime import datetime, timedelta
+from sqlmodel import SQLModel, Session, create_engine, select
+import database  # the engine-wide PRAGMA profile
+from models import Client
+from services import client_service, snapshot_service
+from services.index_service import migrate_indexes
+from services.rollup_service import install_rollups
+from services.search_service import install_search_index
+
+MODEL_INDEXES = {index.name for table in SQLModel.metadata.sorted_tables for index in table.indexes}
+
+def indexes(bind) -> set:
+    with bind.connect() as conn:
+        return {row[0] for row in conn.exec_driver_sql("SELECT name FROM sqlite_master WHERE type = 'index'")}
+
+def verify_snapshots():
+    # A throwaway database: restoring overwrites the whole file
+    tmpdir = tempfile.mkdtemp(prefix="lexfinance_snapshots_")
+    engine = create_engine(f"sqlite:///{os.path.join(tmpdir, 'live.db')}", connect_args={"check_same_thread": False})
+    try:
+        print("Initializing DB...")
+        SQLModel.metadata.create_all(engine)
+        migrate_indexes(engine)
+        install_rollups(engine)
+        install_search_index(engine)
+        assert MODEL_INDEXES <= indexes(engine)
+
+        with Session(engine) as session:
+            client_service.create_client(session, "Snapshot Client", "991", None, None)
+
+            print("Taking a snapshot of a database without indexes...")
+            # As in lexfinance.db files from before the index migration
+            with engine.begin() as conn:
+                for name in MODEL_INDEXES:
+                    conn.exec_driver_sql(f"DROP INDEX {name}")
+            snapshot = snapshot_service.create_snapshot(session, os.path.join(tmpdir, "snapshots"), label="sem-indices")
+            assert snapshot["integrity"]
+            migrate_indexes(engine)
+            client_service.create_client(session, "Snapshot Later", "992", None, None)
+
+            print("Restoring...")
+            snapshot_service.restore_snapshot(session, snapshot["path"])
+            assert session.exec(select(Client.name)).all() == ["Snapshot Client"]
+            missing = MODEL_INDEXES - indexes(engine)
+            assert not missing, f"Índices ausentes após restaurar: {sorted(missing)}"
+
+        print("Taking a snapshot in the background...")
+        background = os.path.join(tmpdir, "background")
+        job = snapshot_service.start_snapshot(engine, background, label="fundo", pages=1)
+        info = job.result(timeout=30)
+        assert info["integrity"] and info["pruned"] == []
+        assert job.progress == (info["pages"], info["pages"]) and info["pages"] > 1
+        assert [s["label"] for s in snapshot_service.list_snapshots(background)] == ["fundo"]
+        try:
+            snapshot_service.start_snapshot(engine, os.path.join(tmpdir, "live.db")).result(timeout=30)
+        except OSError:
+            pass
+        else:
+            raise AssertionError("Snapshot em pasta inválida deveria falhar")
+
+        print("Pruning spares labelled and recent snapshots...")
+        pruning = os.path.join(tmpdir, "pruning")
+        os.makedirs(pruning)
+        now = datetime.now()
+        def fake(created: datetime, label: str = "") -> str:
+            name = f"lexfinance_{created.strftime(snapshot_service.TIMESTAMP_FORMAT)}{'_' + label if label else ''}.db"
+            open(os.path.join(pruning, name), "wb").close()
+            return name
+        recent = [fake(now - timedelta(minutes=m)) for m in range(1, 4)]
+        old = [fake(datetime(2020, 1, 1, 12, m)) for m in range(3)]
+        labelled = [fake(datetime(2019, 6, 1), "pre-restore"), fake(datetime(2019, 6, 2), "fim-de-ano")]
+        deleted = snapshot_service.prune_snapshots(pruning, keep_last=1, keep_daily=0, keep_monthly=0, keep_days=1)
+        assert sorted(os.path.basename(p) for p in deleted) == sorted(old)
+        assert sorted(os.listdir(pruning)) == sorted(recent + labelled)
+        deleted = snapshot_service.prune_snapshots(pruning, keep_last=1, keep_daily=0, keep_monthly=0, keep_days=0)
+        assert sorted(os.listdir(pruning)) == sorted(recent[:1] + labelled), os.listdir(pruning)
+    finally:
+        print("Cleaning up...")
+        engine.dispose()
+        shutil.rmtree(tmpdir, ignore_errors=True)
+
+    print("Verification Successful!")
+
+if __name__ == "__main__":
+    verify_snapshots()
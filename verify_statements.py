@@ -0,0 +1,61 @@
+import io
+import os
+import shutil
+import tempfile
+import zipfile
+from sqlmodel import Session
+from database import create_db_and_tables, engine
+from services import client_service, process_service, finance_service, report_service
+
+def verify_statements():
+    print("Initializing DB...")
+    create_db_and_tables()
+
+    with Session(engine) as session:
+        print("Creating Test Data...")
+        client = client_service.create_client(session, "Statement Client", "555", "st@test.com", "555")
+        empty = client_service.create_client(session, "Statement Empty", "556", None, None)
+        proc = process_service.create_process(session, client.id, "Statement Process", cnj="0001")
+        p1 = process_service.create_phase(session, proc.id, "Phase 1", 100000)
+        process_service.create_phase(session, proc.id, "Phase 2", 20000)
+        finance_service.create_payment(session, p1.id, 30000, "2025-02-01")
+        finance_service.create_payment(session, p1.id, 20000, "2025-03-01")
+
+        print("Checking prefetched statements...")
+        statements = report_service.load_statements(session, [client.id, empty.id])
+        assert [s["client"]["id"] for s in statements] == [client.id, empty.id]
+        st = statements[0]
+        assert st["financials"] == {"total_contracted": 120000, "total_received": 50000, "balance": 70000}
+        assert [(ph["value_centavos"], ph["received_centavos"]) for ph in st["processes"][0]["phases"]] == [(100000, 50000), (20000, 0)]
+        assert statements[1]["processes"] == []
+
+        # Same document as the per-client path walking the ORM relationships
+        session.refresh(proc)
+        legacy = report_service._statement_from_orm(client, [proc], st["financials"])
+        assert legacy["processes"] == st["processes"]
+
+        print("Generating batch...")
+        outdir = tempfile.mkdtemp()
+        try:
+            docs = report_service.generate_statements(session, outdir, [client.id, empty.id], workers=2)
+            assert len(docs) == 2 and all(d["bytes"] > 0 and d["seconds"] >= 0 for d in docs)
+            for d in docs:
+                with open(os.path.join(outdir, d["file"]), "rb") as f:
+                    assert f.read(5) == b"%PDF-"
+        finally:
+            shutil.rmtree(outdir)
+
+        buffer = io.BytesIO()
+        docs = report_service.generate_statements_zip(session, buffer, [client.id], workers=1)
+        with zipfile.ZipFile(buffer) as zf:
+            assert zf.namelist() == [docs[0]["file"]]
+        print(docs)
+
+        print("Cleaning up...")
+        client_service.delete_client(session, client.id)
+        client_service.delete_client(session, empty.id)
+
+    print("Verification Successful!")
+
+if __name__ == "__main__":
+    verify_statements()
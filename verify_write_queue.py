@@ -0,0 +1,153 @@
+import threading
+from types import SimpleNamespace
+import database
+from sqlalchemy.exc import IntegrityError
+from sqlalchemy.pool import QueuePool
+from sqlmodel import create_engine, select
+from database import create_db_and_tables, engine, read_session, unit_of_work
+from models import Payment
+from services import client_service, process_service, finance_service
+from write_queue import WriteQueue
+
+def verify_write_queue():
+    print("Initializing DB...")
+    create_db_and_tables()
+
+    with unit_of_work() as session:
+        client = client_service.create_client(session, "Queue Client", "771", None, None)
+        proc = process_service.create_process(session, client.id, "Queue Process")
+        phase = process_service.create_phase(session, proc.id, "Phase 1", 500000)
+        client_id, proc_id, phase_id = client.id, proc.id, phase.id
+
+    # A linger long enough for every write below to land in one batch
+    queue = WriteQueue(linger=0.5)
+    try:
+        print("Checking futures and group commit...")
+        futures = [queue.submit(finance_service.create_payment, phase_id, 10000 * (i + 1), "2092-01-10") for i in range(5)]
+        futures.insert(2, queue.submit(finance_service.create_payment, 999999999, 1, "2092-01-10"))
+        payments = [f.result(timeout=10) for i, f in enumerate(futures) if i != 2]
+        assert [p.amount_centavos for p in payments] == [10000, 20000, 30000, 40000, 50000]
+        try:
+            futures[2].result(timeout=10)
+        except IntegrityError:
+            pass
+        else:
+            raise AssertionError("Fase inexistente deveria falhar")
+
+        stats = queue.stats()
+        assert stats["writes"] == 6 and stats["failed"] == 1 and stats["batches"] == 1, stats
+        assert stats["mean_batch"] == 6 and stats["depth"] == 0
+        assert stats["commit_p95_ms"] > 0 and stats["wait_p95_ms"] >= 500
+
+        print("Checking per-write rollback...")
+        def create_then_fail(session):
+            finance_service.create_payment(session, phase_id, 70000, "2092-01-20")
+            raise RuntimeError("falha depois da escrita")
+        failing = queue.submit(create_then_fail)
+        kept = queue.submit(finance_service.create_payment, phase_id, 80000, "2092-01-21")
+        try:
+            failing.result(timeout=10)
+        except RuntimeError:
+            pass
+        else:
+            raise AssertionError("A escrita deveria falhar")
+        kept.result(timeout=10)
+        with read_session() as session:
+            amounts = sorted(session.exec(select(Payment.amount_centavos).where(Payment.phase_id == phase_id)).all())
+        assert amounts == [10000, 20000, 30000, 40000, 50000, 80000], amounts
+
+        print("Checking cache invalidation...")
+        with read_session() as session:
+            assert finance_service.get_process_financials(session, proc_id)[1] == 230000
+        queue.submit(finance_service.delete_payment, kept.result().id).result(timeout=10)
+        with read_session() as session:
+            assert finance_service.get_process_financials(session, proc_id)[1] == 150000
+
+        print("Checking nested submit...")
+        def nested(session):
+            return queue.submit(finance_service.delete_payment, payments[0].id)
+        try:
+            queue.submit(nested).result(timeout=10)
+        except RuntimeError:
+            pass
+        else:
+            raise AssertionError("Escrita aninhada deveria falhar")
+
+        print("Checking concurrent writers...")
+        errors = []
+        def writer():
+            try:
+                for _ in range(10):
+                    queue.submit(finance_service.create_payment, phase_id, 100, "2092-02-01").result(timeout=30)
+            except Exception as exc:  # noqa: BLE001
+                errors.append(exc)
+        queue.linger = 0.0
+        threads = [threading.Thread(target=writer) for _ in range(10)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert not errors, errors
+        with read_session() as session:
+            assert finance_service.get_process_financials(session, proc_id)[1] == 150000 + 100 * 100
+
+        print("Checking writes with every pooled connection taken...")
+        # Pages wait on write() while holding their read_session(); the writer must not need the pool
+        small = create_engine(engine.url, connect_args={"check_same_thread": False}, poolclass=QueuePool,
+                              pool_size=2, max_overflow=0, pool_timeout=1)
+        held = [small.connect() for _ in range(2)]
+        small_queue = WriteQueue(bind=small)
+        try:
+            payment = small_queue.submit(finance_service.create_payment, phase_id, 300, "2092-02-02").result(timeout=10)
+            assert payment.amount_centavos == 300
+        finally:
+            small_queue.close()
+            for conn in held:
+                conn.close()
+            small.dispose()
+        with read_session() as session:
+            assert finance_service.get_process_financials(session, proc_id)[1] == 150000 + 100 * 100 + 300
+
+        print("Checking queued writes reach the profiler...")
+        database.reset_profiler()
+        database.enable_profiler()
+        try:
+            queue.submit(finance_service.create_payment, phase_id, 400, "2092-02-03").result(timeout=10)
+        finally:
+            database.disable_profiler()
+        callers = {row["caller"] for row in database.profile_by_caller()}
+        database.reset_profiler()
+        assert "services.finance_service.create_payment" in callers, callers
+
+        print("Checking a writer that cannot start...")
+        for url in ("nosuchdialect://", "sqlite:////nonexistent-dir/lexfinance.db"):
+            broken = WriteQueue(bind=SimpleNamespace(url=url))
+            try:
+                for _ in range(2):  # after a failure the next write tries again
+                    future = broken.submit(finance_service.create_payment, phase_id, 1, "2092-02-04")
+                    try:
+                        future.result(timeout=10)
+                    except TimeoutError:
+                        raise AssertionError(f"Escrita em {url} ficou pendente")
+                    except Exception:  # noqa: BLE001 (whatever the driver raised)
+                        pass
+                    else:
+                        raise AssertionError(f"Escrita em {url} deveria falhar")
+            finally:
+                broken.close(timeout=10)
+    finally:
+        print("Cleaning up...")
+        queue.close()
+        try:
+            queue.submit(client_service.delete_client, client_id)
+        except RuntimeError:
+            pass
+        else:
+            raise AssertionError("Fila encerrada deveria recusar escritas")
+        with unit_of_work() as session:
+            client_service.delete_client(session, client_id)
+
+    print("Verification Successful!")
+
+if __name__ == "__main__":
+    verify_write_queue()
@@ -0,0 +1,233 @@
+"""
+Single-writer queue for the service layer.
+
+SQLite admits one writer at a time: concurrent writers wait on the database lock
+(busy_timeout) and fail with "database is locked" when the wait runs out, which
+happens sooner on the network profile, where every commit is a full fsync on a
+synced drive. Here all writes go to one thread instead. Writes that arrive while
+a commit is in progress are applied together in the next transaction and
+committed once (group commit), so the lock is taken once per batch and the fsync
+cost is shared. Reads do not go through the queue and stay concurrent.
+
+The writer keeps a connection of its own, outside the shared pool: pages hold a
+pooled connection in their read_session() while they wait on a write, so with
+every pooled connection taken the writer could otherwise never commit them.
+
+    future = submit(finance_service.create_payment, phase_id, 50_000, "2025-03-10")
+    payment = future.result()  # raises what the service raised
+
+    payment = write(finance_service.create_payment, phase_id, 50_000, "2025-03-10")
+
+A write is a function `fn(session, *args, **kwargs)`, usually a service function.
+Each one runs in its own savepoint: one that raises is rolled back alone and its
+future gets the exception, while the rest of the batch commits. Futures complete
+only after the commit, so a result is always durable. ORM objects come back
+detached, with the attributes loaded when the service returned.
+"""
+import atexit
+import math
+import queue
+import threading
+import time
+from collections import deque
+from concurrent.futures import Future
+from typing import Callable, List, Optional
+
+from sqlalchemy.pool import StaticPool
+from sqlmodel import Session, create_engine
+
+from database import engine
+from services import cache
+
+MAX_BATCH = 64
+LATENCY_WINDOW = 1000  # commits kept for the latency percentiles
+
+def _percentile(values: List[float], q: float) -> Optional[float]:
+    # Nearest-rank percentile
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(q * len(ordered)) - 1)]
+
+class WriteQueue:
+    """One writer thread applying queued writes in group commits to the database of `bind` (an Engine)."""
+
+    def __init__(self, bind=engine, max_batch: int = MAX_BATCH, linger: float = 0.0):
+        # linger: seconds to wait for more writes after the first of a batch (0 = take what is queued)
+        self.bind = bind
+        self.max_batch = max_batch
+        self.linger = linger
+        self._queue: "queue.Queue" = queue.Queue()
+        self._lock = threading.Lock()
+        self._commit_ms = deque(maxlen=LATENCY_WINDOW)
+        self._wait_ms = deque(maxlen=LATENCY_WINDOW)
+        self._counts = {"writes": 0, "failed": 0, "batches": 0, "failed_batches": 0}
+        self._thread: Optional[threading.Thread] = None
+        self._closed = False
+
+    def submit(self, fn: Callable, *args, **kwargs) -> Future:
+        """Queues `fn(session, *args, **kwargs)`; the future resolves after its batch commits."""
+        if threading.current_thread() is self._thread:
+            # The writer would wait for itself
+            raise RuntimeError("Escrita enfileirada de dentro de outra escrita; chame a função diretamente com a sessão recebida")
+        future = Future()
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("Fila de escrita encerrada")
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name="lexfinance-writer", daemon=True)
+                self._thread.start()
+            self._queue.put((future, fn, args, kwargs, time.perf_counter()))
+        return future
+
+    def close(self, timeout: Optional[float] = None):
+        """Stops accepting writes, lets the queued ones commit and stops the writer thread."""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed = True
+            thread = self._thread
+        if thread is not None:
+            self._queue.put(None)
+            thread.join(timeout)
+
+    def stats(self) -> dict:
+        """depth (writes waiting), writes, failed, batches, failed_batches, mean_batch and commit/wait p50/p95 in ms."""
+        with self._lock:
+            commit_ms, wait_ms = list(self._commit_ms), list(self._wait_ms)
+            counts = dict(self._counts)
+        return {
+            "depth": self._queue.qsize(),
+            **counts,
+            "mean_batch": counts["writes"] / counts["batches"] if counts["batches"] else None,
+            "commit_p50_ms": _percentile(commit_ms, 0.50),
+            "commit_p95_ms": _percentile(commit_ms, 0.95),
+            "wait_p50_ms": _percentile(wait_ms, 0.50),
+            "wait_p95_ms": _percentile(wait_ms, 0.95),
+        }
+
+    def _next_batch(self) -> Optional[list]:
+        first = self._queue.get()
+        if first is None:
+            return None
+        batch = [first]
+        deadline = time.perf_counter() + self.linger
+        while len(batch) < self.max_batch:
+            try:
+                timeout = deadline - time.perf_counter()
+                job = self._queue.get(timeout=timeout) if timeout > 0 else self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if job is None:
+                # Stop after this batch
+                self._queue.put(None)
+                break
+            batch.append(job)
+        return batch
+
+    def _run(self):
+        batch = None
+        try:
+            # One connection, kept for the thread's life and never checked out of bind's pool;
+            # the PRAGMA profile and the profiler listen on every Engine (see database.py)
+            writer = create_engine(self.bind.url, connect_args={"check_same_thread": False}, poolclass=StaticPool)
+            try:
+                while True:
+                    batch = self._next_batch()
+                    if batch is None:
+                        return
+                    self._commit(writer, batch)
+                    batch = None
+            finally:
+                writer.dispose()
+        except BaseException as exc:
+            # No caller may wait forever on a writer that is gone: fail what it held and
+            # what is queued; the next submit starts a new writer
+            with self._lock:
+                self._thread = None
+                pending = list(batch or [])
+                while True:
+                    try:
+                        job = self._queue.get_nowait()
+                    except queue.Empty:
+                        break
+                    if job is not None:
+                        pending.append(job)
+            for future, *_ in pending:
+                if not future.done():
+                    future.set_exception(exc)
+            if not isinstance(exc, Exception):
+                raise
+
+    def _commit(self, writer, batch: list):
+        jobs = [job for job in batch if job[0].set_running_or_notify_cancel()]
+        if not jobs:
+            return
+        outcomes = []  # (future, result, exception, submitted)
+        t0 = time.perf_counter()
+        try:
+            with writer.connect() as conn, cache.record_bumps() as written:
+                try:
+                    # The write lock up front, as in database.unit_of_work
+                    conn.exec_driver_sql("BEGIN IMMEDIATE")
+                    for future, fn, args, kwargs, submitted in jobs:
+                        savepoint = conn.begin_nested()
+                        try:
+                            # expire_on_commit=False: results are read by the caller after this session closes
+                            with Session(bind=conn, join_transaction_mode="create_savepoint", expire_on_commit=False) as session:
+                                result = fn(session, *args, **kwargs)
+                                session.commit()
+                            savepoint.commit()
+                        except Exception as exc:
+                            savepoint.rollback()
+                            outcomes.append((future, None, exc, submitted))
+                        else:
+                            outcomes.append((future, result, None, submitted))
+                    conn.commit()
+                finally:
+                    # Reads cached between a service's return and the commit saw rows that were not final yet
+                    cache.bump(*written)
+        except Exception as exc:
+            # BEGIN or COMMIT failed: nothing in the batch was written
+            with self._lock:
+                self._counts["failed_batches"] += 1
+                self._counts["failed"] += len(jobs)
+            for future, *_ in jobs:
+                future.set_exception(exc)
+            return
+
+        done = time.perf_counter()
+        with self._lock:
+            self._counts["batches"] += 1
+            self._counts["writes"] += len(jobs)
+            self._counts["failed"] += sum(1 for _, _, exc, _ in outcomes if exc is not None)
+            self._commit_ms.append((done - t0) * 1000)
+            self._wait_ms.extend((done - submitted) * 1000 for *_, submitted in outcomes)
+        for future, result, exc, _ in outcomes:
+            if exc is not None:
+                future.set_exception(exc)
+            else:
+                future.set_result(result)
+
+_default: Optional[WriteQueue] = None
+_default_lock = threading.Lock()
+
+def get_write_queue() -> WriteQueue:
+    """The process-wide queue on database.engine, created on first use."""
+    global _default
+    with _default_lock:
+        if _default is None:
+            _default = WriteQueue()
+            atexit.register(_default.close)
+        return _default
+
+def submit(fn: Callable, *args, **kwargs) -> Future:
+    """Queues `fn(session, *args, **kwargs)` on the process-wide queue."""
+    return get_write_queue().submit(fn, *args, **kwargs)
+
+def write(fn: Callable, *args, **kwargs):
+    """submit() and wait: returns what `fn` returned or raises what it raised."""
+    return submit(fn, *args, **kwargs).result()
+
+def write_queue_stats() -> dict:
+    return get_write_queue().stats()